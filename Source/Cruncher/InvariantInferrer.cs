@@ -32,32 +32,50 @@ namespace Whoop
     private ExecutionTimer Timer;
 
     private Houdini Houdini;
+    private List<AnalysisContext> PortfolioACs;
 
-    public InvariantInferrer(AnalysisContext ac, AnalysisContext acPost, EntryPoint ep)
+    public InvariantInferrer(AnalysisContext ac, AnalysisContext acPost, EntryPoint ep,
+      List<AnalysisContext> portfolioACs = null)
     {
       Contract.Requires(ac != null && acPost != null && ep != null);
       this.AC = ac;
       this.PostAC = acPost;
       this.EP = ep;
       this.Houdini = null;
+      this.PortfolioACs = portfolioACs ?? new List<AnalysisContext>();
     }
 
     public void Run()
     {
       this.AC.EliminateDeadVariables();
       this.AC.Inline();
+      foreach (var ac in this.PortfolioACs)
+      {
+        ac.EliminateDeadVariables();
+        ac.Inline();
+      }
+
+      if (Summarisation.SummaryLibrary.IsEnabled)
+      {
+        Summarisation.SummaryLibrary.RemoveSummarisedImplementations(this.AC);
+        foreach (var ac in this.PortfolioACs)
+          Summarisation.SummaryLibrary.RemoveSummarisedImplementations(ac);
+      }
 
       if (WhoopCruncherCommandLineOptions.Get().MeasurePassExecutionTime)
       {
         Console.WriteLine(" |------ [{0}]", this.EP.Name);
         Console.WriteLine(" |  |");
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
       }
 
+      this.Timer = new ExecutionTimer(this.EP.Name, "InvariantInferrer");
+      this.Timer.Start();
+
       HoudiniOutcome outcome = null;
 
       this.PerformHoudini(ref outcome);
+      if (Summarisation.SummaryLibrary.IsEnabled)
+        Summarisation.SummaryLibrary.Record(this.AC, this.EP, outcome);
       this.ApplyInvariants(ref outcome);
 
       this.AC.ResetToProgramTopLevelDeclarations();
@@ -67,18 +85,16 @@ namespace Whoop
       ModelCleaner.RemoveGlobalLocksets(this.PostAC);
       ModelCleaner.RemoveExistentials(this.PostAC);
 
-      if (!(WhoopCruncherCommandLineOptions.Get().InliningBound > 0 &&
-          this.AC.GetNumOfEntryPointRelatedFunctions(this.EP.Name) <=
-        WhoopCruncherCommandLineOptions.Get().InliningBound))
+      if (!InliningAnalyser.IsEntryPointInlined(this.AC, this.EP))
       {
         ModelCleaner.RemoveWhoopFunctions(this.PostAC);
         ModelCleaner.RemoveConstants(this.PostAC);
         ModelCleaner.RemoveImplementations(this.PostAC);
       }
 
+      this.Timer.Stop();
       if (WhoopCruncherCommandLineOptions.Get().MeasurePassExecutionTime)
       {
-        this.Timer.Stop();
         Console.WriteLine(" |  |");
         Console.WriteLine(" |  |--- [Total] {0}", this.Timer.Result());
         Console.WriteLine(" |");
@@ -91,8 +107,23 @@ namespace Whoop
     private void PerformHoudini(ref HoudiniOutcome outcome)
     {
       var houdiniStats = new HoudiniSession.HoudiniStatistics();
-      this.Houdini = new Houdini(this.AC.Program, houdiniStats);
-      outcome = this.Houdini.PerformHoudiniInference();
+      var houdiniTimer = new ExecutionTimer(this.EP.Name, "Houdini");
+
+      if (SolverPortfolio.IsEnabled)
+      {
+        houdiniTimer.Start();
+        outcome = this.PerformHoudiniWithPortfolio(houdiniTimer, ref houdiniStats);
+      }
+      else
+      {
+        this.Houdini = new Houdini(this.AC.Program, houdiniStats);
+        houdiniTimer.Start();
+        outcome = this.Houdini.PerformHoudiniInference();
+      }
+
+      houdiniTimer.Annotate("proverQueries", houdiniStats.numProverQueries);
+      houdiniTimer.Annotate("proverTime", houdiniStats.proverTime);
+      houdiniTimer.Stop();
 
       if (CommandLineOptions.Clo.PrintAssignment)
       {
@@ -124,6 +155,66 @@ namespace Whoop
       }
     }
 
+    /// <summary>
+    /// Runs Houdini on a copy of the entry point with each backend of the solver portfolio
+    /// and keeps the first assignment that is computed without any prover giving up.
+    /// </summary>
+    private HoudiniOutcome PerformHoudiniWithPortfolio(ExecutionTimer houdiniTimer,
+      ref HoudiniSession.HoudiniStatistics houdiniStats)
+    {
+      var backends = SolverPortfolio.Backends;
+      var acs = new List<AnalysisContext> { this.AC };
+      acs.AddRange(this.PortfolioACs);
+      Contract.Assert(acs.Count == backends.Count);
+
+      var houdinis = new Houdini[backends.Count];
+      var outcomes = new HoudiniOutcome[backends.Count];
+      var stats = new HoudiniSession.HoudiniStatistics[backends.Count];
+      var cancelled = new bool[backends.Count];
+
+      int winner = SolverPortfolio.Race(idx =>
+      {
+        stats[idx] = new HoudiniSession.HoudiniStatistics();
+        var houdini = SolverPortfolio.CreateWithBackend(backends[idx], () =>
+          new Houdini(acs[idx].Program, stats[idx]));
+
+        lock (cancelled)
+        {
+          houdinis[idx] = houdini;
+          if (cancelled[idx])
+          {
+            houdini.Close();
+            return false;
+          }
+        }
+
+        outcomes[idx] = houdini.PerformHoudiniInference();
+        return outcomes[idx].implementationOutcomes.Values.All(val =>
+          val.outcome == VC.VCGen.Outcome.Correct || val.outcome == VC.VCGen.Outcome.Errors);
+      }, idx =>
+      {
+        lock (cancelled)
+        {
+          cancelled[idx] = true;
+          if (houdinis[idx] != null)
+            houdinis[idx].Close();
+        }
+      });
+
+      if (winner == -1)
+      {
+        Whoop.IO.Reporter.ErrorWriteLine("Whoop: error: no backend of the solver portfolio completed Houdini");
+        Environment.Exit((int)Outcome.FatalError);
+      }
+
+      houdiniTimer.Annotate("backend", backends[winner]);
+      this.AC = acs[winner];
+      this.Houdini = houdinis[winner];
+      houdiniStats = stats[winner];
+
+      return outcomes[winner];
+    }
+
     private void ApplyInvariants(ref HoudiniOutcome outcome)
     {
       if (this.Houdini != null) {
@@ -11,6 +11,7 @@
 
 using System;
 using System.IO;
+using System.Linq;
 using System.Collections.Generic;
 using System.Diagnostics.Contracts;
 
@@ -78,11 +79,15 @@ namespace Whoop
         {
           Console.WriteLine("\n[Cruncher] runtime");
           Console.WriteLine(" |");
-          timer = new ExecutionTimer();
-          timer.Start();
         }
 
+        timer = new ExecutionTimer("Cruncher", "phase");
+        timer.Start();
+
         var alreadyCrunched = new HashSet<string>();
+        int total = DeviceDriver.EntryPoints.Select(val => val.Name).Distinct().Count(val =>
+          Summarisation.SummaryInformationParser.AvailableSummaries.Contains(val));
+        ExecutionProgress.Report("houdini", 0, total);
         foreach (var ep in DeviceDriver.EntryPoints)
         {
           if (!Summarisation.SummaryInformationParser.AvailableSummaries.Contains(ep.Name))
@@ -96,18 +101,31 @@ namespace Whoop
             ref ac, new List<string> { ep.Name + "$instrumented" });
           new AnalysisContextParser(fileList[fileList.Count - 1], "wbpl").TryParseNew(
             ref acPost, new List<string> { ep.Name + "$instrumented" });
-          new InvariantInferrer(ac, acPost, ep).Run();
+
+          var portfolioACs = new List<AnalysisContext>();
+          for (int idx = 1; SolverPortfolio.IsEnabled && idx < SolverPortfolio.Backends.Count; idx++)
+          {
+            AnalysisContext copy = null;
+            new AnalysisContextParser(fileList[fileList.Count - 1], "wbpl").TryParseNew(
+              ref copy, new List<string> { ep.Name + "$instrumented" });
+            portfolioACs.Add(copy);
+          }
+
+          new InvariantInferrer(ac, acPost, ep, portfolioACs).Run();
 
           alreadyCrunched.Add(ep.Name);
+          ExecutionProgress.Report("houdini", alreadyCrunched.Count, total);
         }
 
+        timer.Stop();
         if (WhoopCruncherCommandLineOptions.Get().MeasurePassExecutionTime)
         {
-          timer.Stop();
           Console.WriteLine(" |");
           Console.WriteLine(" |--- [Total] {0}", timer.Result());
         }
 
+        SolverPortfolio.WriteStatistics();
+        ExecutionTimeline.Flush();
         Environment.Exit((int)Outcome.Done);
       }
       catch (Exception e)
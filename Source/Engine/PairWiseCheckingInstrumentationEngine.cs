@@ -38,10 +38,12 @@ namespace Whoop
       {
         Console.WriteLine(" |------ [{0} :: {1}]", this.Pair.EntryPoint1.Name, this.Pair.EntryPoint2.Name);
         Console.WriteLine(" |  |");
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
       }
 
+      this.Timer = new ExecutionTimer(this.Pair.EntryPoint1.Name + " :: " +
+        this.Pair.EntryPoint2.Name, "PairWiseCheckingInstrumentationEngine");
+      this.Timer.Start();
+
       Analysis.Factory.CreateLockAbstraction(this.AC).Run();
 
       if (this.Pair.EntryPoint1.Name.Equals(this.Pair.EntryPoint2.Name))
@@ -64,9 +66,9 @@ namespace Whoop
 //      ModelCleaner.RemoveNonPairMemoryRegions(this.AC, pair.Item1, pair.Item2);
       ModelCleaner.RemoveCorralFunctions(this.AC);
 
+      this.Timer.Stop();
       if (WhoopEngineCommandLineOptions.Get().MeasurePassExecutionTime)
       {
-        this.Timer.Stop();
         Console.WriteLine(" |  |");
         Console.WriteLine(" |  |--- [Total] {0}", this.Timer.Result());
         Console.WriteLine(" |");
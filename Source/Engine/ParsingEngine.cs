@@ -43,10 +43,11 @@ namespace Whoop
       {
         Console.WriteLine(" |------ [{0}]", this.EP.Name);
         Console.WriteLine(" |  |");
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
       }
 
+      this.Timer = new ExecutionTimer(this.EP.Name, "ParsingEngine");
+      this.Timer.Start();
+
       Analysis.Factory.CreateLockAbstraction(this.AC).Run();
       Refactoring.Factory.CreateLockRefactoring(this.AC, this.EP).Run();
       Refactoring.Factory.CreateFunctionPointerRefactoring(this.AC, this.EP).Run();
@@ -55,9 +56,9 @@ namespace Whoop
       ModelCleaner.RemoveCorralFunctions(this.AC);
       ModelCleaner.RemoveModelledProcedureBodies(this.AC);
 
+      this.Timer.Stop();
       if (WhoopEngineCommandLineOptions.Get().MeasurePassExecutionTime)
       {
-        this.Timer.Stop();
         Console.WriteLine(" |  |");
         Console.WriteLine(" |  |--- [Total] {0}", this.Timer.Result());
         Console.WriteLine(" |");
@@ -11,6 +11,7 @@
 
 using System;
 using System.IO;
+using System.Linq;
 using System.Collections.Generic;
 using System.Diagnostics.Contracts;
 
@@ -82,10 +83,19 @@ namespace Whoop
         }
 
         Program.RunParsingEngine();
-        Program.RunStaticLocksetAnalysisInstrumentationEngine();
-        Program.RunSummaryGenerationEngine();
+        if (WhoopEngineCommandLineOptions.Get().BoundedMemory)
+        {
+          Program.RunBoundedMemoryEngine();
+        }
+        else
+        {
+          Program.RunStaticLocksetAnalysisInstrumentationEngine();
+          Program.RunSummaryGenerationEngine();
+        }
         Program.RunPairWiseCheckingInstrumentationEngine();
 
+        Program.ReportPeakMemory();
+        ExecutionTimeline.Flush();
         Environment.Exit((int)Outcome.Done);
       }
       catch (Exception e)
@@ -99,6 +109,7 @@ namespace Whoop
     private static void RunParsingEngine()
     {
       Program.StartTimer("ParsingEngine");
+      int done = 0;
 
       AnalysisContext programAC = null;
       new AnalysisContextParser(Program.FileList[Program.FileList.Count - 1],
@@ -107,20 +118,51 @@ namespace Whoop
       Refactoring.Factory.CreateProgramSimplifier(programAC).Run();
       Analysis.ModelCleaner.RemoveCorralFunctions(programAC);
 
+      if (!WhoopEngineCommandLineOptions.Get().NoProgramPruning)
+        Program.PruneProgram(programAC);
+
       Whoop.IO.BoogieProgramEmitter.Emit(programAC.TopLevelDeclarations, WhoopEngineCommandLineOptions.Get().Files[
         WhoopEngineCommandLineOptions.Get().Files.Count - 1],"wbpl");
 
+      ExecutionProgress.Report("parsing", 0, DeviceDriver.EntryPoints.Count);
       foreach (var ep in DeviceDriver.EntryPoints)
       {
         AnalysisContext ac = null;
         new AnalysisContextParser(Program.FileList[Program.FileList.Count - 1],
           "wbpl").TryParseNew(ref ac);
         new ParsingEngine(ac, ep).Run();
+        ExecutionProgress.Report("parsing", ++done, DeviceDriver.EntryPoints.Count);
       }
 
       Program.StopTimer();
     }
 
+    /// <summary>
+    /// Removes the declarations that no entry point can reach, before the program is
+    /// copied into the files of every entry point and pair.
+    /// </summary>
+    private static void PruneProgram(AnalysisContext programAC)
+    {
+      var timer = new ExecutionTimer("ProgramPruning", "pass");
+      timer.Start();
+
+      int declarations = programAC.TopLevelDeclarations.Count;
+      int procedures = programAC.TopLevelDeclarations.OfType<Procedure>().Count();
+      int removed = Refactoring.ProgramPruning.Prune(programAC);
+      int removedProcedures = procedures - programAC.TopLevelDeclarations.OfType<Procedure>().Count();
+
+      timer.Annotate("removedDeclarations", removed);
+      timer.Annotate("removedProcedures", removedProcedures);
+      timer.Stop();
+
+      if (WhoopEngineCommandLineOptions.Get().MeasurePassExecutionTime)
+      {
+        Console.WriteLine(" |  |------ [ProgramPruning] {0}", timer.Result());
+        Console.WriteLine(" |  |         removed {0} of {1} declarations ({2} of {3} procedures)",
+          removed, declarations, removedProcedures, procedures);
+      }
+    }
+
     private static void RunStaticLocksetAnalysisInstrumentationEngine()
     {
       Program.StartTimer("StaticLocksetAnalysisInstrumentationEngine");
@@ -135,10 +177,13 @@ namespace Whoop
         AnalysisContext.RegisterEntryPointAnalysisContext(ac, ep);
       }
 
+      int done = 0;
+      ExecutionProgress.Report("instrumentation", 0, DeviceDriver.EntryPoints.Count);
       foreach (var ep in DeviceDriver.EntryPoints)
       {
         var ac = AnalysisContext.GetAnalysisContext(ep);
         new StaticLocksetAnalysisInstrumentationEngine(ac, ep).Run();
+        ExecutionProgress.Report("instrumentation", ++done, DeviceDriver.EntryPoints.Count);
       }
 
       Program.StopTimer();
@@ -162,10 +207,55 @@ namespace Whoop
         new WatchdogAnalysisEngine(ac, ep).Run();
       }
 
+      int done = 0;
+      ExecutionProgress.Report("summaries", 0, DeviceDriver.EntryPoints.Count);
       foreach (var ep in DeviceDriver.EntryPoints)
       {
         var ac = AnalysisContext.GetAnalysisContext(ep);
         new SummaryGenerationEngine(ac, ep).Run();
+        ExecutionProgress.Report("summaries", ++done, DeviceDriver.EntryPoints.Count);
+      }
+
+      Program.StopTimer();
+      SummaryInformationParser.ToFile(Program.FileList);
+    }
+
+    /// <summary>
+    /// Takes each entry point through instrumentation and summary generation
+    /// before parsing the next one, and keeps only what the pairing phase needs
+    /// from its context. The memory regions of all entry points are still
+    /// computed up front, which costs every entry point a second parse.
+    /// </summary>
+    private static void RunBoundedMemoryEngine()
+    {
+      Program.StartTimer("BoundedMemoryEngine");
+
+      foreach (var ep in DeviceDriver.EntryPoints)
+      {
+        AnalysisContext ac = null;
+        new AnalysisContextParser(Program.FileList[Program.FileList.Count - 1], "wbpl").TryParseNew(
+          ref ac, new List<string> { ep.Name });
+        Analysis.SharedStateAnalyser.AnalyseMemoryRegions(ac, ep);
+      }
+
+      int done = 0;
+      ExecutionProgress.Report("entryPoints", 0, DeviceDriver.EntryPoints.Count);
+      foreach (var ep in DeviceDriver.EntryPoints)
+      {
+        AnalysisContext ac = null;
+        new AnalysisContextParser(Program.FileList[Program.FileList.Count - 1], "wbpl").TryParseNew(
+          ref ac, new List<string> { ep.Name });
+        AnalysisContext.RegisterEntryPointAnalysisContext(ac, ep);
+
+        new StaticLocksetAnalysisInstrumentationEngine(ac, ep).Run();
+        if (!WhoopEngineCommandLineOptions.Get().SkipInference)
+        {
+          new WatchdogAnalysisEngine(ac, ep).Run();
+          new SummaryGenerationEngine(ac, ep).Run();
+        }
+
+        ac.ReduceToEntryPoint(ep);
+        ExecutionProgress.Report("entryPoints", ++done, DeviceDriver.EntryPoints.Count);
       }
 
       Program.StopTimer();
@@ -176,36 +266,82 @@ namespace Whoop
     {
       Program.StartTimer("PairWiseCheckingInstrumentationEngine");
 
+      if (!WhoopEngineCommandLineOptions.Get().NoPairDischarging)
+        Analysis.RaceFreePairAnalyser.Analyse();
+      Analysis.RaceFreePairAnalyser.ToFile(Program.FileList);
+
       AnalysisContext analysisContext = null;
       new AnalysisContextParser(Program.FileList[Program.FileList.Count - 1],
         "wbpl").TryParseNew(ref analysisContext);
 
+      int done = 0;
+      int total = DeviceDriver.EntryPointPairs.Count(val => !Analysis.RaceFreePairAnalyser.IsDischarged(val));
+      ExecutionProgress.Report("pairInstrumentation", 0, total);
       foreach (var pair in DeviceDriver.EntryPointPairs)
       {
+        if (Analysis.RaceFreePairAnalyser.IsDischarged(pair))
+          continue;
+
         new PairWiseCheckingInstrumentationEngine(analysisContext, pair).Run();
         analysisContext.ResetAnalysisContext();
         analysisContext.ResetToProgramTopLevelDeclarations();
+        ExecutionProgress.Report("pairInstrumentation", ++done, total);
+
+        if (WhoopEngineCommandLineOptions.Get().BoundedMemory)
+          Program.ReleasePairedContexts(pair);
       }
 
       Program.StopTimer();
     }
 
+    private static void ReleasePairedContexts(EntryPointPair pair)
+    {
+      AnalysisContext.ReleasePairAnalysisContexts();
+
+      var remaining = DeviceDriver.EntryPointPairs.Skip(
+        DeviceDriver.EntryPointPairs.IndexOf(pair) + 1).Where(val =>
+          !Analysis.RaceFreePairAnalyser.IsDischarged(val)).ToList();
+      foreach (var ep in new List<EntryPoint> { pair.EntryPoint1, pair.EntryPoint2 })
+      {
+        if (remaining.Any(val => val.EntryPoint1.Equals(ep) || val.EntryPoint2.Equals(ep)))
+          continue;
+        AnalysisContext.ReleaseAnalysisContext(ep);
+      }
+    }
+
+    private static void ReportPeakMemory()
+    {
+      var peak = Process.GetCurrentProcess().PeakWorkingSet64;
+      if (ExecutionTimeline.IsEnabled)
+      {
+        ExecutionTimeline.Record("PeakMemory", "memory", DateTime.UtcNow, TimeSpan.Zero,
+          new Dictionary<string, object> { { "bytes", peak } });
+      }
+
+      if (WhoopEngineCommandLineOptions.Get().MeasurePassExecutionTime ||
+        WhoopEngineCommandLineOptions.Get().BoundedMemory)
+      {
+        Console.WriteLine("[PeakMemory] {0} MB", peak / (1024 * 1024));
+      }
+    }
+
     private static void StartTimer(string engineName)
     {
       if (WhoopEngineCommandLineOptions.Get().MeasurePassExecutionTime)
       {
         Console.WriteLine("\n[" + engineName + "] runtime");
         Console.WriteLine(" |");
-        Program.Timer = new ExecutionTimer();
-        Program.Timer.Start();
       }
+
+      Program.Timer = new ExecutionTimer(engineName, "phase");
+      Program.Timer.Start();
     }
 
     private static void StopTimer()
     {
+      Program.Timer.Stop();
       if (WhoopEngineCommandLineOptions.Get().MeasurePassExecutionTime)
       {
-        Program.Timer.Stop();
         Console.WriteLine(" |");
         Console.WriteLine(" |--- [Total] {0}\n", Program.Timer.Result());
       }
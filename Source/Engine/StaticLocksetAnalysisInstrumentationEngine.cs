@@ -39,10 +39,11 @@ namespace Whoop
       {
         Console.WriteLine(" |------ [{0}]", this.EP.Name);
         Console.WriteLine(" |  |");
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
       }
 
+      this.Timer = new ExecutionTimer(this.EP.Name, "StaticLocksetAnalysisInstrumentationEngine");
+      this.Timer.Start();
+
       SharedStateAnalyser.AnalyseMemoryRegionsWithPairInformation(this.AC, this.EP);
 
       Instrumentation.Factory.CreateInstrumentationRegionsConstructor(this.AC, this.EP).Run();
@@ -73,23 +74,28 @@ namespace Whoop
         ModelCleaner.RemoveGlobalLocksets(this.AC);
         ModelCleaner.RemoveInlineFromHelperFunctions(this.AC, this.EP);
       }
-      else if (WhoopEngineCommandLineOptions.Get().InliningBound > 0 &&
-        this.AC.GetNumOfEntryPointRelatedFunctions(this.EP.Name) <=
-        WhoopEngineCommandLineOptions.Get().InliningBound)
+      else if (InliningAnalyser.IsEntryPointInlined(this.AC, this.EP))
       {
         this.AC.InlineEntryPoint(this.EP);
       }
       else
       {
         ModelCleaner.RemoveInlineFromHelperFunctions(this.AC, this.EP);
+        if (WhoopEngineCommandLineOptions.Get().InliningCost > 0 &&
+            !WhoopEngineCommandLineOptions.Get().InlineHelperFunctions)
+        {
+          var inlined = InliningAnalyser.Analyse(this.AC, this.EP);
+          this.Timer.Annotate("inlinedHelpers", inlined.Count);
+          this.Timer.Annotate("inlined", String.Join(",", inlined));
+        }
       }
 
       ModelCleaner.RemoveUnecesseryInfoFromSpecialFunctions(this.AC);
       ModelCleaner.RemoveCorralFunctions(this.AC);
 
+      this.Timer.Stop();
       if (WhoopEngineCommandLineOptions.Get().MeasurePassExecutionTime)
       {
-        this.Timer.Stop();
         Console.WriteLine(" |  |");
         Console.WriteLine(" |  |--- [Total] {0}", this.Timer.Result());
         Console.WriteLine(" |");
@@ -38,10 +38,11 @@ namespace Whoop
       {
         Console.WriteLine(" |------ [{0}]", this.EP.Name);
         Console.WriteLine(" |  |");
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
       }
 
+      this.Timer = new ExecutionTimer(this.EP.Name, "SummaryGenerationEngine");
+      this.Timer.Start();
+
 //      Analysis.Factory.CreatePairWatchdogInformationAnalysis(this.AC, this.EP).Run();
 
       if (!WhoopEngineCommandLineOptions.Get().CheckInParamAliasing)
@@ -51,13 +52,16 @@ namespace Whoop
       Summarisation.Factory.CreateAccessCheckingSummaryGeneration(this.AC, this.EP).Run();
 //      Summarisation.Factory.CreateDomainKnowledgeSummaryGeneration(this.AC, this.EP).Run();
 
+      if (Summarisation.SummaryLibrary.IsEnabled)
+        this.Timer.Annotate("librarySummaries", Summarisation.SummaryLibrary.Apply(this.AC, this.EP));
+
       Summarisation.SummaryInformationParser.RegisterSummaryName(this.EP.Name);
 
       ModelCleaner.RemoveCorralFunctions(this.AC);
 
+      this.Timer.Stop();
       if (WhoopEngineCommandLineOptions.Get().MeasurePassExecutionTime)
       {
-        this.Timer.Stop();
         Console.WriteLine(" |  |");
         Console.WriteLine(" |  |--- [Total] {0}", this.Timer.Result());
         Console.WriteLine(" |");
@@ -37,16 +37,17 @@ namespace Whoop
       {
         Console.WriteLine(" |------ [{0}]", this.EP.Name);
         Console.WriteLine(" |  |");
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
       }
 
+      this.Timer = new ExecutionTimer(this.EP.Name, "WatchdogAnalysisEngine");
+      this.Timer.Start();
+
       Analysis.Factory.CreateFunctionPointerUseAnalysis(this.AC, this.EP).Run();
       Analysis.Factory.CreateWatchdogInformationAnalysis(this.AC, this.EP).Run();
 
+      this.Timer.Stop();
       if (WhoopEngineCommandLineOptions.Get().MeasurePassExecutionTime)
       {
-        this.Timer.Stop();
         Console.WriteLine(" |  |");
         Console.WriteLine(" |  |--- [Total] {0}", this.Timer.Result());
         Console.WriteLine(" |");
@@ -16,6 +16,9 @@ namespace Whoop
 {
   internal class WhoopEngineCommandLineOptions : WhoopCommandLineOptions
   {
+    public bool NoPairDischarging = false;
+    public bool NoProgramPruning = false;
+
     public WhoopEngineCommandLineOptions()
       : base("Whoop", "Whoop static lockset analyser")
     {
@@ -24,6 +27,18 @@ namespace Whoop
 
     protected override bool ParseOption(string option, CommandLineOptionEngine.CommandLineParseState ps)
     {
+      if (option == "noPairDischarging")
+      {
+        this.NoPairDischarging = true;
+        return true;
+      }
+
+      if (option == "noProgramPruning")
+      {
+        this.NoProgramPruning = true;
+        return true;
+      }
+
       return base.ParseOption(option, ps);
     }
 
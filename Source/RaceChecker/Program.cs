@@ -72,6 +72,7 @@ namespace Whoop
 
         DeviceDriver.ParseAndInitialize(fileList);
         Summarisation.SummaryInformationParser.FromFile(fileList);
+        Analysis.RaceFreePairAnalyser.FromFile(fileList);
 
         PipelineStatistics stats = new PipelineStatistics();
         ExecutionTimer timer = null;
@@ -80,80 +81,109 @@ namespace Whoop
         {
           Console.WriteLine("\n[RaceChecker] runtime");
           Console.WriteLine(" |");
-          timer = new ExecutionTimer();
-          timer.Start();
         }
 
+        timer = new ExecutionTimer("RaceChecker", "phase");
+        timer.Start();
+
+        var pairFiles = new Dictionary<EntryPointPair, List<string>>();
+        foreach (var pair in DeviceDriver.EntryPointPairs)
+          pairFiles.Add(pair, Program.GetPairFiles(pair));
+
+        // the yield instrumentation needs the race checked program of every pair it instruments
+        if (!WhoopRaceCheckerCommandLineOptions.Get().NoPairDeduplication &&
+            !(WhoopRaceCheckerCommandLineOptions.Get().FindBugs &&
+              (WhoopRaceCheckerCommandLineOptions.Get().YieldAll ||
+               !WhoopRaceCheckerCommandLineOptions.Get().SkipRaceFreePairs)))
+          Analysis.PairEquivalenceAnalyser.Analyse(fileList[fileList.Count - 1], "wbpl", pairFiles);
+
         var pairMap = new Dictionary<EntryPointPair, Tuple<AnalysisContext, ErrorReporter>>();
+        var outcomes = new Dictionary<EntryPointPair, VC.VCGen.Outcome>();
+        int done = 0;
         foreach (var pair in DeviceDriver.EntryPointPairs)
         {
+          ExecutionProgress.Report("pairs", done++, DeviceDriver.EntryPointPairs.Count);
+          if (Analysis.RaceFreePairAnalyser.IsDischarged(pair))
+          {
+            Whoop.IO.Reporter.Inform(String.Format("{0} :: {1}  verified (no conflicting accesses)",
+              pair.EntryPoint1.Name, pair.EntryPoint2.Name));
+            stats.VerifiedCount++;
+            continue;
+          }
+
+          var representative = Analysis.PairEquivalenceAnalyser.GetRepresentative(pair);
+          if (outcomes.ContainsKey(representative))
+          {
+            Program.ReportEquivalentOutcome(pair, representative, outcomes[representative], stats);
+            continue;
+          }
+
           AnalysisContext ac = null;
           var parser = new AnalysisContextParser(fileList[fileList.Count - 1], "wbpl");
           var errorReporter = new ErrorReporter(pair);
 
-          if (pair.EntryPoint1.Name.Equals(pair.EntryPoint2.Name))
+          parser.TryParseNew(ref ac, pairFiles[pair]);
+
+          var portfolioACs = new List<AnalysisContext>();
+          for (int idx = 1; SolverPortfolio.IsEnabled && idx < SolverPortfolio.Backends.Count; idx++)
+          {
+            AnalysisContext copy = null;
+            parser.TryParseNew(ref copy, pairFiles[pair]);
+            portfolioACs.Add(copy);
+          }
+
+          var analyser = new StaticLocksetAnalyser(ac, pair, errorReporter, stats, portfolioACs);
+          analyser.Run();
+
+          // in bounded memory mode the checked program is not kept around for the yield instrumentation
+          if (WhoopRaceCheckerCommandLineOptions.Get().BoundedMemory)
           {
-            string extension = null;
-            if (Summarisation.SummaryInformationParser.AvailableSummaries.Contains(pair.EntryPoint1.Name))
-              extension = "$summarised";
-            else
-              extension = "$instrumented";
-
-            parser.TryParseNew(ref ac, new List<string> { "check_" + pair.EntryPoint1.Name + "_" +
-              pair.EntryPoint2.Name, pair.EntryPoint1.Name + extension });
+            if (WhoopRaceCheckerCommandLineOptions.Get().FindBugs)
+              Program.RunYieldInstrumentationEngine(fileList, pair, analyser.CheckedAC, errorReporter);
+            pairMap.Add(pair, new Tuple<AnalysisContext, ErrorReporter>(null, errorReporter));
           }
           else
           {
-            string extension1 = null;
-            if (Summarisation.SummaryInformationParser.AvailableSummaries.Contains(pair.EntryPoint1.Name))
-              extension1 = "$summarised";
-            else
-              extension1 = "$instrumented";
-
-            string extension2 = null;
-            if (Summarisation.SummaryInformationParser.AvailableSummaries.Contains(pair.EntryPoint2.Name))
-              extension2 = "$summarised";
-            else
-              extension2 = "$instrumented";
-
-            parser.TryParseNew(ref ac, new List<string> { "check_" + pair.EntryPoint1.Name + "_" +
-              pair.EntryPoint2.Name, pair.EntryPoint1.Name + extension1, pair.EntryPoint2.Name + extension2 });
+            pairMap.Add(pair, new Tuple<AnalysisContext, ErrorReporter>(analyser.CheckedAC, errorReporter));
           }
 
-          new StaticLocksetAnalyser(ac, pair, errorReporter, stats).Run();
-          pairMap.Add(pair, new Tuple<AnalysisContext, ErrorReporter>(ac, errorReporter));
+          // races are reported per pair, so the members of a racy class are checked on their own
+          if (!errorReporter.FoundErrors && analyser.VerificationOutcome != VC.VCGen.Outcome.Errors)
+            outcomes.Add(pair, analyser.VerificationOutcome);
+
+          if (WhoopRaceCheckerCommandLineOptions.Get().StopAtFirstRace && errorReporter.FoundErrors)
+            break;
         }
+        ExecutionProgress.Report("pairs", done, DeviceDriver.EntryPointPairs.Count);
 
         if (WhoopRaceCheckerCommandLineOptions.Get().FindBugs)
         {
+          Program.WriteUnprotectedResources(fileList, pairMap);
+
           foreach (var pair in pairMap)
           {
-            if (!WhoopRaceCheckerCommandLineOptions.Get().YieldAll &&
-                WhoopRaceCheckerCommandLineOptions.Get().SkipRaceFreePairs &&
-                !pair.Value.Item2.FoundErrors)
+            if (pair.Value.Item1 == null)
               continue;
-            
-            AnalysisContext ac = null;
-            new AnalysisContextParser(fileList[fileList.Count - 1],
-              "wbpl").TryParseNew(ref ac);
-
-            new YieldInstrumentationEngine(ac, pair.Key, pair.Value.Item1, pair.Value.Item2).Run();
+            Program.RunYieldInstrumentationEngine(fileList, pair.Key, pair.Value.Item1, pair.Value.Item2);
           }
         }
 
+        timer.Stop();
         if (WhoopRaceCheckerCommandLineOptions.Get().MeasurePassExecutionTime)
         {
-          timer.Stop();
           Console.WriteLine(" |");
           Console.WriteLine(" |--- [Total] {0}", timer.Result());
         }
 
+        SolverPortfolio.WriteStatistics();
         Whoop.IO.Reporter.WriteTrailer(stats);
+        Program.ReportPeakMemory();
 
         Outcome oc = Outcome.Done;
         if ((stats.ErrorCount + stats.InconclusiveCount + stats.TimeoutCount + stats.OutOfMemoryCount) > 0)
           oc = Outcome.LocksetAnalysisError;
 
+        ExecutionTimeline.Flush();
         Environment.Exit((int)oc);
       }
       catch (Exception e)
@@ -163,5 +193,119 @@ namespace Whoop
         Environment.Exit((int)Outcome.FatalError);
       }
     }
+
+    private static void RunYieldInstrumentationEngine(List<string> fileList, EntryPointPair pair,
+      AnalysisContext checkedAC, ErrorReporter errorReporter)
+    {
+      if (!WhoopRaceCheckerCommandLineOptions.Get().YieldAll &&
+          WhoopRaceCheckerCommandLineOptions.Get().SkipRaceFreePairs &&
+          !errorReporter.FoundErrors)
+        return;
+
+      AnalysisContext ac = null;
+      new AnalysisContextParser(fileList[fileList.Count - 1],
+        "wbpl").TryParseNew(ref ac);
+
+      new YieldInstrumentationEngine(ac, pair, checkedAC, errorReporter).Run();
+    }
+
+    private static void ReportPeakMemory()
+    {
+      var peak = Process.GetCurrentProcess().PeakWorkingSet64;
+      if (ExecutionTimeline.IsEnabled)
+      {
+        ExecutionTimeline.Record("PeakMemory", "memory", DateTime.UtcNow, TimeSpan.Zero,
+          new Dictionary<string, object> { { "bytes", peak } });
+      }
+
+      if (WhoopRaceCheckerCommandLineOptions.Get().MeasurePassExecutionTime ||
+        WhoopRaceCheckerCommandLineOptions.Get().BoundedMemory)
+      {
+        Console.WriteLine("[PeakMemory] {0} MB", peak / (1024 * 1024));
+      }
+    }
+
+    private static List<string> GetPairFiles(EntryPointPair pair)
+    {
+      string extension1 = null;
+      if (Summarisation.SummaryInformationParser.AvailableSummaries.Contains(pair.EntryPoint1.Name))
+        extension1 = "$summarised";
+      else
+        extension1 = "$instrumented";
+
+      var files = new List<string> { "check_" + pair.EntryPoint1.Name + "_" +
+        pair.EntryPoint2.Name, pair.EntryPoint1.Name + extension1 };
+
+      if (!pair.EntryPoint1.Name.Equals(pair.EntryPoint2.Name))
+      {
+        string extension2 = null;
+        if (Summarisation.SummaryInformationParser.AvailableSummaries.Contains(pair.EntryPoint2.Name))
+          extension2 = "$summarised";
+        else
+          extension2 = "$instrumented";
+
+        files.Add(pair.EntryPoint2.Name + extension2);
+      }
+
+      return files;
+    }
+
+    /// <summary>
+    /// Prints how many unprotected resources each checked pair was found to have,
+    /// which whoop.py uses to decide the order in which Corral checks the pairs.
+    /// </summary>
+    /// <param name="files">List of file names</param>
+    /// <param name="pairMap">Checked pairs</param>
+    private static void WriteUnprotectedResources(List<string> files,
+      Dictionary<EntryPointPair, Tuple<AnalysisContext, ErrorReporter>> pairMap)
+    {
+      string raceInfoFile = files[files.Count - 1].Substring(0,
+        files[files.Count - 1].LastIndexOf(".")) + ".races.info";
+
+      using(StreamWriter file = new StreamWriter(raceInfoFile))
+      {
+        file.WriteLine("<unprotected_resources>");
+
+        foreach (var pair in pairMap)
+        {
+          file.WriteLine(pair.Key.EntryPoint1.Name + "::" + pair.Key.EntryPoint2.Name +
+            "::" + pair.Value.Item2.UnprotectedResources.Count);
+        }
+
+        file.WriteLine("</>");
+      }
+    }
+
+    private static void ReportEquivalentOutcome(EntryPointPair pair, EntryPointPair representative,
+      VC.VCGen.Outcome outcome, PipelineStatistics stats)
+    {
+      string verdict = null;
+      switch (outcome)
+      {
+        case VC.VCGen.Outcome.TimedOut:
+          stats.TimeoutCount++;
+          verdict = "timed out";
+          break;
+
+        case VC.VCGen.Outcome.OutOfMemory:
+          stats.OutOfMemoryCount++;
+          verdict = "out of memory";
+          break;
+
+        case VC.VCGen.Outcome.Inconclusive:
+          stats.InconclusiveCount++;
+          verdict = "inconclusive";
+          break;
+
+        default:
+          stats.VerifiedCount++;
+          verdict = "verified";
+          break;
+      }
+
+      Whoop.IO.Reporter.Inform(String.Format("{0} :: {1}  {2} (equivalent to {3} :: {4})",
+        pair.EntryPoint1.Name, pair.EntryPoint2.Name, verdict,
+        representative.EntryPoint1.Name, representative.EntryPoint2.Name));
+    }
   }
 }
@@ -32,11 +32,21 @@ namespace Whoop
     ErrorReporter ErrorReporter;
     private ExecutionTimer Timer;
 
+    private List<AnalysisContext> PortfolioACs;
+
+    public VC.VCGen.Outcome VerificationOutcome;
+
+    public AnalysisContext CheckedAC
+    {
+      get { return this.AC; }
+    }
+
     public StaticLocksetAnalyser(AnalysisContext ac, EntryPointPair pair, ErrorReporter errorReporter,
-      PipelineStatistics stats)
+      PipelineStatistics stats, List<AnalysisContext> portfolioACs = null)
     {
       Contract.Requires(ac != null && pair != null && errorReporter != null && stats != null);
       this.AC = ac;
+      this.PortfolioACs = portfolioACs ?? new List<AnalysisContext>();
       this.EP1 = pair.EntryPoint1;
       this.EP2 = pair.EntryPoint2;
       this.ErrorReporter = errorReporter;
@@ -49,37 +59,12 @@ namespace Whoop
       {
         Console.WriteLine(" |------ [{0} :: {1}]", this.EP1.Name, this.EP2.Name);
         Console.WriteLine(" |  |");
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
       }
 
-      this.AC.EliminateDeadVariables();
-      this.AC.Inline();
-      if (WhoopRaceCheckerCommandLineOptions.Get().LoopUnrollCount != -1)
-        this.AC.Program.UnrollLoops(WhoopRaceCheckerCommandLineOptions.Get().LoopUnrollCount,
-          WhoopRaceCheckerCommandLineOptions.Get().SoundLoopUnrolling);
-
-      string checkerName = "check$" + this.EP1.Name + "$" + this.EP2.Name;
-      Implementation checker = this.AC.TopLevelDeclarations.OfType<Implementation>().ToList().
-        Find(val => val.Name.Equals(checkerName));
-      Contract.Assert(checker != null);
+      this.Timer = new ExecutionTimer(this.EP1.Name + " :: " + this.EP2.Name, "StaticLocksetAnalyser");
+      this.Timer.Start();
 
-      VC.ConditionGeneration vcgen = null;
-
-      try
-      {
-        vcgen = new VC.VCGen(this.AC.Program, WhoopRaceCheckerCommandLineOptions.Get().SimplifyLogFilePath,
-          WhoopRaceCheckerCommandLineOptions.Get().SimplifyLogFileAppend, new List<Checker>());
-      }
-      catch (ProverException e)
-      {
-        Whoop.IO.Reporter.ErrorWriteLine("Fatal Error: ProverException: {0}", e);
-        Environment.Exit((int)Outcome.FatalError);
-      }
-
-      int prevAssertionCount = vcgen.CumulativeAssertionCount;
-
-      List<Counterexample> errors;
+      Implementation checker = this.PrepareChecker(this.AC);
 
       DateTime start = new DateTime();
       if (WhoopRaceCheckerCommandLineOptions.Get().Trace)
@@ -92,33 +77,39 @@ namespace Whoop
         }
       }
 
+      VC.ConditionGeneration vcgen = null;
+      List<Counterexample> errors;
       VC.VCGen.Outcome vcOutcome;
-      try
-      {
-        vcOutcome = vcgen.VerifyImplementation(checker, out errors);
-      }
-      catch (VC.VCGenException e)
+
+      if (SolverPortfolio.IsEnabled)
       {
-        Whoop.IO.Reporter.ReportBplError(checker, String.Format("Error BP5010: {0}  Encountered in implementation {1}.",
-          e.Message, checker.Name), true, true);
-        errors = null;
-        vcOutcome = VC.VCGen.Outcome.Inconclusive;
+        vcOutcome = this.VerifyWithPortfolio(ref checker, ref vcgen, out errors);
       }
-      catch (UnexpectedProverOutputException e)
+      else
       {
-        Whoop.IO.Reporter.AdvisoryWriteLine("Advisory: {0} SKIPPED because of internal error: unexpected prover output: {1}",
-          checker.Name, e.Message);
-        errors = null;
-        vcOutcome = VC.VCGen.Outcome.Inconclusive;
+        try
+        {
+          vcgen = new VC.VCGen(this.AC.Program, WhoopRaceCheckerCommandLineOptions.Get().SimplifyLogFilePath,
+            WhoopRaceCheckerCommandLineOptions.Get().SimplifyLogFileAppend, new List<Checker>());
+        }
+        catch (ProverException e)
+        {
+          Whoop.IO.Reporter.ErrorWriteLine("Fatal Error: ProverException: {0}", e);
+          Environment.Exit((int)Outcome.FatalError);
+        }
+
+        vcOutcome = this.Verify(checker, vcgen, out errors);
       }
 
+      this.VerificationOutcome = vcOutcome;
+
       string timeIndication = "";
       DateTime end = DateTime.UtcNow;
       TimeSpan elapsed = end - start;
 
       if (WhoopRaceCheckerCommandLineOptions.Get().Trace)
       {
-        int poCount = vcgen.CumulativeAssertionCount - prevAssertionCount;
+        int poCount = vcgen == null ? 0 : vcgen.CumulativeAssertionCount;
         timeIndication = string.Format("  [{0:F3} s, {1} proof obligation{2}]  ",
           elapsed.TotalSeconds, poCount, poCount == 1 ? "" : "s");
       }
@@ -130,16 +121,151 @@ namespace Whoop
 
       WhoopRaceCheckerCommandLineOptions.Get().TheProverFactory.Close();
 //      cce.NonNull(WhoopRaceCheckerCommandLineOptions.Get().TheProverFactory).Close();
-      vcgen.Dispose();
+      if (vcgen != null)
+        vcgen.Dispose();
 
+      this.Timer.Stop();
       if (WhoopRaceCheckerCommandLineOptions.Get().MeasurePassExecutionTime)
       {
-        this.Timer.Stop();
         Console.WriteLine(" |  |------ [StaticLocksetAnalyser] {0}", this.Timer.Result());
         Console.WriteLine(" |");
       }
     }
 
+    private Implementation PrepareChecker(AnalysisContext ac)
+    {
+      ac.EliminateDeadVariables();
+      ac.Inline();
+      if (WhoopRaceCheckerCommandLineOptions.Get().LoopUnrollCount != -1)
+        ac.Program.UnrollLoops(WhoopRaceCheckerCommandLineOptions.Get().LoopUnrollCount,
+          WhoopRaceCheckerCommandLineOptions.Get().SoundLoopUnrolling);
+
+      string checkerName = "check$" + this.EP1.Name + "$" + this.EP2.Name;
+      Implementation checker = ac.TopLevelDeclarations.OfType<Implementation>().ToList().
+        Find(val => val.Name.Equals(checkerName));
+      Contract.Assert(checker != null);
+
+      int slicedEnsures = Refactoring.PairSlicing.SliceCalleeContracts(ac, checker);
+      this.Timer.Annotate("slicedEnsures", slicedEnsures);
+
+      if (WhoopRaceCheckerCommandLineOptions.Get().BitVectorLocksets)
+      {
+        int packedLocksets = Refactoring.LocksetPacking.Pack(ac, checker);
+        this.Timer.Annotate("packedLocksets", packedLocksets);
+      }
+
+      return checker;
+    }
+
+    private VC.VCGen.Outcome Verify(Implementation checker, VC.ConditionGeneration vcgen,
+      out List<Counterexample> errors, string backend = null)
+    {
+      var vcgenTimer = new ExecutionTimer(checker.Name, "VCGen");
+      vcgenTimer.Start();
+      if (backend != null)
+        vcgenTimer.Annotate("backend", backend);
+
+      VC.VCGen.Outcome vcOutcome;
+      try
+      {
+        vcOutcome = vcgen.VerifyImplementation(checker, out errors);
+      }
+      catch (VC.VCGenException e)
+      {
+        Whoop.IO.Reporter.ReportBplError(checker, String.Format("Error BP5010: {0}  Encountered in implementation {1}.",
+          e.Message, checker.Name), true, true);
+        errors = null;
+        vcOutcome = VC.VCGen.Outcome.Inconclusive;
+      }
+      catch (UnexpectedProverOutputException e)
+      {
+        Whoop.IO.Reporter.AdvisoryWriteLine("Advisory: {0} SKIPPED because of internal error: unexpected prover output: {1}",
+          checker.Name, e.Message);
+        errors = null;
+        vcOutcome = VC.VCGen.Outcome.Inconclusive;
+      }
+
+      vcgenTimer.Annotate("outcome", vcOutcome.ToString());
+      vcgenTimer.Stop();
+
+      return vcOutcome;
+    }
+
+    /// <summary>
+    /// Verifies a copy of the checker with each backend of the solver portfolio and keeps
+    /// the answer of the first backend that proves or refutes it. Each backend gets its own
+    /// parsed program, as VC generation passifies the checker in place.
+    /// </summary>
+    private VC.VCGen.Outcome VerifyWithPortfolio(ref Implementation checker, ref VC.ConditionGeneration vcgen,
+      out List<Counterexample> errors)
+    {
+      var backends = SolverPortfolio.Backends;
+      var acs = new List<AnalysisContext> { this.AC };
+      acs.AddRange(this.PortfolioACs);
+      Contract.Assert(acs.Count == backends.Count);
+
+      var checkers = new Implementation[backends.Count];
+      var vcgens = new VC.ConditionGeneration[backends.Count];
+      var outcomes = new VC.VCGen.Outcome[backends.Count];
+      var counterexamples = new List<Counterexample>[backends.Count];
+      var cancelled = new bool[backends.Count];
+
+      checkers[0] = checker;
+      for (int idx = 1; idx < backends.Count; idx++)
+        checkers[idx] = this.PrepareChecker(acs[idx]);
+
+      int winner = SolverPortfolio.Race(idx =>
+      {
+        var program = acs[idx].Program;
+        var gen = SolverPortfolio.CreateWithBackend(backends[idx], () =>
+        {
+          var pool = new List<Checker>();
+          var result = new VC.VCGen(program, WhoopRaceCheckerCommandLineOptions.Get().SimplifyLogFilePath,
+            WhoopRaceCheckerCommandLineOptions.Get().SimplifyLogFileAppend, pool);
+          pool.Add(new Checker(result, program, WhoopRaceCheckerCommandLineOptions.Get().SimplifyLogFilePath,
+            WhoopRaceCheckerCommandLineOptions.Get().SimplifyLogFileAppend,
+            WhoopRaceCheckerCommandLineOptions.Get().ProverKillTime, null));
+          return result;
+        });
+
+        lock (cancelled)
+        {
+          vcgens[idx] = gen;
+          if (cancelled[idx])
+          {
+            gen.Dispose();
+            return false;
+          }
+        }
+
+        outcomes[idx] = this.Verify(checkers[idx], gen, out counterexamples[idx], backends[idx]);
+        return outcomes[idx] == VC.VCGen.Outcome.Correct || outcomes[idx] == VC.VCGen.Outcome.Errors ||
+          outcomes[idx] == VC.VCGen.Outcome.ReachedBound;
+      }, idx =>
+      {
+        lock (cancelled)
+        {
+          cancelled[idx] = true;
+          if (vcgens[idx] != null)
+            vcgens[idx].Dispose();
+        }
+      });
+
+      if (winner == -1)
+      {
+        errors = null;
+        return VC.VCGen.Outcome.Inconclusive;
+      }
+
+      this.Timer.Annotate("backend", backends[winner]);
+      this.AC = acs[winner];
+      checker = checkers[winner];
+      vcgen = vcgens[winner];
+      errors = counterexamples[winner];
+
+      return outcomes[winner];
+    }
+
     private void ProcessOutcome(Implementation impl, VC.VCGen.Outcome outcome, List<Counterexample> errors,
       string timeIndication, PipelineStatistics stats)
     {
@@ -18,6 +18,9 @@ namespace Whoop
   internal class WhoopRaceCheckerCommandLineOptions : WhoopCommandLineOptions
   {
     public bool SkipRaceFreePairs = false;
+    public bool StopAtFirstRace = false;
+    public bool NoPairDeduplication = false;
+    public bool BitVectorLocksets = false;
     
     public WhoopRaceCheckerCommandLineOptions() : base("Whoop", "Whoop static lockset analyser")
     {
@@ -31,6 +34,24 @@ namespace Whoop
         this.SkipRaceFreePairs = true;
         return true;
       }
+
+      if (option == "stopAtFirstRace")
+      {
+        this.StopAtFirstRace = true;
+        return true;
+      }
+
+      if (option == "noPairDeduplication")
+      {
+        this.NoPairDeduplication = true;
+        return true;
+      }
+
+      if (option == "bitVectorLocksets")
+      {
+        this.BitVectorLocksets = true;
+        return true;
+      }
       
       return base.ParseOption(option, ps);
     }
@@ -49,17 +49,18 @@ namespace Whoop
       {
         Console.WriteLine(" |------ [{0} :: {1}]", this.EP1.Name, this.EP2.Name);
         Console.WriteLine(" |  |");
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
       }
 
+      this.Timer = new ExecutionTimer(this.EP1.Name + " :: " + this.EP2.Name, "YieldInstrumentationEngine");
+      this.Timer.Start();
+
       Instrumentation.Factory.CreateAsyncCheckingInstrumentation(this.AC, this.Pair).Run();
       Instrumentation.Factory.CreateYieldInstrumentation(this.AC, this.RaceCheckedAC, this.Pair,
         this.ErrorReporter).Run();
 
+      this.Timer.Stop();
       if (WhoopRaceCheckerCommandLineOptions.Get().MeasurePassExecutionTime)
       {
-        this.Timer.Stop();
         Console.WriteLine(" |  |");
         Console.WriteLine(" |  |--- [Total] {0}", this.Timer.Result());
         Console.WriteLine(" |");
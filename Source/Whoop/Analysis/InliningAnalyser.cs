@@ -0,0 +1,191 @@
+﻿// ===-----------------------------------------------------------------------==//
+//
+//                 Whoop - a Verifier for Device Drivers
+//
+//  Copyright (c) 2013-2014 Pantazis Deligiannis (p.deligiannis@imperial.ac.uk)
+//
+//  This file is distributed under the Microsoft Public License.  See
+//  LICENSE.TXT for details.
+//
+// ===----------------------------------------------------------------------===//
+
+using System;
+using System.Collections.Generic;
+using System.Diagnostics.Contracts;
+using System.Linq;
+
+using Microsoft.Boogie;
+
+using Whoop.Domain.Drivers;
+
+namespace Whoop.Analysis
+{
+  /// <summary>
+  /// Decides which helper functions of an entry point are inlined. Inlining a large
+  /// helper blows up the VCs of every caller, while a small helper that is not inlined
+  /// needs its own summary inferred by Houdini. The decisions are kept as inline
+  /// attributes, so the cruncher and the race checker inline the same helpers when
+  /// they call AnalysisContext.Inline.
+  /// </summary>
+  public static class InliningAnalyser
+  {
+    #region fields
+
+    private const int BlockWeight = 2;
+    private const int LoopWeight = 20;
+
+    #endregion
+
+    #region public API
+
+    /// <summary>
+    /// Checks if the whole entry point is inlined, which is decided by the inlining
+    /// bound on the number of its helper functions.
+    /// </summary>
+    /// <returns>Boolean value</returns>
+    /// <param name="ac">Analysis context of the entry point</param>
+    /// <param name="ep">Entry point</param>
+    public static bool IsEntryPointInlined(AnalysisContext ac, EntryPoint ep)
+    {
+      return WhoopCommandLineOptions.Get().InliningBound > 0 &&
+        ac.GetNumOfEntryPointRelatedFunctions(ep.Name) <=
+        WhoopCommandLineOptions.Get().InliningBound;
+    }
+
+    /// <summary>
+    /// Inlines the helper functions of the entry point whose cost does not exceed the
+    /// inlining cost threshold. The cost of a helper is its size, with loops weighted, times
+    /// the number of its call sites. It is halved for helpers that access shared memory
+    /// regions, as their summaries need the most candidate invariants. Recursive helpers
+    /// are never inlined.
+    /// </summary>
+    /// <returns>Names of the inlined helper functions</returns>
+    /// <param name="ac">Analysis context of the entry point</param>
+    /// <param name="ep">Entry point</param>
+    public static List<string> Analyse(AnalysisContext ac, EntryPoint ep)
+    {
+      Contract.Requires(ac != null && ep != null);
+
+      var helpers = ac.TopLevelDeclarations.OfType<Implementation>().Where(val =>
+        QKeyValue.FindStringAttribute(val.Attributes, "tag") != null &&
+        QKeyValue.FindStringAttribute(val.Attributes, "tag").Equals(ep.Name) &&
+        !ac.IsAWhoopFunc(val.Name)).ToList();
+
+      var callers = new List<Implementation>(helpers);
+      var epImpl = ac.GetImplementation(ep.Name);
+      if (epImpl != null)
+        callers.Add(epImpl);
+
+      var callSites = new Dictionary<string, int>();
+      var callees = new Dictionary<string, HashSet<string>>();
+      foreach (var impl in callers)
+      {
+        callees[impl.Name] = new HashSet<string>();
+        foreach (var call in impl.Blocks.SelectMany(val => val.Cmds.OfType<CallCmd>()))
+        {
+          callSites[call.callee] = (callSites.ContainsKey(call.callee) ? callSites[call.callee] : 0) + 1;
+          callees[impl.Name].Add(call.callee);
+        }
+      }
+
+      var inlined = new List<string>();
+      foreach (var impl in helpers)
+      {
+        int sites = callSites.ContainsKey(impl.Name) ? callSites[impl.Name] : 0;
+        if (sites == 0 || InliningAnalyser.IsRecursive(impl.Name, callees))
+          continue;
+
+        int cost = InliningAnalyser.GetCost(ac, impl, sites);
+        bool inline = cost <= WhoopCommandLineOptions.Get().InliningCost;
+        if (inline)
+        {
+          ac.InlineImplementation(impl);
+          inlined.Add(impl.Name);
+        }
+
+        if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime ||
+            WhoopCommandLineOptions.Get().DebugWhoop)
+        {
+          Console.WriteLine(" |  |         {0} {1} (cost {2}, {3} call sites)",
+            inline ? "inlining" : "summarising", impl.Name, cost, sites);
+        }
+      }
+
+      return inlined;
+    }
+
+    #endregion
+
+    #region other methods
+
+    /// <summary>
+    /// Computes the cost of inlining the helper at each of its call sites.
+    /// </summary>
+    /// <returns>Cost</returns>
+    /// <param name="ac">Analysis context</param>
+    /// <param name="impl">Helper implementation</param>
+    /// <param name="sites">Number of call sites</param>
+    private static int GetCost(AnalysisContext ac, Implementation impl, int sites)
+    {
+      int commands = impl.Blocks.Sum(val => val.Cmds.Count);
+      int loops = 0;
+
+      for (int idx = 0; idx < impl.Blocks.Count; idx++)
+      {
+        var gotoCmd = impl.Blocks[idx].TransferCmd as GotoCmd;
+        if (gotoCmd == null || gotoCmd.labelTargets == null)
+          continue;
+        loops += gotoCmd.labelTargets.Count(val => impl.Blocks.IndexOf(val) >= 0 &&
+          impl.Blocks.IndexOf(val) <= idx);
+      }
+
+      int cost = (commands + InliningAnalyser.BlockWeight * impl.Blocks.Count +
+        InliningAnalyser.LoopWeight * loops) * sites;
+
+      if (InliningAnalyser.IsAccessingSharedState(ac, impl))
+        cost = cost / 2;
+
+      return cost;
+    }
+
+    /// <summary>
+    /// Checks if the helper accesses a shared memory region, directly or through
+    /// the lockset instrumentation.
+    /// </summary>
+    /// <returns>Boolean value</returns>
+    private static bool IsAccessingSharedState(AnalysisContext ac, Implementation impl)
+    {
+      if (SharedStateAnalyser.IsImplementationRacing(impl))
+        return true;
+
+      return impl.Blocks.SelectMany(val => val.Cmds.OfType<CallCmd>()).Any(val =>
+        ac.IsAWhoopFunc(val.callee) && (val.callee.Contains("_WRITE_LS_") ||
+        val.callee.Contains("_READ_LS_")));
+    }
+
+    /// <summary>
+    /// Checks if the helper can call itself.
+    /// </summary>
+    /// <returns>Boolean value</returns>
+    private static bool IsRecursive(string name, Dictionary<string, HashSet<string>> callees)
+    {
+      var visited = new HashSet<string>();
+      var worklist = new Stack<string>(callees[name]);
+
+      while (worklist.Count > 0)
+      {
+        var callee = worklist.Pop();
+        if (callee.Equals(name))
+          return true;
+        if (!visited.Add(callee) || !callees.ContainsKey(callee))
+          continue;
+        foreach (var next in callees[callee])
+          worklist.Push(next);
+      }
+
+      return false;
+    }
+
+    #endregion
+  }
+}
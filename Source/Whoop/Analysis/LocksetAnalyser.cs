@@ -0,0 +1,355 @@
+﻿// ===-----------------------------------------------------------------------==//
+//
+//                 Whoop - a Verifier for Device Drivers
+//
+//  Copyright (c) 2013-2014 Pantazis Deligiannis (p.deligiannis@imperial.ac.uk)
+//
+//  This file is distributed under the Microsoft Public License.  See
+//  LICENSE.TXT for details.
+//
+// ===----------------------------------------------------------------------===//
+
+using System;
+using System.Collections.Generic;
+using System.Diagnostics.Contracts;
+using System.Linq;
+
+using Microsoft.Boogie;
+
+using Whoop.Domain.Drivers;
+using Whoop.Regions;
+
+namespace Whoop.Analysis
+{
+  /// <summary>
+  /// Eraser-style dataflow analysis of the current locksets of an entry point. It computes
+  /// if each lock is definitely held, definitely not held or unknown at the entry and exit
+  /// of every instrumentation region and at its loop headers, using the lockset updates
+  /// and region summaries that do not depend on the calling context.
+  /// </summary>
+  internal sealed class LocksetAnalyser
+  {
+    internal enum LockState
+    {
+      Held,
+      NotHeld,
+      Unknown
+    }
+
+    /// <summary>
+    /// The value of a lock; Entry means that the lock has the value it had on entry to the region.
+    /// A null state means that the program point is unreachable.
+    /// </summary>
+    private enum Value
+    {
+      Entry,
+      Held,
+      NotHeld,
+      Unknown
+    }
+
+    private AnalysisContext AC;
+    private EntryPoint EP;
+
+    private Dictionary<string, InstrumentationRegion> Regions;
+    private List<string> Locks;
+    private HashSet<string> LockNames;
+
+    private Dictionary<InstrumentationRegion, Value[]> Summaries;
+    private Dictionary<InstrumentationRegion, Value[]> EntryStates;
+    private Dictionary<InstrumentationRegion, Value[]> ExitStates;
+    private Dictionary<Block, Value[]> BlockStates;
+
+    public LocksetAnalyser(AnalysisContext ac, EntryPoint ep, List<Variable> currentLocksets)
+    {
+      Contract.Requires(ac != null && ep != null && currentLocksets != null);
+      this.AC = ac;
+      this.EP = ep;
+
+      this.Regions = new Dictionary<string, InstrumentationRegion>();
+      foreach (var region in this.AC.InstrumentationRegions)
+        this.Regions[region.Implementation().Name] = region;
+
+      this.Locks = new List<string>();
+      foreach (var ls in currentLocksets)
+        this.Locks.Add(this.AC.CurrentLocksets.Find(val => val.Id.Name.Equals(ls.Name)).Lock.Name);
+      this.LockNames = new HashSet<string>(this.AC.GetLockVariables().Select(val => val.Name));
+
+      this.Summaries = new Dictionary<InstrumentationRegion, Value[]>();
+      this.EntryStates = new Dictionary<InstrumentationRegion, Value[]>();
+      this.ExitStates = new Dictionary<InstrumentationRegion, Value[]>();
+      this.BlockStates = new Dictionary<Block, Value[]>();
+    }
+
+    public void Run()
+    {
+      this.ComputeSummaries();
+      this.ComputeStates();
+    }
+
+    public LockState GetEntryState(InstrumentationRegion region, Variable ls)
+    {
+      Value[] state = null;
+      this.EntryStates.TryGetValue(region, out state);
+      return this.GetLockState(state, ls);
+    }
+
+    public LockState GetExitState(InstrumentationRegion region, Variable ls)
+    {
+      Value[] state = null;
+      this.ExitStates.TryGetValue(region, out state);
+      return this.GetLockState(state, ls);
+    }
+
+    public LockState GetState(Block block, Variable ls)
+    {
+      Value[] state = null;
+      this.BlockStates.TryGetValue(block, out state);
+      return this.GetLockState(state, ls);
+    }
+
+    #region dataflow analysis
+
+    /// <summary>
+    /// Computes the effect of each region on the locks, iterating over the call graph
+    /// until a fixpoint is reached to account for recursion.
+    /// </summary>
+    private void ComputeSummaries()
+    {
+      var entry = this.CreateState(Value.Entry);
+
+      bool changed = true;
+      while (changed)
+      {
+        changed = false;
+        foreach (var region in this.Regions.Values)
+        {
+          Value[] exit = null;
+          this.Analyse(region, entry, out exit);
+
+          Value[] summary = null;
+          this.Summaries.TryGetValue(region, out summary);
+          var joined = this.Join(summary, exit);
+          if (this.AreEqual(summary, joined))
+            continue;
+
+          this.Summaries[region] = joined;
+          changed = true;
+        }
+      }
+    }
+
+    /// <summary>
+    /// Computes the lock states of the regions, starting from the entry point, where no
+    /// lock is held, and joining the states of all call sites of a region.
+    /// </summary>
+    private void ComputeStates()
+    {
+      InstrumentationRegion epRegion = null;
+      if (!this.Regions.TryGetValue(this.EP.Name, out epRegion))
+        return;
+
+      this.EntryStates[epRegion] = this.CreateState(Value.NotHeld);
+
+      bool changed = true;
+      while (changed)
+      {
+        changed = false;
+        foreach (var region in this.EntryStates.Keys.ToList())
+        {
+          Value[] exit = null;
+          var inStates = this.Analyse(region, this.EntryStates[region], out exit);
+
+          var callStates = new Dictionary<InstrumentationRegion, Value[]>();
+          foreach (var block in inStates)
+            this.Transfer(block.Key, block.Value, callStates);
+
+          foreach (var call in callStates)
+          {
+            Value[] state = null;
+            this.EntryStates.TryGetValue(call.Key, out state);
+            var joined = this.Join(state, call.Value);
+            if (this.AreEqual(state, joined))
+              continue;
+
+            this.EntryStates[call.Key] = joined;
+            changed = true;
+          }
+        }
+      }
+
+      foreach (var region in this.EntryStates.Keys)
+      {
+        Value[] exit = null;
+        var inStates = this.Analyse(region, this.EntryStates[region], out exit);
+
+        this.ExitStates[region] = exit;
+        foreach (var block in inStates)
+          this.BlockStates[block.Key] = block.Value;
+      }
+    }
+
+    private Dictionary<Block, Value[]> Analyse(InstrumentationRegion region, Value[] entry, out Value[] exit)
+    {
+      var inStates = new Dictionary<Block, Value[]>();
+      var worklist = new Queue<Block>();
+      exit = null;
+
+      inStates[region.Blocks()[0]] = entry;
+      worklist.Enqueue(region.Blocks()[0]);
+
+      while (worklist.Count > 0)
+      {
+        var block = worklist.Dequeue();
+        var state = this.Transfer(block, inStates[block], null);
+        if (state == null)
+          continue;
+
+        if (block.TransferCmd is ReturnCmd)
+        {
+          exit = this.Join(exit, state);
+          continue;
+        }
+
+        var gotoCmd = block.TransferCmd as GotoCmd;
+        if (gotoCmd == null || gotoCmd.labelTargets == null)
+          continue;
+
+        foreach (var succ in gotoCmd.labelTargets)
+        {
+          Value[] succState = null;
+          inStates.TryGetValue(succ, out succState);
+          var joined = this.Join(succState, state);
+          if (succState != null && this.AreEqual(succState, joined))
+            continue;
+
+          inStates[succ] = joined;
+          if (!worklist.Contains(succ))
+            worklist.Enqueue(succ);
+        }
+      }
+
+      return inStates;
+    }
+
+    private Value[] Transfer(Block block, Value[] state, Dictionary<InstrumentationRegion, Value[]> callStates)
+    {
+      if (state == null)
+        return null;
+
+      var current = (Value[])state.Clone();
+      foreach (var call in block.Cmds.OfType<CallCmd>())
+      {
+        if (call.callee.StartsWith("_UPDATE_CLS_$"))
+        {
+          this.Update(current, call);
+          continue;
+        }
+
+        InstrumentationRegion callee = null;
+        if (!this.Regions.TryGetValue(call.callee, out callee))
+          continue;
+
+        if (callStates != null)
+        {
+          Value[] callState = null;
+          callStates.TryGetValue(callee, out callState);
+          callStates[callee] = this.Join(callState, current);
+        }
+
+        Value[] summary = null;
+        this.Summaries.TryGetValue(callee, out summary);
+        if (summary == null)
+          return null;
+
+        for (int i = 0; i < current.Length; i++)
+        {
+          if (summary[i] != Value.Entry)
+            current[i] = summary[i];
+        }
+      }
+
+      return current;
+    }
+
+    private void Update(Value[] state, CallCmd call)
+    {
+      var lockExpr = call.Ins[0] as IdentifierExpr;
+      var isLocked = call.Ins[1] as LiteralExpr;
+
+      var value = Value.Unknown;
+      if (isLocked != null && isLocked.IsTrue)
+        value = Value.Held;
+      else if (isLocked != null && isLocked.IsFalse)
+        value = Value.NotHeld;
+
+      if (lockExpr != null && this.LockNames.Contains(lockExpr.Name))
+      {
+        int idx = this.Locks.IndexOf(lockExpr.Name);
+        if (idx >= 0)
+          state[idx] = value;
+        return;
+      }
+
+      // the lock could not be identified, so any lock might be updated
+      for (int i = 0; i < state.Length; i++)
+        state[i] = this.Join(state[i], value);
+    }
+
+    #endregion
+
+    #region helper functions
+
+    private LockState GetLockState(Value[] state, Variable ls)
+    {
+      if (state == null)
+        return LockState.Unknown;
+
+      int idx = this.Locks.IndexOf(this.AC.CurrentLocksets.Find(val =>
+        val.Id.Name.Equals(ls.Name)).Lock.Name);
+      if (idx < 0)
+        return LockState.Unknown;
+
+      if (state[idx] == Value.Held)
+        return LockState.Held;
+      else if (state[idx] == Value.NotHeld)
+        return LockState.NotHeld;
+      return LockState.Unknown;
+    }
+
+    private Value[] CreateState(Value value)
+    {
+      var state = new Value[this.Locks.Count];
+      for (int i = 0; i < state.Length; i++)
+        state[i] = value;
+      return state;
+    }
+
+    private Value[] Join(Value[] state1, Value[] state2)
+    {
+      if (state1 == null)
+        return state2;
+      if (state2 == null)
+        return state1;
+
+      var state = new Value[state1.Length];
+      for (int i = 0; i < state.Length; i++)
+        state[i] = this.Join(state1[i], state2[i]);
+      return state;
+    }
+
+    private Value Join(Value value1, Value value2)
+    {
+      return value1 == value2 ? value1 : Value.Unknown;
+    }
+
+    private bool AreEqual(Value[] state1, Value[] state2)
+    {
+      if (state1 == null || state2 == null)
+        return state1 == state2;
+      return state1.SequenceEqual(state2);
+    }
+
+    #endregion
+  }
+}
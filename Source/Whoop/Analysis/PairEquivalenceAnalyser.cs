@@ -0,0 +1,133 @@
+﻿// ===-----------------------------------------------------------------------==//
+//
+//                 Whoop - a Verifier for Device Drivers
+//
+//  Copyright (c) 2013-2014 Pantazis Deligiannis (p.deligiannis@imperial.ac.uk)
+//
+//  This file is distributed under the Microsoft Public License.  See
+//  LICENSE.TXT for details.
+//
+// ===----------------------------------------------------------------------===//
+
+using System;
+using System.Collections.Generic;
+using System.IO;
+using System.Linq;
+using System.Security.Cryptography;
+using System.Text;
+using System.Text.RegularExpressions;
+
+using Whoop.Domain.Drivers;
+
+namespace Whoop.Analysis
+{
+  /// <summary>
+  /// Groups the entry point pairs whose programs are identical up to the names of their
+  /// entry points. Whoop suffixes every entry point specific declaration with the name of
+  /// the entry point, so two such pairs give isomorphic VCs and only one representative
+  /// per group has to be verified.
+  /// </summary>
+  public static class PairEquivalenceAnalyser
+  {
+    #region fields
+
+    public static Dictionary<EntryPointPair, EntryPointPair> Representatives =
+      new Dictionary<EntryPointPair, EntryPointPair>();
+
+    private static Regex Identifier = new Regex(@"[A-Za-z0-9'~#$^_.?\\]+");
+
+    #endregion
+
+    #region public API
+
+    /// <summary>
+    /// Hashes the canonical program of each pair and picks the first pair of each
+    /// group of equal hashes as its representative.
+    /// </summary>
+    /// <param name="file">File name</param>
+    /// <param name="ext">Extension of the pair files</param>
+    /// <param name="pairFiles">Files that make up the program of each pair</param>
+    public static void Analyse(string file, string ext, Dictionary<EntryPointPair, List<string>> pairFiles)
+    {
+      PairEquivalenceAnalyser.Representatives = new Dictionary<EntryPointPair, EntryPointPair>();
+      var classes = new Dictionary<string, EntryPointPair>();
+
+      foreach (var pair in DeviceDriver.EntryPointPairs)
+      {
+        if (!pairFiles.ContainsKey(pair))
+          continue;
+
+        var files = pairFiles[pair].Select(val => file.Substring(0,
+          file.IndexOf(Path.GetExtension(file))) + "_" + val + "." + ext).ToList();
+        if (!files.All(val => File.Exists(val)))
+          continue;
+
+        string hash = PairEquivalenceAnalyser.ComputeCanonicalHash(pair, files);
+
+        EntryPointPair representative = null;
+        if (!classes.TryGetValue(hash, out representative))
+        {
+          representative = pair;
+          classes.Add(hash, pair);
+        }
+
+        PairEquivalenceAnalyser.Representatives.Add(pair, representative);
+      }
+    }
+
+    /// <summary>
+    /// Returns the pair whose verdict also holds for the given pair.
+    /// </summary>
+    /// <returns>Representative pair</returns>
+    /// <param name="pair">Entry point pair</param>
+    public static EntryPointPair GetRepresentative(EntryPointPair pair)
+    {
+      EntryPointPair representative = null;
+      if (PairEquivalenceAnalyser.Representatives.TryGetValue(pair, out representative))
+        return representative;
+      return pair;
+    }
+
+    #endregion
+
+    #region helper functions
+
+    /// <summary>
+    /// Renames every $-separated identifier segment that is the name of an entry point
+    /// of the pair to a placeholder, which is not a valid Boogie identifier, and hashes
+    /// the result. Equal hashes thus mean equal programs up to a consistent renaming.
+    /// </summary>
+    private static string ComputeCanonicalHash(EntryPointPair pair, List<string> files)
+    {
+      var text = new StringBuilder();
+      foreach (var file in files)
+      {
+        text.Append(PairEquivalenceAnalyser.Identifier.Replace(Whoop.IO.BoogieProgramPack.ReadAllText(file),
+          match => PairEquivalenceAnalyser.Canonicalise(match.Value, pair)));
+        text.Append("\0");
+      }
+
+      using (var sha = SHA256.Create())
+      {
+        var hash = sha.ComputeHash(Encoding.UTF8.GetBytes(text.ToString()));
+        return BitConverter.ToString(hash);
+      }
+    }
+
+    private static string Canonicalise(string identifier, EntryPointPair pair)
+    {
+      var segments = identifier.Split('$');
+      for (int idx = 0; idx < segments.Length; idx++)
+      {
+        if (segments[idx].Equals(pair.EntryPoint1.Name))
+          segments[idx] = "@1";
+        else if (segments[idx].Equals(pair.EntryPoint2.Name))
+          segments[idx] = "@2";
+      }
+
+      return String.Join("$", segments);
+    }
+
+    #endregion
+  }
+}
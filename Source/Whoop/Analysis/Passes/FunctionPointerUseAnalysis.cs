@@ -39,22 +39,17 @@ namespace Whoop.Analysis
 
     public void Run()
     {
-      if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
-      }
+      this.Timer = new ExecutionTimer("FunctionPointerUseAnalysis", "pass");
+      this.Timer.Start();
 
       foreach (var region in this.AC.InstrumentationRegions)
       {
         this.FindUseOfFunctionPointers(region);
       }
 
+      this.Timer.Stop();
       if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer.Stop();
         Console.WriteLine(" |  |------ [FunctionPointerUseAnalysis] {0}", this.Timer.Result());
-      }
     }
 
     #region function pointer use analysis
@@ -38,20 +38,15 @@ namespace Whoop.Analysis
     /// </summary>
     public void Run()
     {
-      if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
-      }
+      this.Timer = new ExecutionTimer("LockAbstraction", "pass");
+      this.Timer.Start();
 
       this.IdentifyAndCreateUniqueLocks();
       this.CreateKernelLocks();
 
+      this.Timer.Stop();
       if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer.Stop();
         Console.WriteLine(" |  |------ [LockAbstraction] {0}", this.Timer.Result());
-      }
     }
 
     /// <summary>
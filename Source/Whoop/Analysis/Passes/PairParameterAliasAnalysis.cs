@@ -40,19 +40,14 @@ namespace Whoop.Analysis
 
     public void Run()
     {
-      if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
-      }
+      this.Timer = new ExecutionTimer("PairParameterAliasAnalysis", "pass");
+      this.Timer.Start();
 
       this.InstrumentInParamAliasInformation();
 
+      this.Timer.Stop();
       if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer.Stop();
         Console.WriteLine(" |  |------ [PairParameterAliasAnalysis] {0}", this.Timer.Result());
-      }
     }
 
     #region parameter alias analysis
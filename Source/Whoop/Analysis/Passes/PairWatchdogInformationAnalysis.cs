@@ -49,20 +49,15 @@ namespace Whoop.Analysis
 
     public void Run()
     {
-      if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
-      }
+      this.Timer = new ExecutionTimer("PairWatchdogInformationAnalysis", "pass");
+      this.Timer.Start();
 
       this.ComputePairAccesses();
       this.SliceWatchedAccesses();
 
+      this.Timer.Stop();
       if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer.Stop();
         Console.WriteLine(" |  |------ [PairWatchdogInformationAnalysis] {0}", this.Timer.Result());
-      }
     }
 
     #region watchdog information analysis
@@ -49,11 +49,8 @@ namespace Whoop.Analysis
 
     public void Run()
     {
-      if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
-      }
+      this.Timer = new ExecutionTimer("ParameterAliasAnalysis", "pass");
+      this.Timer.Start();
 
       foreach (var region in this.AC.InstrumentationRegions)
       {
@@ -89,11 +86,9 @@ namespace Whoop.Analysis
         }
       }
 
+      this.Timer.Stop();
       if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer.Stop();
         Console.WriteLine(" |  |------ [ParameterAliasAnalysis] {0}", this.Timer.Result());
-      }
     }
 
     #region parameter alias analysis
@@ -33,11 +33,8 @@ namespace Whoop.Analysis
 
     public void Run()
     {
-      if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
-      }
+      this.Timer = new ExecutionTimer("SharedStateAbstraction", "pass");
+      this.Timer.Start();
 
       foreach (var region in this.AC.InstrumentationRegions)
       {
@@ -46,11 +43,9 @@ namespace Whoop.Analysis
         this.CleanUpModset(region);
       }
 
+      this.Timer.Stop();
       if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer.Stop();
         Console.WriteLine(" |  |------ [SharedStateAbstraction] {0}", this.Timer.Result());
-      }
     }
 
     private void AbstractReadAccesses(InstrumentationRegion region)
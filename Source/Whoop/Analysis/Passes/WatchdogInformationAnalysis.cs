@@ -43,22 +43,17 @@ namespace Whoop.Analysis
 
     public void Run()
     {
-      if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
-      }
+      this.Timer = new ExecutionTimer("WatchdogInformationAnalysis", "pass");
+      this.Timer.Start();
 
       this.AnalyseLocalAccessesInRegions();
       this.IdentifyCallAccessesInRegions();
       this.AnalyseCallAccessesInRegions();
       this.MapAxiomAccessesInRegions();
 
+      this.Timer.Stop();
       if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer.Stop();
         Console.WriteLine(" |  |------ [WatchdogInformationAnalysis] {0}", this.Timer.Result());
-      }
     }
 
     #region watchdog information analysis
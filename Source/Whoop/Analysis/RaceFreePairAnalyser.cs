@@ -0,0 +1,131 @@
+﻿// ===-----------------------------------------------------------------------==//
+//
+//                 Whoop - a Verifier for Device Drivers
+//
+//  Copyright (c) 2013-2014 Pantazis Deligiannis (p.deligiannis@imperial.ac.uk)
+//
+//  This file is distributed under the Microsoft Public License.  See
+//  LICENSE.TXT for details.
+//
+// ===----------------------------------------------------------------------===//
+
+using System;
+using System.Collections.Generic;
+using System.IO;
+using System.Linq;
+
+using Whoop.Domain.Drivers;
+
+namespace Whoop.Analysis
+{
+  /// <summary>
+  /// Discharges the entry point pairs that cannot race because their accesses to
+  /// shared memory regions do not conflict. The race checking assertion of a pair
+  /// only fails on a region that one entry point writes and the other reads or writes,
+  /// so such pairs are verified without generating a VC for them.
+  /// </summary>
+  public static class RaceFreePairAnalyser
+  {
+    #region fields
+
+    public static List<EntryPointPair> DischargedPairs = new List<EntryPointPair>();
+
+    #endregion
+
+    #region public API
+
+    /// <summary>
+    /// Discharges the race-free pairs using the read and write sets of the entry points.
+    /// </summary>
+    public static void Analyse()
+    {
+      RaceFreePairAnalyser.DischargedPairs = DeviceDriver.EntryPointPairs.FindAll(pair =>
+        !RaceFreePairAnalyser.HasConflictingAccesses(pair.EntryPoint1, pair.EntryPoint2));
+    }
+
+    public static bool IsDischarged(EntryPointPair pair)
+    {
+      return RaceFreePairAnalyser.DischargedPairs.Any(val =>
+        val.EntryPoint1.Name.Equals(pair.EntryPoint1.Name) &&
+        val.EntryPoint2.Name.Equals(pair.EntryPoint2.Name));
+    }
+
+    /// <summary>
+    /// Prints the discharged pairs.
+    /// </summary>
+    /// <param name="files">List of file names</param>
+    public static void ToFile(List<string> files)
+    {
+      string pairInfoFile = files[files.Count - 1].Substring(0,
+        files[files.Count - 1].LastIndexOf(".")) + ".pairs.info";
+
+      using(StreamWriter file = new StreamWriter(pairInfoFile))
+      {
+        file.WriteLine("<discharged_pairs>");
+
+        foreach (var pair in RaceFreePairAnalyser.DischargedPairs)
+        {
+          file.WriteLine(pair.EntryPoint1.Name + "::" + pair.EntryPoint2.Name);
+        }
+
+        file.WriteLine("</>");
+      }
+    }
+
+    /// <summary>
+    /// Parses the discharged pairs, if the engine has printed any.
+    /// </summary>
+    /// <param name="files">List of file names</param>
+    public static void FromFile(List<string> files)
+    {
+      string pairInfoFile = files[files.Count - 1].Substring(0,
+        files[files.Count - 1].LastIndexOf(".")) + ".pairs.info";
+
+      RaceFreePairAnalyser.DischargedPairs = new List<EntryPointPair>();
+      if (!File.Exists(pairInfoFile))
+        return;
+
+      using(StreamReader file = new StreamReader(pairInfoFile))
+      {
+        string line;
+        while ((line = file.ReadLine()) != null)
+        {
+          if (line.Equals("<discharged_pairs>")) continue;
+          if (line.Equals("</>")) break;
+
+          string[] names = line.Split(new string[] { "::" }, StringSplitOptions.None);
+          var pair = DeviceDriver.EntryPointPairs.Find(val =>
+            val.EntryPoint1.Name.Equals(names[0]) && val.EntryPoint2.Name.Equals(names[1]));
+          if (pair != null)
+            RaceFreePairAnalyser.DischargedPairs.Add(pair);
+        }
+      }
+    }
+
+    #endregion
+
+    #region helper functions
+
+    private static bool HasConflictingAccesses(EntryPoint ep1, EntryPoint ep2)
+    {
+      if (ep1.Name.Equals(ep2.Name))
+        return ep1.HasWriteAccess.Count > 0;
+
+      foreach (var write in ep1.HasWriteAccess.Keys)
+      {
+        if (ep2.HasWriteAccess.ContainsKey(write) || ep2.HasReadAccess.ContainsKey(write))
+          return true;
+      }
+
+      foreach (var write in ep2.HasWriteAccess.Keys)
+      {
+        if (ep1.HasReadAccess.ContainsKey(write))
+          return true;
+      }
+
+      return false;
+    }
+
+    #endregion
+  }
+}
@@ -30,8 +30,8 @@ namespace Whoop.Analysis
     private static Dictionary<EntryPoint, List<Variable>> EntryPointMemoryRegions =
       new Dictionary<EntryPoint, List<Variable>>();
 
-    private static Dictionary<Implementation, List<Variable>> MemoryRegions =
-      new Dictionary<Implementation, List<Variable>>();
+    private static Dictionary<string, List<Variable>> MemoryRegions =
+      new Dictionary<string, List<Variable>>();
 
     public static List<Variable> GetMemoryRegions(EntryPoint ep)
     {
@@ -55,13 +55,9 @@ namespace Whoop.Analysis
 
     public static List<Variable> GetMemoryRegions(string name)
     {
-      foreach (var mr in SharedStateAnalyser.MemoryRegions)
-      {
-        if (!mr.Key.Name.Equals(name))
-          continue;
-        return mr.Value;
-      }
-
+      List<Variable> memRegions = null;
+      if (SharedStateAnalyser.MemoryRegions.TryGetValue(name, out memRegions))
+        return memRegions;
       return new List<Variable>();
     }
 
@@ -141,6 +137,10 @@ namespace Whoop.Analysis
         return;
       SharedStateAnalyser.EntryPointMemoryRegions.Add(ep, new List<Variable>());
       SharedStateAnalyser.AnalyseMemoryRegions(ac, ep, ac.GetImplementation(ep.Name));
+
+      // every entry point is analysed in its own context, so the visited
+      // implementations are of no use to the next one and only pin its program
+      SharedStateAnalyser.AlreadyAnalyzedFunctions.Clear();
     }
 
     private static void AnalyseMemoryRegions(AnalysisContext ac, EntryPoint ep, Implementation impl)
@@ -217,7 +217,8 @@ namespace Whoop.Analysis
       }
 
       vars = vars.OrderBy(val => val.Name).ToList();
-      SharedStateAnalyser.MemoryRegions.Add(impl, vars);
+      if (!SharedStateAnalyser.MemoryRegions.ContainsKey(impl.Name))
+        SharedStateAnalyser.MemoryRegions.Add(impl.Name, vars);
 
       foreach (var v in vars)
       {
@@ -104,16 +104,25 @@ namespace Whoop
 
     public void InlineEntryPoint(EntryPoint ep)
     {
-      var impl = this.GetImplementation(ep.Name);
+      this.InlineImplementation(this.GetImplementation(ep.Name));
+      ep.IsInlined = true;
+    }
 
-      impl.Proc.Attributes = new QKeyValue(Token.NoToken,
-        "inline", new List<object>{ new LiteralExpr(Token.NoToken, BigNum.FromInt(1)) },
-        impl.Proc.Attributes);
-      impl.Attributes = new QKeyValue(Token.NoToken,
-        "inline", new List<object>{ new LiteralExpr(Token.NoToken, BigNum.FromInt(1)) },
-        impl.Attributes);
+    public void InlineImplementation(Implementation impl)
+    {
+      if (QKeyValue.FindIntAttribute(impl.Proc.Attributes, "inline", -1) == -1)
+      {
+        impl.Proc.Attributes = new QKeyValue(Token.NoToken,
+          "inline", new List<object>{ new LiteralExpr(Token.NoToken, BigNum.FromInt(1)) },
+          impl.Proc.Attributes);
+      }
 
-      ep.IsInlined = true;
+      if (QKeyValue.FindIntAttribute(impl.Attributes, "inline", -1) == -1)
+      {
+        impl.Attributes = new QKeyValue(Token.NoToken,
+          "inline", new List<object>{ new LiteralExpr(Token.NoToken, BigNum.FromInt(1)) },
+          impl.Attributes);
+      }
     }
 
     public List<Implementation> GetCheckerImplementations()
@@ -304,6 +313,29 @@ namespace Whoop
       this.TopLevelDeclarations = this.Program.TopLevelDeclarations.ToArray().ToList();
     }
 
+    /// <summary>
+    /// Drops everything that pairing the given entry point does not need, which
+    /// is its implementation, its instrumentation region and its locks.
+    /// </summary>
+    public void ReduceToEntryPoint(EntryPoint ep)
+    {
+      var impl = this.GetImplementation(ep.Name);
+
+      this.InstrumentationRegions.RemoveAll(val => !val.Implementation().Name.Equals(ep.Name));
+      this.CurrentLocksets.Clear();
+      this.MemoryLocksets.Clear();
+      this.MatchedAccessesMap.Clear();
+      this.AxiomAccessesMap.Clear();
+
+      this.Program = new Program();
+      this.Program.AddTopLevelDeclaration(impl.Proc);
+      this.Program.AddTopLevelDeclaration(impl);
+      this.ResContext = new ResolutionContext((IErrorSink)null);
+      this.Checker = null;
+
+      this.ResetToProgramTopLevelDeclarations();
+    }
+
     #endregion
 
     #region static public API
@@ -323,6 +355,16 @@ namespace Whoop
         AnalysisContext.Registry.Add(ep, ac);
     }
 
+    public static void ReleaseAnalysisContext(EntryPoint ep)
+    {
+      AnalysisContext.Registry.Remove(ep);
+    }
+
+    public static void ReleasePairAnalysisContexts()
+    {
+      AnalysisContext.PairRegistry.Clear();
+    }
+
     internal static PairCheckingRegion GetPairAnalysisContext(EntryPoint ep1, EntryPoint ep2)
     {
       if (AnalysisContext.PairRegistry.Any(val =>
@@ -13,6 +13,7 @@ using System;
 using System.Collections.Generic;
 using System.Diagnostics.Contracts;
 using System.Linq;
+using System.Runtime.CompilerServices;
 using Microsoft.Boogie;
 using Whoop.Domain.Drivers;
 
@@ -22,6 +23,12 @@ namespace Whoop
   {
     private EntryPointPair Pair;
 
+    /// <summary>
+    /// The captured states of each model by name, which are built once per model.
+    /// </summary>
+    private static ConditionalWeakTable<Model, Dictionary<string, Model.CapturedState>> StatesByName =
+      new ConditionalWeakTable<Model, Dictionary<string, Model.CapturedState>>();
+
     public HashSet<string> UnprotectedResources;
 
     public bool FoundErrors;
@@ -201,15 +208,19 @@ namespace Whoop
 
     private static Model.CapturedState GetStateFromModel(string stateName, Model m)
     {
-      Model.CapturedState state = null;
-      foreach (var s in m.States)
+      var states = ErrorReporter.StatesByName.GetValue(m, model =>
       {
-        if (s.Name.Equals(stateName))
+        var index = new Dictionary<string, Model.CapturedState>();
+        foreach (var s in model.States)
         {
-          state = s;
-          break;
+          if (!index.ContainsKey(s.Name))
+            index.Add(s.Name, s);
         }
-      }
+        return index;
+      });
+
+      Model.CapturedState state = null;
+      states.TryGetValue(stateName, out state);
       return state;
     }
 
@@ -240,7 +251,7 @@ namespace Whoop
       foreach (var s in model.States)
       {
         if (conflictingActions != null &&
-            !conflictingActions.Keys.Contains(s.Name))
+            !conflictingActions.ContainsKey(s.Name))
           continue;
         if (s == model.InitialState && s.VariableCount == 0)
           continue;
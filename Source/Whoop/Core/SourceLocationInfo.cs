@@ -20,6 +20,12 @@ namespace Whoop
 {
   public class SourceLocationInfo
   {
+    /// <summary>
+    /// The lines of every source file read so far, or null if the file cannot be read.
+    /// A racy driver reports many accesses of the same file, so each file is read once.
+    /// </summary>
+    private static Dictionary<string, string[]> SourceLines = new Dictionary<string, string[]>();
+
     private int Line;
     private int Column;
     private string File;
@@ -72,25 +78,34 @@ namespace Whoop
 
     private string FetchCodeLine(int i)
     {
-      if (System.IO.File.Exists(this.GetFile())) return SourceLocationInfo.FetchCodeLine(this.GetFile(), this.GetLine());
-      return SourceLocationInfo.FetchCodeLine(Path.Combine(this.GetDirectory(), Path.GetFileName(this.GetFile())), this.GetLine());
+      var lines = SourceLocationInfo.GetSourceLines(this.GetFile());
+      if (lines == null)
+        lines = SourceLocationInfo.GetSourceLines(Path.Combine(this.GetDirectory(), Path.GetFileName(this.GetFile())));
+
+      if (lines == null || this.GetLine() < 1 || this.GetLine() > lines.Length)
+        return "<unknown line of code>";
+      return lines[this.GetLine() - 1];
     }
 
-    private static string FetchCodeLine(string path, int lineNo)
+    private static string[] GetSourceLines(string path)
     {
-      try
+      lock (SourceLocationInfo.SourceLines)
       {
-        TextReader tr = new StreamReader(path);
-        string line = null;
-        for (int currLineNo = 1; ((line = tr.ReadLine()) != null); currLineNo++)
+        string[] lines = null;
+        if (SourceLocationInfo.SourceLines.TryGetValue(path, out lines))
+          return lines;
+
+        try
         {
-          if (currLineNo == lineNo) return line;
+          lines = System.IO.File.ReadAllLines(path);
         }
-        throw new Exception();
-      }
-      catch (Exception)
-      {
-        return "<unknown line of code>";
+        catch (Exception)
+        {
+          lines = null;
+        }
+
+        SourceLocationInfo.SourceLines.Add(path, lines);
+        return lines;
       }
     }
 
@@ -14,6 +14,7 @@ using System.Collections.Generic;
 using System.Diagnostics.Contracts;
 using System.Linq;
 using System.IO;
+using System.Text.RegularExpressions;
 using System.Xml.Linq;
 
 using Microsoft.Boogie;
@@ -166,6 +167,11 @@ namespace Whoop.Domain.Drivers
           DeviceDriver.EntryPointPairs.Add(new EntryPointPair(ep1, ep2));
         }
       }
+
+      if (!WhoopCommandLineOptions.Get().AnalyseOnly.Equals(""))
+      {
+        DeviceDriver.SelectEntryPointPairs(WhoopCommandLineOptions.Get().AnalyseOnly);
+      }
     }
 
     public static EntryPoint GetEntryPoint(string name)
@@ -230,6 +236,68 @@ namespace Whoop.Domain.Drivers
       DeviceDriver.InitEntryPoint = ep;
     }
 
+    /// <summary>
+    /// Keeps only the entry point pairs that the given selection matches, and
+    /// the entry points that these pairs need. The selection is a comma separated
+    /// list of entry point names, or of pairs of names joined by ':', which can
+    /// contain the '*' and '?' wildcards. A cloned entry point also matches the
+    /// name of the entry point it clones.
+    /// </summary>
+    /// <param name="selection">Entry point selection</param>
+    private static void SelectEntryPointPairs(string selection)
+    {
+      var items = selection.Split(new char[] { ',' }, StringSplitOptions.RemoveEmptyEntries);
+
+      DeviceDriver.EntryPointPairs.RemoveAll(pair => !items.Any(item =>
+        DeviceDriver.IsSelectedPair(item.Trim(), pair)));
+
+      if (DeviceDriver.EntryPointPairs.Count == 0)
+      {
+        Console.Error.Write("No entry point pair matches the selection \"" + selection + "\".");
+        Environment.Exit((int)Outcome.ParsingError);
+      }
+
+      DeviceDriver.EntryPoints.RemoveAll(ep => !DeviceDriver.EntryPointPairs.Any(pair =>
+        pair.EntryPoint1.Equals(ep) || pair.EntryPoint2.Equals(ep)));
+    }
+
+    /// <summary>
+    /// Checks if the given item of an entry point selection matches the pair.
+    /// </summary>
+    /// <returns>Boolean value</returns>
+    /// <param name="item">Entry point name or pair of names</param>
+    /// <param name="pair">Entry point pair</param>
+    private static bool IsSelectedPair(string item, EntryPointPair pair)
+    {
+      if (!item.Contains(":"))
+      {
+        return DeviceDriver.IsSelectedEntryPoint(item, pair.EntryPoint1) ||
+          DeviceDriver.IsSelectedEntryPoint(item, pair.EntryPoint2);
+      }
+
+      var names = item.Split(new char[] { ':' }, 2);
+      return (DeviceDriver.IsSelectedEntryPoint(names[0], pair.EntryPoint1) &&
+        DeviceDriver.IsSelectedEntryPoint(names[1], pair.EntryPoint2)) ||
+        (DeviceDriver.IsSelectedEntryPoint(names[0], pair.EntryPoint2) &&
+        DeviceDriver.IsSelectedEntryPoint(names[1], pair.EntryPoint1));
+    }
+
+    /// <summary>
+    /// Checks if the given name, which can contain wildcards, matches the entry point.
+    /// </summary>
+    /// <returns>Boolean value</returns>
+    /// <param name="pattern">Entry point name</param>
+    /// <param name="ep">Entry point</param>
+    private static bool IsSelectedEntryPoint(string pattern, EntryPoint ep)
+    {
+      var regex = new Regex("^" + Regex.Escape(pattern.Trim()).Replace("\\*", ".*").Replace("\\?", ".") + "$");
+      if (regex.IsMatch(ep.Name))
+        return true;
+      if (ep.IsClone && regex.IsMatch(ep.Name.Substring(0, ep.Name.LastIndexOf("#"))))
+        return true;
+      return false;
+    }
+
     /// <summary>
     /// Checks if the given entry points form a new pair.
     /// </summary>
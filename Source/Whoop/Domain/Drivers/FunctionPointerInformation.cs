@@ -30,6 +30,13 @@ namespace Whoop.Domain.Drivers
     public static Dictionary<string, List<Tuple<string, int, int>>> Calls;
     public static Dictionary<string, Tuple<string, string>> Macros;
 
+    /// <summary>
+    /// Maps the source file and line of each recorded call to its function pointer type.
+    /// The file is empty for calls recorded without one, which is the case when the
+    /// information of the translation units has not been merged by whoop.py.
+    /// </summary>
+    private static Dictionary<Tuple<string, int>, string> CallSites;
+
     #endregion
 
     #region public API
@@ -46,6 +53,7 @@ namespace Whoop.Domain.Drivers
       FunctionPointerInformation.Declarations = new Dictionary<string, HashSet<string>>();
       FunctionPointerInformation.Calls = new Dictionary<string, List<Tuple<string, int, int>>>();
       FunctionPointerInformation.Macros = new Dictionary<string, Tuple<string, string>>();
+      FunctionPointerInformation.CallSites = new Dictionary<Tuple<string, int>, string>();
 
       using(StreamReader file = new StreamReader(fpInfoFile))
       {
@@ -71,70 +79,87 @@ namespace Whoop.Domain.Drivers
             {
               FunctionPointerInformation.Macros[type] = new Tuple<string, string>(pair[1], pair[2]);
             }
-            else if (pair.Count() == 4)
+            else if (pair.Count() == 4 || pair.Count() == 5)
             {
-              FunctionPointerInformation.Calls[type].Add(new Tuple<string, int, int>(
-                pair[1], Int32.Parse(pair[2]), Int32.Parse(pair[3])));
+              var call = new Tuple<string, int, int>(pair[1], Int32.Parse(pair[2]), Int32.Parse(pair[3]));
+              FunctionPointerInformation.Calls[type].Add(call);
+              string source = pair.Count() == 5 ? FunctionPointerInformation.GetFullPath(pair[4]) : "";
+              FunctionPointerInformation.CallSites[new Tuple<string, int>(source, call.Item2)] = type;
             }
           }
         }
       }
     }
 
-    public static bool TryGetFromLine(int line, out HashSet<string> funcPtrs)
+    public static bool TryGetFromLine(string file, int line, out HashSet<string> funcPtrs)
     {
-      bool result = false;
       string funcPtr = null;
       funcPtrs = null;
 
-      foreach (var fp in FunctionPointerInformation.Calls)
-      {
-        foreach (var call in fp.Value)
-        {
-          if (call.Item2 == line)
-          {
-            funcPtr = fp.Key;
-            result = true;
-            break;
-          }
-        }
-      }
-
-      if (funcPtr != null)
-      {
-        funcPtrs = FunctionPointerInformation.Declarations[funcPtr];
-        if (funcPtrs.Count == 0) result = false;
-      }
+      if (!FunctionPointerInformation.TryGetCallSite(file, line, out funcPtr))
+        return false;
 
-      return result;
+      funcPtrs = FunctionPointerInformation.Declarations[funcPtr];
+      return funcPtrs.Count > 0;
     }
 
-    public static bool TryGetFromMacro(int line, out Tuple<string, string> macro)
+    public static bool TryGetFromMacro(string file, int line, out Tuple<string, string> macro)
     {
-      bool result = false;
       string funcPtr = null;
       macro = null;
 
-      foreach (var fp in FunctionPointerInformation.Calls)
+      if (!FunctionPointerInformation.TryGetCallSite(file, line, out funcPtr))
+        return false;
+
+      macro = FunctionPointerInformation.Macros[funcPtr];
+      return macro != null;
+    }
+
+    #endregion
+
+    #region other methods
+
+    /// <summary>
+    /// Finds the function pointer type of the call at the given source location. If the
+    /// source file is not found by its path, it is matched by its name, as long as that
+    /// name is not shared by several translation units.
+    /// </summary>
+    /// <returns>Boolean value</returns>
+    /// <param name="file">Source file, as given by the sourceloc attribute</param>
+    /// <param name="line">Source line</param>
+    /// <param name="funcPtr">Function pointer type</param>
+    private static bool TryGetCallSite(string file, int line, out string funcPtr)
+    {
+      var source = FunctionPointerInformation.GetFullPath(file);
+      if (FunctionPointerInformation.CallSites.TryGetValue(new Tuple<string, int>(source, line), out funcPtr))
+        return true;
+
+      var name = Path.GetFileName(source);
+      var matches = FunctionPointerInformation.CallSites.Where(val => val.Key.Item2 == line &&
+        val.Key.Item1.Length > 0 && Path.GetFileName(val.Key.Item1).Equals(name)).
+        Select(val => val.Value).Distinct().ToList();
+      if (matches.Count == 1)
       {
-        foreach (var call in fp.Value)
-        {
-          if (call.Item2 == line)
-          {
-            funcPtr = fp.Key;
-            result = true;
-            break;
-          }
-        }
+        funcPtr = matches[0];
+        return true;
       }
 
-      if (funcPtr != null)
+      return FunctionPointerInformation.CallSites.TryGetValue(new Tuple<string, int>("", line), out funcPtr);
+    }
+
+    private static string GetFullPath(string file)
+    {
+      if (String.IsNullOrEmpty(file))
+        return "";
+
+      try
       {
-        macro = FunctionPointerInformation.Macros[funcPtr];
-        if (macro == null) result = false;
+        return Path.GetFullPath(file);
+      }
+      catch (Exception)
+      {
+        return file;
       }
-
-      return result;
     }
 
     #endregion
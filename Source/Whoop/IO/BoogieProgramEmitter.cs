@@ -31,10 +31,7 @@ namespace Whoop.IO
       var fileName = directoryContainingFile + Path.DirectorySeparatorChar +
                      Path.GetFileNameWithoutExtension(file);
 
-      using(TokenTextWriter writer = new TokenTextWriter(fileName + "." + extension, true))
-      {
-        declarations.Emit(writer);
-      }
+      BoogieProgramEmitter.Write(declarations, file, fileName + "." + extension);
     }
 
     public static void Emit(List<Declaration> declarations, string file, string suffix, string extension = "bpl")
@@ -46,7 +43,19 @@ namespace Whoop.IO
       var fileName = directoryContainingFile + Path.DirectorySeparatorChar +
         Path.GetFileNameWithoutExtension(file) + "_" + suffix;
 
-      using(TokenTextWriter writer = new TokenTextWriter(fileName + "." + extension, true))
+      BoogieProgramEmitter.Write(declarations, file, fileName + "." + extension);
+    }
+
+    private static void Write(List<Declaration> declarations, string input, string output)
+    {
+      // only the programs the Whoop executables hand to each other are packed
+      if (BoogieProgramPack.IsEnabled && Path.GetExtension(output).Equals(".wbpl"))
+      {
+        BoogieProgramPack.Write(declarations, output, input);
+        return;
+      }
+
+      using(TokenTextWriter writer = new TokenTextWriter(output, true))
       {
         declarations.Emit(writer);
       }
@@ -0,0 +1,177 @@
+﻿// ===-----------------------------------------------------------------------==//
+//
+//                 Whoop - a Verifier for Device Drivers
+//
+//  Copyright (c) 2013-2014 Pantazis Deligiannis (p.deligiannis@imperial.ac.uk)
+//
+//  This file is distributed under the Microsoft Public License.  See
+//  LICENSE.TXT for details.
+//
+// ===----------------------------------------------------------------------===//
+
+using System;
+using System.Collections.Generic;
+using System.IO;
+using System.IO.Compression;
+using System.Linq;
+using System.Security.Cryptography;
+using System.Text;
+
+using Microsoft.Boogie;
+
+namespace Whoop.IO
+{
+  /// <summary>
+  /// A packed intermediate program. The pack only lists the hashes of its declarations,
+  /// whose compressed text is kept once in a declaration table next to the input file,
+  /// so the declarations that every entry point and pair program repeats are stored once.
+  /// A pack starts with a magic number and a version, and is expanded back to text before
+  /// it is parsed, as Boogie cannot load its AST from anything else.
+  /// </summary>
+  public static class BoogieProgramPack
+  {
+    #region fields
+
+    private static readonly byte[] Magic = Encoding.ASCII.GetBytes("WPACK");
+    private const int Version = 1;
+
+    #endregion
+
+    #region public API
+
+    public static bool IsEnabled
+    {
+      get
+      {
+        var clo = CommandLineOptions.Clo as WhoopCommandLineOptions;
+        return clo != null && clo.PackPrograms;
+      }
+    }
+
+    /// <summary>
+    /// Writes the declarations as a pack, adding the declarations that are not yet
+    /// in the table of the given input file.
+    /// </summary>
+    /// <param name="declarations">Declarations</param>
+    /// <param name="file">Pack file name</param>
+    /// <param name="input">Input file the table belongs to</param>
+    public static void Write(List<Declaration> declarations, string file, string input)
+    {
+      var table = Path.GetFileNameWithoutExtension(input) + ".wdecls";
+      var tableDir = Path.Combine(Path.GetDirectoryName(Path.GetFullPath(file)), table);
+      Directory.CreateDirectory(tableDir);
+
+      var hashes = new List<byte[]>();
+      using (var sha = SHA256.Create())
+      {
+        foreach (var decl in declarations)
+        {
+          var text = new StringWriter();
+          using (var writer = new TokenTextWriter("<pack>", text, false, true))
+          {
+            decl.Emit(writer, 0);
+          }
+
+          var bytes = Encoding.UTF8.GetBytes(text.ToString());
+          var hash = sha.ComputeHash(bytes);
+          BoogieProgramPack.AddToTable(tableDir, hash, bytes);
+          hashes.Add(hash);
+        }
+      }
+
+      using (var writer = new BinaryWriter(File.Create(file)))
+      {
+        writer.Write(BoogieProgramPack.Magic);
+        writer.Write(BoogieProgramPack.Version);
+        writer.Write(table);
+        writer.Write(hashes.Count);
+        foreach (var hash in hashes)
+          writer.Write(hash);
+      }
+    }
+
+    /// <summary>
+    /// Checks if the given file is a pack rather than a textual program.
+    /// </summary>
+    public static bool IsPack(string file)
+    {
+      var header = new byte[BoogieProgramPack.Magic.Length];
+      using (var stream = File.OpenRead(file))
+      {
+        if (stream.Read(header, 0, header.Length) != header.Length)
+          return false;
+      }
+
+      return header.SequenceEqual(BoogieProgramPack.Magic);
+    }
+
+    /// <summary>
+    /// Returns the text of the given program, expanding it first if it is a pack.
+    /// </summary>
+    public static string ReadAllText(string file)
+    {
+      if (!BoogieProgramPack.IsPack(file))
+        return File.ReadAllText(file);
+
+      var text = new StringBuilder();
+      using (var reader = new BinaryReader(File.OpenRead(file)))
+      {
+        reader.ReadBytes(BoogieProgramPack.Magic.Length);
+        var version = reader.ReadInt32();
+        if (version != BoogieProgramPack.Version)
+          throw new InvalidDataException(String.Format("{0} is a version {1} pack, expected version {2}",
+            file, version, BoogieProgramPack.Version));
+
+        var table = Path.Combine(Path.GetDirectoryName(Path.GetFullPath(file)), reader.ReadString());
+        var count = reader.ReadInt32();
+        for (int idx = 0; idx < count; idx++)
+        {
+          var entry = Path.Combine(table, BoogieProgramPack.ToHex(reader.ReadBytes(32)) + ".gz");
+          using (var stream = new GZipStream(File.OpenRead(entry), CompressionMode.Decompress))
+          using (var entryReader = new StreamReader(stream, Encoding.UTF8))
+          {
+            text.AppendLine(entryReader.ReadToEnd());
+          }
+        }
+      }
+
+      return text.ToString();
+    }
+
+    #endregion
+
+    #region helper functions
+
+    private static void AddToTable(string tableDir, byte[] hash, byte[] bytes)
+    {
+      var entry = Path.Combine(tableDir, BoogieProgramPack.ToHex(hash) + ".gz");
+      if (File.Exists(entry))
+        return;
+
+      // the table is shared by concurrent runs, so an entry only appears once complete
+      var temp = entry + "." + System.Diagnostics.Process.GetCurrentProcess().Id + ".tmp";
+      using (var stream = new GZipStream(File.Create(temp), CompressionMode.Compress))
+      {
+        stream.Write(bytes, 0, bytes.Length);
+      }
+
+      try
+      {
+        File.Move(temp, entry);
+      }
+      catch (IOException)
+      {
+        File.Delete(temp);
+        if (!File.Exists(entry))
+          throw;
+      }
+    }
+
+    private static string ToHex(byte[] bytes)
+    {
+      return BitConverter.ToString(bytes).Replace("-", "").ToLower();
+    }
+
+    #endregion
+  }
+}
@@ -48,11 +48,8 @@ namespace Whoop.Instrumentation
     /// </summary>
     public void Run()
     {
-      if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
-      }
+      this.Timer = new ExecutionTimer("AsyncCheckingInstrumentation", "pass");
+      this.Timer.Start();
 
       var initImpl = this.AC.GetImplementation(DeviceDriver.InitEntryPoint);
 
@@ -70,11 +67,9 @@ namespace Whoop.Instrumentation
         }
       }
 
+      this.Timer.Stop();
       if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer.Stop();
         Console.WriteLine(" |  |------ [AsyncCheckingInstrumentation] {0}", this.Timer.Result());
-      }
     }
 
     private void InstrumentCheckerFunction()
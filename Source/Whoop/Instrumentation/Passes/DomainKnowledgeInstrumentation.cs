@@ -47,11 +47,8 @@ namespace Whoop.Instrumentation
 
     public void Run()
     {
-      if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
-      }
+      this.Timer = new ExecutionTimer("DomainKnowledgeInstrumentation", "pass");
+      this.Timer.Start();
 
       this.AddRegisterDeviceFunc();
       this.AddUnregisterDeviceFunc();
@@ -75,11 +72,9 @@ namespace Whoop.Instrumentation
       this.AnalyseDomainSpecificEnableUsage("nfc_register_device");
 //      this.AnalyseDomainSpecificDisableUsage("nfc_free_device");
 
+      this.Timer.Stop();
       if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer.Stop();
         Console.WriteLine(" |  |------ [DomainKnowledgeInstrumentation] {0}", this.Timer.Result());
-      }
     }
 
     #region domain specific variables and methods
@@ -42,20 +42,15 @@ namespace Whoop.Instrumentation
 
     public void Run()
     {
-      if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
-      }
+      this.Timer = new ExecutionTimer("ErrorReportingInstrumentation", "pass");
+      this.Timer.Start();
 
       this.InstrumentAsyncFuncs();
       this.CleanUp();
 
+      this.Timer.Stop();
       if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer.Stop();
         Console.WriteLine(" |  |------ [ErrorReportingInstrumentation] {0}", this.Timer.Result());
-      }
     }
 
     private void InstrumentAsyncFuncs()
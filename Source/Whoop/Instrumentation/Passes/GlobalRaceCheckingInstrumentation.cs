@@ -43,22 +43,17 @@ namespace Whoop.Instrumentation
 
     public void Run()
     {
-      if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
-      }
+      this.Timer = new ExecutionTimer("GlobalRaceCheckingInstrumentation", "pass");
+      this.Timer.Start();
 
       this.AddCurrentLocksets();
       this.AddMemoryLocksets();
       this.AddAccessCheckingVariables();
       this.AddAccessWatchdogConstants();
 
+      this.Timer.Stop();
       if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer.Stop();
         Console.WriteLine(" |  |------ [GlobalRaceCheckingInstrumentation] {0}", this.Timer.Result());
-      }
     }
 
     private void AddCurrentLocksets()
@@ -37,11 +37,8 @@ namespace Whoop.Instrumentation
 
     public void Run()
     {
-      if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
-      }
+      this.Timer = new ExecutionTimer("InstrumentationRegionsConstructor", "pass");
+      this.Timer.Start();
 
       foreach (var impl in this.AC.TopLevelDeclarations.OfType<Implementation>())
       {
@@ -54,11 +51,9 @@ namespace Whoop.Instrumentation
 
       this.EP.RebuildCallGraph(this.AC);
 
+      this.Timer.Stop();
       if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer.Stop();
         Console.WriteLine(" |  |------ [InstrumentationRegionsConstructor] {0}", this.Timer.Result());
-      }
     }
 
     private bool SkipFromAnalysis(Implementation impl)
@@ -42,11 +42,8 @@ namespace Whoop.Instrumentation
 
     public void Run()
     {
-      if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
-      }
+      this.Timer = new ExecutionTimer("LocksetInstrumentation", "pass");
+      this.Timer.Start();
 
       this.AddUpdateLocksetFunc();
       this.AddUpdateLocksetFunc(Microsoft.Boogie.Type.Bool);
@@ -67,11 +64,9 @@ namespace Whoop.Instrumentation
         this.InstrumentProcedure(region);
       }
 
+      this.Timer.Stop();
       if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer.Stop();
         Console.WriteLine(" |  |------ [LocksetInstrumentation] {0}", this.Timer.Result());
-      }
     }
 
     #region lockset verification variables and methods
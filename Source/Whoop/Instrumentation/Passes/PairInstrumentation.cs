@@ -41,11 +41,8 @@ namespace Whoop.Instrumentation
     /// </summary>
     public void Run()
     {
-      if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
-      }
+      this.Timer = new ExecutionTimer("PairInstrumentation", "pass");
+      this.Timer.Start();
 
       PairCheckingRegion region = new PairCheckingRegion(this.AC, this.EP1, this.EP2);
       AnalysisContext.RegisterPairEntryPointAnalysisContext(region, this.EP1, this.EP2);
@@ -57,11 +54,9 @@ namespace Whoop.Instrumentation
       this.AC.TopLevelDeclarations.Add(region.Implementation());
       this.AC.ResContext.AddProcedure(region.Procedure());
 
+      this.Timer.Stop();
       if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer.Stop();
         Console.WriteLine(" |  |------ [PairInstrumentation] {0}", this.Timer.Result());
-      }
     }
 
     private void CreateDeviceStructConstant()
@@ -39,11 +39,8 @@ namespace Whoop.Instrumentation
 
     public void Run()
     {
-      if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
-      }
+      this.Timer = new ExecutionTimer("RaceInstrumentation", "pass");
+      this.Timer.Start();
 
       this.AddAccessFuncs(AccessType.WRITE);
       this.AddAccessFuncs(AccessType.READ);
@@ -58,11 +55,9 @@ namespace Whoop.Instrumentation
         this.InstrumentProcedure(region);
       }
 
+      this.Timer.Stop();
       if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer.Stop();
         Console.WriteLine(" |  |------ [RaceInstrumentation] {0}", this.Timer.Result());
-      }
     }
 
     #region race checking verification variables and methods
@@ -46,11 +46,8 @@ namespace Whoop.Instrumentation
 
     public void Run()
     {
-      if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
-      }
+      this.Timer = new ExecutionTimer("YieldInstrumentation", "pass");
+      this.Timer.Start();
 
       var epImpls = this.RaceCheckedAC.GetEntryPoints();
       var epHelpers = this.RaceCheckedAC.GetEntryPointHelpers();
@@ -80,11 +77,9 @@ namespace Whoop.Instrumentation
       if (WhoopCommandLineOptions.Get().CountYields)
         Console.WriteLine("#y: " + YieldInstrumentation.YieldCounter);
 
+      this.Timer.Stop();
       if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer.Stop();
         Console.WriteLine(" |  |------ [YieldInstrumentation] {0}", this.Timer.Result());
-      }
     }
 
     #region yield instrumentation
@@ -0,0 +1,380 @@
+﻿// ===-----------------------------------------------------------------------==//
+//
+//                 Whoop - a Verifier for Device Drivers
+//
+//  Copyright (c) 2013-2014 Pantazis Deligiannis (p.deligiannis@imperial.ac.uk)
+//
+//  This file is distributed under the Microsoft Public License.  See
+//  LICENSE.TXT for details.
+//
+// ===----------------------------------------------------------------------===//
+
+using System;
+using System.Collections.Generic;
+using System.Diagnostics.Contracts;
+using System.Linq;
+
+using Microsoft.Boogie;
+using Microsoft.Basetypes;
+
+namespace Whoop.Refactoring
+{
+  /// <summary>
+  /// Packs the boolean lockset variables of a pair checker into one bit-vector per
+  /// current lockset and per memory region lockset, with one bit per lock. Lockset
+  /// intersections in race checking assertions become a single bitwise-and.
+  /// </summary>
+  public static class LocksetPacking
+  {
+    /// <summary>
+    /// Rewrites the checker and the contracts of all procedures to use the packed locksets.
+    /// The program is left untouched if the checker updates a lockset in a way that cannot
+    /// be expressed on a single bit.
+    /// </summary>
+    /// <returns>Number of packed lockset variables</returns>
+    /// <param name="ac">Analysis context of the pair</param>
+    /// <param name="checker">Checker implementation</param>
+    public static int Pack(AnalysisContext ac, Implementation checker)
+    {
+      Contract.Requires(ac != null && checker != null);
+
+      var locksets = ac.GetCurrentLocksetVariables();
+      locksets.AddRange(ac.GetMemoryLocksetVariables());
+      if (locksets.Count == 0 || !LocksetPacking.IsPackable(checker, locksets))
+        return 0;
+
+      var locks = locksets.Select(val => LocksetPacking.GetLockName(val)).
+        Distinct().OrderBy(val => val).ToList();
+      var type = Microsoft.Boogie.Type.GetBvType(locks.Count);
+
+      var packed = new Dictionary<string, GlobalVariable>();
+      var bits = new Dictionary<Variable, Tuple<GlobalVariable, int>>();
+      foreach (var ls in locksets)
+      {
+        var name = LocksetPacking.GetPackedName(ls);
+        if (!packed.ContainsKey(name))
+        {
+          packed.Add(name, new GlobalVariable(Token.NoToken, new TypedIdent(Token.NoToken, name, type)));
+          ac.TopLevelDeclarations.Add(packed[name]);
+          ac.Program.AddTopLevelDeclaration(packed[name]);
+        }
+
+        bits.Add(ls, new Tuple<GlobalVariable, int>(packed[name], locks.IndexOf(LocksetPacking.GetLockName(ls))));
+      }
+
+      var intersection = new Function(Token.NoToken, "$bvand.lockset", new List<Variable> {
+          new Formal(Token.NoToken, new TypedIdent(Token.NoToken, "", type), true),
+          new Formal(Token.NoToken, new TypedIdent(Token.NoToken, "", type), true)
+        }, new Formal(Token.NoToken, new TypedIdent(Token.NoToken, "", type), false));
+      intersection.AddAttribute("bvbuiltin", "bvand");
+      ac.TopLevelDeclarations.Add(intersection);
+      ac.Program.AddTopLevelDeclaration(intersection);
+
+      var intersector = new LocksetIntersector(bits, intersection);
+      foreach (var assert in checker.Blocks.SelectMany(val => val.Cmds).OfType<AssertCmd>())
+        assert.Expr = intersector.VisitExpr(assert.Expr);
+
+      var map = new Dictionary<Variable, Expr>();
+      foreach (var bit in bits)
+        map.Add(bit.Key, LocksetPacking.CreateBitExpr(bit.Value.Item1, bit.Value.Item2));
+      var subst = Substituter.SubstitutionFromHashtable(map);
+
+      foreach (var proc in ac.TopLevelDeclarations.OfType<Procedure>())
+        LocksetPacking.PackContracts(proc, bits, subst);
+      LocksetPacking.PackImplementation(checker, bits, subst);
+
+      return bits.Count;
+    }
+
+    #region helper functions
+
+    private static bool IsPackable(Implementation checker, List<Variable> locksets)
+    {
+      foreach (var cmd in checker.Blocks.SelectMany(val => val.Cmds))
+      {
+        if (cmd is AssignCmd)
+        {
+          var assign = cmd as AssignCmd;
+          if (assign.Lhss.Count > 1 && assign.Lhss.Any(val => locksets.Contains(val.DeepAssignedVariable)))
+            return false;
+          if (assign.Lhss.Any(val => !(val is SimpleAssignLhs) && locksets.Contains(val.DeepAssignedVariable)))
+            return false;
+        }
+        else if (cmd is CallCmd)
+        {
+          if ((cmd as CallCmd).Outs.Any(val => val != null && locksets.Contains(val.Decl)))
+            return false;
+        }
+        else if (!(cmd is PredicateCmd) && !(cmd is HavocCmd))
+        {
+          var collector = new VariableCollector();
+          collector.Visit(cmd);
+          if (collector.usedVars.Any(val => locksets.Contains(val)))
+            return false;
+        }
+      }
+
+      return true;
+    }
+
+    private static void PackContracts(Procedure proc, Dictionary<Variable, Tuple<GlobalVariable, int>> bits,
+      Substitution subst)
+    {
+      foreach (var req in proc.Requires)
+        req.Condition = Substituter.Apply(subst, req.Condition);
+      foreach (var ens in proc.Ensures)
+        ens.Condition = Substituter.Apply(subst, ens.Condition);
+
+      var modified = new Dictionary<GlobalVariable, HashSet<int>>();
+      foreach (var mod in proc.Modifies.Where(val => bits.ContainsKey(val.Decl)))
+      {
+        var bit = bits[mod.Decl];
+        if (!modified.ContainsKey(bit.Item1))
+          modified.Add(bit.Item1, new HashSet<int>());
+        modified[bit.Item1].Add(bit.Item2);
+      }
+
+      if (modified.Count == 0)
+        return;
+
+      proc.Modifies.RemoveAll(val => bits.ContainsKey(val.Decl));
+      foreach (var packed in modified)
+      {
+        proc.Modifies.Add(new IdentifierExpr(packed.Key.tok, packed.Key));
+
+        // the unmodified bits of a packed lockset must keep their value across the call
+        var width = packed.Key.TypedIdent.Type.BvBits;
+        for (int idx = 0; idx < width; idx++)
+        {
+          if (packed.Value.Contains(idx))
+            continue;
+
+          var bit = new BvExtractExpr(Token.NoToken, new IdentifierExpr(packed.Key.tok, packed.Key), idx + 1, idx);
+          var frame = Expr.Eq(bit, new OldExpr(Token.NoToken, bit));
+          frame.Typecheck(new TypecheckingContext(null));
+          proc.Ensures.Add(new Ensures(true, frame));
+        }
+      }
+    }
+
+    private static void PackImplementation(Implementation impl, Dictionary<Variable, Tuple<GlobalVariable, int>> bits,
+      Substitution subst)
+    {
+      LocalVariable havocked = null;
+      foreach (var block in impl.Blocks)
+      {
+        var cmds = new List<Cmd>();
+        foreach (var cmd in block.Cmds)
+        {
+          if (cmd is PredicateCmd)
+          {
+            (cmd as PredicateCmd).Expr = Substituter.Apply(subst, (cmd as PredicateCmd).Expr);
+            cmds.Add(cmd);
+          }
+          else if (cmd is CallCmd)
+          {
+            var call = cmd as CallCmd;
+            for (int idx = 0; idx < call.Ins.Count; idx++)
+            {
+              if (call.Ins[idx] != null)
+                call.Ins[idx] = Substituter.Apply(subst, call.Ins[idx]);
+            }
+
+            cmds.Add(cmd);
+          }
+          else if (cmd is AssignCmd)
+          {
+            var assign = cmd as AssignCmd;
+            var rhss = assign.Rhss.Select(val => Substituter.Apply(subst, val)).ToList();
+            var variable = assign.Lhss[0].DeepAssignedVariable;
+
+            if (bits.ContainsKey(variable))
+            {
+              cmds.Add(LocksetPacking.CreateBitUpdate(bits[variable].Item1, bits[variable].Item2, rhss[0]));
+            }
+            else
+            {
+              cmds.Add(new AssignCmd(assign.tok, assign.Lhss.Select(val =>
+                LocksetPacking.SubstituteLhs(val, subst)).ToList(), rhss));
+            }
+          }
+          else if (cmd is HavocCmd)
+          {
+            var havoc = cmd as HavocCmd;
+            var vars = havoc.Vars.Where(val => !bits.ContainsKey(val.Decl)).ToList();
+            if (vars.Count > 0)
+              cmds.Add(new HavocCmd(havoc.tok, vars));
+
+            foreach (var v in havoc.Vars.Where(val => bits.ContainsKey(val.Decl)))
+            {
+              if (havocked == null)
+              {
+                havocked = new LocalVariable(Token.NoToken, new TypedIdent(Token.NoToken,
+                  "$havoc_lockset", Microsoft.Boogie.Type.Bool));
+                impl.LocVars.Add(havocked);
+              }
+
+              var havockedExpr = new IdentifierExpr(havocked.tok, havocked);
+              cmds.Add(new HavocCmd(havoc.tok, new List<IdentifierExpr> { havockedExpr }));
+              cmds.Add(LocksetPacking.CreateBitUpdate(bits[v.Decl].Item1, bits[v.Decl].Item2, havockedExpr));
+            }
+          }
+          else
+          {
+            cmds.Add(cmd);
+          }
+        }
+
+        block.Cmds = cmds;
+      }
+    }
+
+    private static AssignLhs SubstituteLhs(AssignLhs lhs, Substitution subst)
+    {
+      if (!(lhs is MapAssignLhs))
+        return lhs;
+
+      var mapLhs = lhs as MapAssignLhs;
+      return new MapAssignLhs(mapLhs.tok, LocksetPacking.SubstituteLhs(mapLhs.Map, subst),
+        mapLhs.Indexes.Select(val => Substituter.Apply(subst, val)).ToList());
+    }
+
+    private static Expr CreateBitExpr(GlobalVariable packed, int bit)
+    {
+      var expr = Expr.Eq(new BvExtractExpr(Token.NoToken, new IdentifierExpr(packed.tok, packed), bit + 1, bit),
+        new LiteralExpr(Token.NoToken, BigNum.FromInt(1), 1));
+      expr.Typecheck(new TypecheckingContext(null));
+      return expr;
+    }
+
+    private static AssignCmd CreateBitUpdate(GlobalVariable packed, int bit, Expr value)
+    {
+      var width = packed.TypedIdent.Type.BvBits;
+      Expr update = new NAryExpr(Token.NoToken, new IfThenElse(Token.NoToken), new List<Expr> { value,
+        new LiteralExpr(Token.NoToken, BigNum.FromInt(1), 1), new LiteralExpr(Token.NoToken, BigNum.FromInt(0), 1) });
+
+      if (bit + 1 < width)
+        update = new BvConcatExpr(Token.NoToken, new BvExtractExpr(Token.NoToken,
+          new IdentifierExpr(packed.tok, packed), width, bit + 1), update);
+      if (bit > 0)
+        update = new BvConcatExpr(Token.NoToken, update, new BvExtractExpr(Token.NoToken,
+          new IdentifierExpr(packed.tok, packed), bit, 0));
+
+      update.Typecheck(new TypecheckingContext(null));
+      return new AssignCmd(Token.NoToken, new List<AssignLhs> {
+        new SimpleAssignLhs(Token.NoToken, new IdentifierExpr(packed.tok, packed))
+      }, new List<Expr> { update });
+    }
+
+    private static string GetLockName(Variable ls)
+    {
+      if (ls.Name.Contains("_in_CLS_"))
+        return ls.Name.Substring(0, ls.Name.IndexOf("_in_CLS_"));
+      return ls.Name.Substring(0, ls.Name.IndexOf("_in_LS_"));
+    }
+
+    private static string GetPackedName(Variable ls)
+    {
+      if (ls.Name.Contains("_in_CLS_"))
+        return "CLS_" + ls.Name.Substring(ls.Name.IndexOf("_in_CLS_") + "_in_CLS_".Length);
+      return "LS_" + ls.Name.Substring(ls.Name.IndexOf("_in_LS_") + "_in_LS_".Length);
+    }
+
+    #endregion
+
+    #region lockset intersection
+
+    /// <summary>
+    /// Replaces a disjunction over the locks held in two memory locksets, as emitted by
+    /// the pair checking region, with a bitwise-and of the two packed locksets.
+    /// </summary>
+    private sealed class LocksetIntersector : StandardVisitor
+    {
+      private Dictionary<Variable, Tuple<GlobalVariable, int>> Bits;
+      private Function Intersection;
+
+      public LocksetIntersector(Dictionary<Variable, Tuple<GlobalVariable, int>> bits, Function intersection)
+      {
+        this.Bits = bits;
+        this.Intersection = intersection;
+      }
+
+      public override Expr VisitNAryExpr(NAryExpr node)
+      {
+        var intersection = this.TryIntersect(node);
+        if (intersection != null)
+          return intersection;
+        return base.VisitNAryExpr(node);
+      }
+
+      private Expr TryIntersect(NAryExpr node)
+      {
+        var leaves = new List<Expr>();
+        this.CollectDisjuncts(node, leaves);
+
+        GlobalVariable packed1 = null;
+        GlobalVariable packed2 = null;
+        var mask = new HashSet<int>();
+
+        foreach (var leaf in leaves)
+        {
+          var operands = new List<Expr> { leaf };
+          if (leaf is NAryExpr && (leaf as NAryExpr).Fun is BinaryOperator &&
+              ((leaf as NAryExpr).Fun as BinaryOperator).Op == BinaryOperator.Opcode.And)
+            operands = (leaf as NAryExpr).Args.ToList();
+
+          if (operands.Any(val => !(val is IdentifierExpr) || !this.Bits.ContainsKey((val as IdentifierExpr).Decl)))
+            return null;
+
+          var bit1 = this.Bits[(operands[0] as IdentifierExpr).Decl];
+          var bit2 = operands.Count == 1 ? bit1 : this.Bits[(operands[1] as IdentifierExpr).Decl];
+          if (bit1.Item2 != bit2.Item2 || !bit1.Item1.Name.StartsWith("LS_") || !bit2.Item1.Name.StartsWith("LS_"))
+            return null;
+
+          if (packed1 == null)
+          {
+            packed1 = bit1.Item1;
+            packed2 = bit2.Item1;
+          }
+          else if (packed1 != bit1.Item1 || packed2 != bit2.Item1)
+          {
+            return null;
+          }
+
+          mask.Add(bit1.Item2);
+        }
+
+        var width = packed1.TypedIdent.Type.BvBits;
+        var maskValue = BigNum.ZERO;
+        for (int idx = width - 1; idx >= 0; idx--)
+          maskValue = maskValue * BigNum.FromInt(2) + (mask.Contains(idx) ? BigNum.ONE : BigNum.ZERO);
+
+        Expr intersection = new NAryExpr(Token.NoToken, new FunctionCall(this.Intersection), new List<Expr> {
+          new IdentifierExpr(packed1.tok, packed1), new IdentifierExpr(packed2.tok, packed2) });
+        intersection = new NAryExpr(Token.NoToken, new FunctionCall(this.Intersection), new List<Expr> {
+          intersection, new LiteralExpr(Token.NoToken, maskValue, width) });
+
+        var expr = Expr.Neq(intersection, new LiteralExpr(Token.NoToken, BigNum.ZERO, width));
+        expr.Typecheck(new TypecheckingContext(null));
+        return expr;
+      }
+
+      private void CollectDisjuncts(Expr expr, List<Expr> leaves)
+      {
+        var nary = expr as NAryExpr;
+        if (nary != null && nary.Fun is BinaryOperator &&
+            (nary.Fun as BinaryOperator).Op == BinaryOperator.Opcode.Or)
+        {
+          this.CollectDisjuncts(nary.Args[0], leaves);
+          this.CollectDisjuncts(nary.Args[1], leaves);
+        }
+        else
+        {
+          leaves.Add(expr);
+        }
+      }
+    }
+
+    #endregion
+  }
+}
@@ -0,0 +1,104 @@
+﻿// ===-----------------------------------------------------------------------==//
+//
+//                 Whoop - a Verifier for Device Drivers
+//
+//  Copyright (c) 2013-2014 Pantazis Deligiannis (p.deligiannis@imperial.ac.uk)
+//
+//  This file is distributed under the Microsoft Public License.  See
+//  LICENSE.TXT for details.
+//
+// ===----------------------------------------------------------------------===//
+
+using System;
+using System.Collections.Generic;
+using System.Diagnostics.Contracts;
+using System.Linq;
+
+using Microsoft.Boogie;
+
+namespace Whoop.Refactoring
+{
+  /// <summary>
+  /// Slices the program of an entry point pair down to the cone of influence of the
+  /// race checking assertions of its checker.
+  /// </summary>
+  public static class PairSlicing
+  {
+    /// <summary>
+    /// Removes the ensures of the procedures called by the checker that do not constrain
+    /// any variable the assertions depend on. The checker is verified modularly, so these
+    /// are assumptions about unrelated memory regions, locksets and watchdogs.
+    /// </summary>
+    /// <returns>Number of removed ensures</returns>
+    /// <param name="ac">Analysis context of the pair</param>
+    /// <param name="checker">Checker implementation</param>
+    public static int SliceCalleeContracts(AnalysisContext ac, Implementation checker)
+    {
+      Contract.Requires(ac != null && checker != null);
+
+      var procedures = new Dictionary<string, Procedure>();
+      foreach (var proc in ac.TopLevelDeclarations.OfType<Procedure>())
+        procedures[proc.Name] = proc;
+
+      var callees = new HashSet<Procedure>();
+      foreach (var call in checker.Blocks.SelectMany(val => val.Cmds.OfType<CallCmd>()))
+      {
+        Procedure callee = null;
+        if (procedures.TryGetValue(call.callee, out callee) && callee != checker.Proc)
+          callees.Add(callee);
+      }
+
+      var cone = new HashSet<string>();
+      var constraints = new List<HashSet<string>>();
+
+      foreach (var cmd in checker.Blocks.SelectMany(val => val.Cmds))
+      {
+        if (cmd is AssertCmd)
+          cone.UnionWith(PairSlicing.GetVariables(cmd));
+        else
+          constraints.Add(PairSlicing.GetVariables(cmd));
+      }
+
+      foreach (var req in checker.Proc.Requires)
+        constraints.Add(PairSlicing.GetVariables(req.Condition));
+      foreach (var req in callees.SelectMany(val => val.Requires).Where(val => !val.Free))
+        cone.UnionWith(PairSlicing.GetVariables(req.Condition));
+
+      var ensures = new Dictionary<Ensures, HashSet<string>>();
+      foreach (var ens in callees.SelectMany(val => val.Ensures))
+      {
+        ensures[ens] = PairSlicing.GetVariables(ens.Condition);
+        constraints.Add(ensures[ens]);
+      }
+
+      bool changed = true;
+      while (changed)
+      {
+        changed = false;
+        foreach (var vars in constraints)
+        {
+          if (!vars.Overlaps(cone) || vars.IsSubsetOf(cone))
+            continue;
+          cone.UnionWith(vars);
+          changed = true;
+        }
+      }
+
+      int removed = 0;
+      foreach (var callee in callees)
+      {
+        removed += callee.Ensures.RemoveAll(val => ensures[val].Count > 0 &&
+          !ensures[val].Overlaps(cone));
+      }
+
+      return removed;
+    }
+
+    private static HashSet<string> GetVariables(Absy node)
+    {
+      var collector = new VariableCollector();
+      collector.Visit(node);
+      return new HashSet<string>(collector.usedVars.Select(val => val.Name));
+    }
+  }
+}
@@ -53,11 +53,8 @@ namespace Whoop.Refactoring
 
     public void Run()
     {
-      if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
-      }
+      this.Timer = new ExecutionTimer("EntryPointRefactoring", "pass");
+      this.Timer.Start();
 
       this.RefactorEntryPointAttributes();
       this.RefactorEntryPointResult();
@@ -68,11 +65,9 @@ namespace Whoop.Refactoring
       this.RefactorNestedFunctions();
       this.CleanUp();
 
+      this.Timer.Stop();
       if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer.Stop();
         Console.WriteLine(" |  |------ [EntryPointRefactoring] {0}", this.Timer.Result());
-      }
     }
 
     private void RefactorEntryPointAttributes()
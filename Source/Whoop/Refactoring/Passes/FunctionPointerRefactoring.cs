@@ -53,19 +53,14 @@ namespace Whoop.Refactoring
 
     public void Run()
     {
-      if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
-      }
+      this.Timer = new ExecutionTimer("FunctionPointerRefactoring", "pass");
+      this.Timer.Start();
 
       this.RefactorFunctionPointers(this.Implementation);
 
+      this.Timer.Stop();
       if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer.Stop();
         Console.WriteLine(" |  |------ [FunctionPointerRefactoring] {0}", this.Timer.Result());
-      }
     }
 
     #region function pointer refactoring functions
@@ -154,10 +149,11 @@ namespace Whoop.Refactoring
               curr = curr.Next;
             }
             Contract.Requires(curr.Key.Equals("sourceloc") && curr.Params.Count == 3);
+            string source = string.Format("{0}", curr.Params[0]);
             int line = Int32.Parse(string.Format("{0}", curr.Params[1]));
 
             HashSet<string> funcPtrs = null;
-            if (FunctionPointerInformation.TryGetFromLine(line, out funcPtrs))
+            if (FunctionPointerInformation.TryGetFromLine(source, line, out funcPtrs))
             {
               foreach (var ptrBlock in funcPtrBlocks)
               {
@@ -173,7 +169,7 @@ namespace Whoop.Refactoring
             }
 
             Tuple<string, string> macro = null;
-            FunctionPointerInformation.TryGetFromMacro(line, out macro);
+            FunctionPointerInformation.TryGetFromMacro(source, line, out macro);
 
             var rhs = (assign.Rhss[0] as NAryExpr).Args[1];
 
@@ -339,10 +335,11 @@ namespace Whoop.Refactoring
                 curr = curr.Next;
               }
               Contract.Requires(curr.Key.Equals("sourceloc") && curr.Params.Count == 3);
+              string source = string.Format("{0}", curr.Params[0]);
               int line = Int32.Parse(string.Format("{0}", curr.Params[1]));
 
               HashSet<string> funcPtrs = null;
-              if (FunctionPointerInformation.TryGetFromLine(line, out funcPtrs))
+              if (FunctionPointerInformation.TryGetFromLine(source, line, out funcPtrs))
               {
                 var blocks = new List<Block>();
                 foreach (var ptrBlock in funcPtrBlocks.Item2)
@@ -56,21 +56,16 @@ namespace Whoop.Refactoring
     /// </summary>
     public void Run()
     {
-      if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
-      }
+      this.Timer = new ExecutionTimer("LockRefactoring", "pass");
+      this.Timer.Start();
 
       this.EP.OriginalCallGraph = this.BuildCallGraph();
 
       this.AnalyseAndInstrumentLocks(this.Implementation);
 
+      this.Timer.Stop();
       if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer.Stop();
         Console.WriteLine(" |  |------ [LockRefactoring] {0}", this.Timer.Result());
-      }
     }
 
     /// <summary>
@@ -40,11 +40,8 @@ namespace Whoop.Refactoring
 
     public void Run()
     {
-      if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
-      }
+      this.Timer = new ExecutionTimer("NetEnableProgramSlicing", "pass");
+      this.Timer.Start();
 
       foreach (var region in base.AC.InstrumentationRegions)
       {
@@ -67,11 +64,9 @@ namespace Whoop.Refactoring
         ReadWriteSlicing.CleanReadWriteModsets(base.AC, base.EP, region);
       }
 
+      this.Timer.Stop();
       if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer.Stop();
         Console.WriteLine(" |  |------ [NetEnableProgramSlicing] {0}", this.Timer.Result());
-      }
     }
 
     #endregion
@@ -39,11 +39,8 @@ namespace Whoop.Refactoring
     /// </summary>
     public void Run()
     {
-      if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer = new ExecutionTimer();
-        this.Timer.Start();
-      }
+      this.Timer = new ExecutionTimer("ProgramSimplifier", "pass");
+      this.Timer.Start();
 
       foreach (var impl in AC.TopLevelDeclarations.OfType<Implementation>())
       {
@@ -53,11 +50,9 @@ namespace Whoop.Refactoring
         this.SimplifyImplementation(impl);
       }
 
+      this.Timer.Stop();
       if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        this.Timer.Stop();
         Console.WriteLine(" |  |------ [ProgramSimplifier] {0}", this.Timer.Result());
-      }
     }
 
     /// <summary>
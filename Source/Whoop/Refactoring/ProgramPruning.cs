@@ -0,0 +1,158 @@
+﻿// ===-----------------------------------------------------------------------==//
+//
+//                 Whoop - a Verifier for Device Drivers
+//
+//  Copyright (c) 2013-2014 Pantazis Deligiannis (p.deligiannis@imperial.ac.uk)
+//
+//  This file is distributed under the Microsoft Public License.  See
+//  LICENSE.TXT for details.
+//
+// ===----------------------------------------------------------------------===//
+
+using System;
+using System.Collections.Generic;
+using System.Diagnostics.Contracts;
+using System.Linq;
+
+using Microsoft.Boogie;
+
+using Whoop.Domain.Drivers;
+
+namespace Whoop.Refactoring
+{
+  /// <summary>
+  /// Prunes the program that SMACK emits down to the declarations that are reachable
+  /// from the entry points of the driver.
+  /// </summary>
+  public static class ProgramPruning
+  {
+    /// <summary>
+    /// Removes the procedures and implementations that cannot be reached from an entry
+    /// point, a function pointer target or the initialisation functions, and then the
+    /// constants, globals and axioms that only the removed code refers to. Procedures
+    /// whose names are taken (e.g. to be stored in a function pointer) are reachable, and
+    /// so are the SMACK and Whoop procedures that later passes can introduce calls to.
+    /// </summary>
+    /// <returns>Number of removed declarations</returns>
+    /// <param name="ac">Analysis context of the program</param>
+    public static int Prune(AnalysisContext ac)
+    {
+      Contract.Requires(ac != null);
+
+      var procedures = new Dictionary<string, Procedure>();
+      foreach (var proc in ac.TopLevelDeclarations.OfType<Procedure>())
+        procedures[proc.Name] = proc;
+
+      var implementations = new Dictionary<string, List<Implementation>>();
+      foreach (var impl in ac.TopLevelDeclarations.OfType<Implementation>())
+      {
+        if (!implementations.ContainsKey(impl.Name))
+          implementations.Add(impl.Name, new List<Implementation>());
+        implementations[impl.Name].Add(impl);
+      }
+
+      var worklist = new Stack<string>(ProgramPruning.GetRoots(ac, procedures));
+      var reachable = new HashSet<string>();
+      var referenced = new HashSet<string>();
+
+      while (worklist.Count > 0)
+      {
+        var name = worklist.Pop();
+        if (!reachable.Add(name))
+          continue;
+
+        var names = new HashSet<string>();
+        if (procedures.ContainsKey(name))
+          names.UnionWith(ProgramPruning.GetNames(procedures[name]));
+        if (implementations.ContainsKey(name))
+        {
+          foreach (var impl in implementations[name])
+            names.UnionWith(ProgramPruning.GetNames(impl));
+        }
+
+        referenced.UnionWith(names);
+        foreach (var callee in names.Where(val => procedures.ContainsKey(val) && !reachable.Contains(val)))
+          worklist.Push(callee);
+      }
+
+      var removedVariables = new HashSet<string>();
+      foreach (var v in ac.TopLevelDeclarations.OfType<Variable>())
+      {
+        if (referenced.Contains(v.Name) || ac.IsAWhoopVariable(v))
+          continue;
+        removedVariables.Add(v.Name);
+      }
+
+      int count = ac.TopLevelDeclarations.Count;
+
+      ac.TopLevelDeclarations.RemoveAll(val =>
+        ((val is Procedure) && !reachable.Contains((val as Procedure).Name)) ||
+        ((val is Implementation) && !reachable.Contains((val as Implementation).Name)) ||
+        ((val is Variable) && removedVariables.Contains((val as Variable).Name)));
+
+      ac.TopLevelDeclarations.RemoveAll(val => (val is Axiom) &&
+        ProgramPruning.GetNames(val).Overlaps(removedVariables));
+
+      return count - ac.TopLevelDeclarations.Count;
+    }
+
+    /// <summary>
+    /// Returns the names of the procedures the pruning starts from.
+    /// </summary>
+    private static HashSet<string> GetRoots(AnalysisContext ac, Dictionary<string, Procedure> procedures)
+    {
+      var roots = new HashSet<string>();
+
+      foreach (var ep in DeviceDriver.EntryPoints)
+        roots.Add(ep.IsClone ? ep.Name.Substring(0, ep.Name.LastIndexOf("#")) : ep.Name);
+      foreach (var funcPtrs in FunctionPointerInformation.Declarations.Values)
+        roots.UnionWith(funcPtrs);
+
+      if (DeviceDriver.InitEntryPoint != null)
+        roots.Add(DeviceDriver.InitEntryPoint);
+      if (!String.IsNullOrEmpty(DeviceDriver.SharedStructInitialiseFunc))
+        roots.Add(DeviceDriver.SharedStructInitialiseFunc);
+
+      foreach (var proc in procedures.Values)
+      {
+        if (QKeyValue.FindBoolAttribute(proc.Attributes, "entrypoint") ||
+            QKeyValue.FindBoolAttribute(proc.Attributes, "checker") ||
+            ac.IsAWhoopFunc(proc.Name) ||
+            proc.Name.StartsWith("$") || proc.Name.StartsWith("__SMACK_") ||
+            proc.Name.StartsWith("boogie_si_") || proc.Name.StartsWith("corral_") ||
+            proc.Name.StartsWith("whoop$"))
+          roots.Add(proc.Name);
+      }
+
+      roots.IntersectWith(procedures.Keys);
+      return roots;
+    }
+
+    /// <summary>
+    /// Returns the names of the procedures, variables and constants the node refers to.
+    /// </summary>
+    private static HashSet<string> GetNames(Absy node)
+    {
+      var collector = new NameCollector();
+      collector.Visit(node);
+      return collector.Names;
+    }
+
+    private sealed class NameCollector : StandardVisitor
+    {
+      public readonly HashSet<string> Names = new HashSet<string>();
+
+      public override Expr VisitIdentifierExpr(IdentifierExpr node)
+      {
+        this.Names.Add(node.Name);
+        return base.VisitIdentifierExpr(node);
+      }
+
+      public override Cmd VisitCallCmd(CallCmd node)
+      {
+        this.Names.Add(node.callee);
+        return base.VisitCallCmd(node);
+      }
+    }
+  }
+}
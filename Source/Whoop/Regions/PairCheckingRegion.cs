@@ -521,17 +521,38 @@ namespace Whoop.Regions
       IdentifierExpr racsExpr1 = new IdentifierExpr(racs1.tok, racs1);
       IdentifierExpr racsExpr2 = new IdentifierExpr(racs2.tok, racs2);
 
+      // the access checking variables of an entry point that does not access the
+      // memory region are never set, so only the conflicts that can happen are checked
+      bool writes1 = this.EP1.HasWriteAccess.ContainsKey(mr.Name);
+      bool writes2 = this.EP2.HasWriteAccess.ContainsKey(mr.Name);
+      bool reads1 = this.EP1.HasReadAccess.ContainsKey(mr.Name);
+      bool reads2 = this.EP2.HasReadAccess.ContainsKey(mr.Name);
+
       Expr accessesExpr = null;
       if (this.EP1.Name.Equals(this.EP2.Name))
       {
+        if (!writes1)
+          return null;
         accessesExpr = wacsExpr1;
       }
       else
       {
 //        accessesExpr = Expr.Or(wacsExpr1, wacsExpr2);
 
-        accessesExpr = Expr.Or(Expr.Or(Expr.And(wacsExpr1, wacsExpr2),
-          Expr.And(wacsExpr1, racsExpr2)), Expr.And(racsExpr1, wacsExpr2));
+        var conflicts = new List<Expr>();
+        if (writes1 && writes2)
+          conflicts.Add(Expr.And(wacsExpr1, wacsExpr2));
+        if (writes1 && reads2)
+          conflicts.Add(Expr.And(wacsExpr1, racsExpr2));
+        if (reads1 && writes2)
+          conflicts.Add(Expr.And(racsExpr1, wacsExpr2));
+
+        if (conflicts.Count == 0)
+          return null;
+
+        accessesExpr = conflicts[0];
+        for (int i = 1; i < conflicts.Count; i++)
+          accessesExpr = Expr.Or(accessesExpr, conflicts[i]);
       }
 
       Expr checkExpr = null;
@@ -33,11 +33,8 @@ namespace Whoop.Summarisation
 
     public void Run()
     {
-      if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        base.Timer = new ExecutionTimer();
-        base.Timer.Start();
-      }
+      base.Timer = new ExecutionTimer("AccessCheckingSummaryGeneration", "pass");
+      base.Timer.Start();
 
       foreach (var region in base.InstrumentationRegions)
       {
@@ -59,11 +56,9 @@ namespace Whoop.Summarisation
 
       base.InstrumentExistentialBooleans();
 
+      base.Timer.Stop();
       if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        base.Timer.Stop();
         Console.WriteLine(" |  |------ [AccessCheckingSummaryGeneration] {0}", base.Timer.Result());
-      }
     }
 
     #region summary instrumentation functions
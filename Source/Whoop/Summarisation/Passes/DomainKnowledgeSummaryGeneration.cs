@@ -33,11 +33,8 @@ namespace Whoop.Summarisation
 
     public void Run()
     {
-      if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        base.Timer = new ExecutionTimer();
-        base.Timer.Start();
-      }
+      base.Timer = new ExecutionTimer("DomainKnowledgeSummaryGeneration", "pass");
+      base.Timer.Start();
 
 //      foreach (var region in base.InstrumentationRegions)
 //      {
@@ -57,11 +54,9 @@ namespace Whoop.Summarisation
 
       base.InstrumentExistentialBooleans();
 
+      base.Timer.Stop();
       if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        base.Timer.Stop();
         Console.WriteLine(" |  |------ [DomainKnowledgeSummaryGeneration] {0}", base.Timer.Result());
-      }
     }
 
     #region summary instrumentation functions
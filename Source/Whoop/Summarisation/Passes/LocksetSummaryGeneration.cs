@@ -26,18 +26,24 @@ namespace Whoop.Summarisation
 {
   internal class LocksetSummaryGeneration : SummaryGeneration, IPass
   {
+    private LocksetAnalyser LocksetAnalyser;
+    private int DecidedCandidates;
+
     public LocksetSummaryGeneration(AnalysisContext ac, EntryPoint ep)
       : base(ac, ep)
     {
-
+      this.DecidedCandidates = 0;
     }
 
     public void Run()
     {
-      if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
+      base.Timer = new ExecutionTimer("LocksetSummaryGeneration", "pass");
+      base.Timer.Start();
+
+      if (this.EP.IsHoldingLock && !this.EP.IsInlined)
       {
-        base.Timer = new ExecutionTimer();
-        base.Timer.Start();
+        this.LocksetAnalyser = new LocksetAnalyser(base.AC, base.EP, base.CurrentLocksetVariables);
+        this.LocksetAnalyser.Run();
       }
 
       foreach (var region in base.InstrumentationRegions)
@@ -60,11 +66,10 @@ namespace Whoop.Summarisation
 
       base.InstrumentExistentialBooleans();
 
+      base.Timer.Annotate("decidedCandidates", this.DecidedCandidates);
+      base.Timer.Stop();
       if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime)
-      {
-        base.Timer.Stop();
         Console.WriteLine(" |  |------ [LocksetSummaryGeneration] {0}", base.Timer.Result());
-      }
     }
 
     #region summary instrumentation functions
@@ -82,9 +87,9 @@ namespace Whoop.Summarisation
             continue;
           }
 
-          base.InstrumentEnsuresCandidate(region, variable, true);
+          this.InstrumentCurrentLocksetEnsures(region, variable);
           foreach (var block in region.LoopHeaders())
-            base.InstrumentAssertCandidate(block, variable, true);
+            this.InstrumentCurrentLocksetAssert(block, variable);
         }
 
         foreach (var lockVar in lockVars)
@@ -196,10 +201,10 @@ namespace Whoop.Summarisation
             continue;
           }
 
-          base.InstrumentRequiresCandidate(region, variable, true);
-          base.InstrumentEnsuresCandidate(region, variable, true);
+          this.InstrumentCurrentLocksetRequires(region, variable);
+          this.InstrumentCurrentLocksetEnsures(region, variable);
           foreach (var block in region.LoopHeaders())
-            base.InstrumentAssertCandidate(block, variable, true);
+            this.InstrumentCurrentLocksetAssert(block, variable);
         }
 
         foreach (var lockVar in lockVars)
@@ -307,6 +312,59 @@ namespace Whoop.Summarisation
 
     #endregion
 
+    #region current lockset instrumentation functions
+
+    /// <summary>
+    /// The following functions instrument a current lockset invariant as a fact if the
+    /// lockset analysis decided the state of the lock, and as a candidate otherwise.
+    /// </summary>
+    private void InstrumentCurrentLocksetRequires(InstrumentationRegion region, Variable variable)
+    {
+      var state = this.LocksetAnalyser == null ? LocksetAnalyser.LockState.Unknown :
+        this.LocksetAnalyser.GetEntryState(region, variable);
+
+      if (state == LocksetAnalyser.LockState.Unknown)
+      {
+        base.InstrumentRequiresCandidate(region, variable, true);
+        return;
+      }
+
+      base.InstrumentRequires(region, variable, state == LocksetAnalyser.LockState.Held);
+      this.DecidedCandidates++;
+    }
+
+    private void InstrumentCurrentLocksetEnsures(InstrumentationRegion region, Variable variable)
+    {
+      var state = this.LocksetAnalyser == null ? LocksetAnalyser.LockState.Unknown :
+        this.LocksetAnalyser.GetExitState(region, variable);
+
+      if (state == LocksetAnalyser.LockState.Unknown)
+      {
+        base.InstrumentEnsuresCandidate(region, variable, true);
+        return;
+      }
+
+      base.InstrumentEnsures(region, variable, state == LocksetAnalyser.LockState.Held);
+      this.DecidedCandidates++;
+    }
+
+    private void InstrumentCurrentLocksetAssert(Block block, Variable variable)
+    {
+      var state = this.LocksetAnalyser == null ? LocksetAnalyser.LockState.Unknown :
+        this.LocksetAnalyser.GetState(block, variable);
+
+      if (state == LocksetAnalyser.LockState.Unknown)
+      {
+        base.InstrumentAssertCandidate(block, variable, true);
+        return;
+      }
+
+      base.InstrumentAssert(block, variable, state == LocksetAnalyser.LockState.Held);
+      this.DecidedCandidates++;
+    }
+
+    #endregion
+
     #region helper functions
 
     protected override Constant CreateConstant()
@@ -25,7 +25,7 @@ namespace Whoop.Summarisation
 {
   internal abstract class SummaryGeneration
   {
-    private AnalysisContext AC;
+    protected AnalysisContext AC;
     protected EntryPoint EP;
     protected ExecutionTimer Timer;
 
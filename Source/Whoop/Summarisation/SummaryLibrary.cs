@@ -0,0 +1,570 @@
+﻿// ===-----------------------------------------------------------------------==//
+//
+//                 Whoop - a Verifier for Device Drivers
+//
+//  Copyright (c) 2013-2014 Pantazis Deligiannis (p.deligiannis@imperial.ac.uk)
+//
+//  This file is distributed under the Microsoft Public License.  See
+//  LICENSE.TXT for details.
+//
+// ===----------------------------------------------------------------------===//
+
+using System;
+using System.Collections.Generic;
+using System.IO;
+using System.Linq;
+using System.Security.Cryptography;
+using System.Text;
+using System.Text.RegularExpressions;
+
+using Microsoft.Boogie;
+using Microsoft.Boogie.Houdini;
+
+using Whoop.Domain.Drivers;
+
+namespace Whoop.Summarisation
+{
+  /// <summary>
+  /// A library of the summaries that Houdini inferred for helper functions, which is
+  /// shared by the runs on different drivers. Only helpers that call nothing but Whoop
+  /// functions and procedures without a body are summarised. A summary is keyed by the
+  /// version of the model and by the text of the helper, of its callees, of its
+  /// candidate contracts and of the types, globals, constants, functions and axioms they
+  /// depend on, without their attributes and with the name of the entry point replaced
+  /// by a placeholder, and states that the inferred ensures hold whenever the
+  /// inferred requires held on entry.
+  /// </summary>
+  public static class SummaryLibrary
+  {
+    #region fields
+
+    private static string ModelVersion = null;
+
+    private static Regex Identifier = new Regex(@"[A-Za-z0-9'~#$^_.?\\]+");
+
+    private static Regex Attribute = new Regex(@"\{:[^{}""]*(""[^""]*""[^{}""]*)*\}\s?");
+
+    #endregion
+
+    #region public API
+
+    public static bool IsEnabled
+    {
+      get
+      {
+        var clo = CommandLineOptions.Clo as WhoopCommandLineOptions;
+        return clo != null && clo.SummaryLibrary.Length > 0;
+      }
+    }
+
+    /// <summary>
+    /// Replaces the candidate contracts of every helper of the entry point that has a
+    /// summary in the library with the summary, and tags the other helpers with their
+    /// library key, so the cruncher can store what Houdini infers for them.
+    /// </summary>
+    /// <returns>Number of helpers summarised by the library</returns>
+    /// <param name="ac">Analysis context of the entry point</param>
+    /// <param name="ep">Entry point</param>
+    public static int Apply(AnalysisContext ac, EntryPoint ep)
+    {
+      var existentials = SummaryLibrary.GetExistentials(ac);
+      int applied = 0;
+
+      Dictionary<string, Declaration> globals;
+      List<Tuple<Axiom, HashSet<string>>> axioms;
+      SummaryLibrary.IndexGlobalDeclarations(ac, existentials, out globals, out axioms);
+
+      foreach (var region in ac.InstrumentationRegions)
+      {
+        var impl = region.Implementation();
+        if (impl.Name.Equals(ep.Name))
+          continue;
+
+        var key = SummaryLibrary.ComputeKey(ac, ep, impl, existentials, globals, axioms);
+        if (key == null)
+          continue;
+
+        HashSet<string> requires, ensures;
+        bool found = SummaryLibrary.TryRead(key, out requires, out ensures);
+
+        if (WhoopCommandLineOptions.Get().MeasurePassExecutionTime ||
+            WhoopCommandLineOptions.Get().DebugWhoop)
+        {
+          Console.WriteLine(" |  |         {0} {1} (library key {2})",
+            found ? "hit" : "miss", impl.Name, key);
+        }
+
+        if (!found)
+        {
+          impl.Proc.Attributes = new QKeyValue(Token.NoToken, "summary_key",
+            new List<object> { key }, impl.Proc.Attributes);
+          continue;
+        }
+
+        SummaryLibrary.ApplySummary(impl, ep, requires, ensures, existentials);
+        applied++;
+      }
+
+      return applied;
+    }
+
+    /// <summary>
+    /// Removes the implementations of the helpers that are summarised by the library,
+    /// as Houdini does not need to check them again.
+    /// </summary>
+    /// <param name="ac">Analysis context</param>
+    public static void RemoveSummarisedImplementations(AnalysisContext ac)
+    {
+      ac.Program.RemoveTopLevelDeclarations(val => (val is Implementation) &&
+        QKeyValue.FindBoolAttribute((val as Implementation).Proc.Attributes, "library_summary"));
+      ac.ResetToProgramTopLevelDeclarations();
+    }
+
+    /// <summary>
+    /// Stores in the library the contracts that Houdini inferred for the tagged helpers
+    /// that it verified.
+    /// </summary>
+    /// <param name="ac">Analysis context that Houdini ran on</param>
+    /// <param name="ep">Entry point</param>
+    /// <param name="outcome">Houdini outcome</param>
+    public static void Record(AnalysisContext ac, EntryPoint ep, HoudiniOutcome outcome)
+    {
+      var existentials = SummaryLibrary.GetExistentials(ac);
+
+      foreach (var proc in ac.TopLevelDeclarations.OfType<Procedure>())
+      {
+        var key = QKeyValue.FindStringAttribute(proc.Attributes, "summary_key");
+        if (key == null)
+          continue;
+        if (!outcome.implementationOutcomes.ContainsKey(proc.Name) ||
+            outcome.implementationOutcomes[proc.Name].outcome != VC.VCGen.Outcome.Correct)
+          continue;
+
+        var summary = Path.Combine(WhoopCommandLineOptions.Get().SummaryLibrary, key + ".summary");
+        if (File.Exists(summary))
+          continue;
+
+        var lines = new List<string> { "<library_summary>" };
+        foreach (var req in proc.Requires)
+        {
+          string name;
+          Expr cond;
+          if (SummaryLibrary.IsCandidate(req.Condition, existentials, out name, out cond) &&
+              outcome.assignment.ContainsKey(name) && outcome.assignment[name])
+            lines.Add("requires::" + SummaryLibrary.Canonicalise(cond.ToString(), ep, existentials));
+        }
+
+        foreach (var ens in proc.Ensures)
+        {
+          string name;
+          Expr cond;
+          if (SummaryLibrary.IsCandidate(ens.Condition, existentials, out name, out cond) &&
+              outcome.assignment.ContainsKey(name) && outcome.assignment[name])
+            lines.Add("ensures::" + SummaryLibrary.Canonicalise(cond.ToString(), ep, existentials));
+        }
+
+        lines.Add("</>");
+
+        // drivers checked in parallel may store the same summary at the same time
+        var temp = summary + "." + Guid.NewGuid().ToString("N");
+        File.WriteAllLines(temp, lines);
+        try
+        {
+          File.Move(temp, summary);
+        }
+        catch (IOException)
+        {
+          File.Delete(temp);
+        }
+      }
+    }
+
+    #endregion
+
+    #region helper functions
+
+    private static void ApplySummary(Implementation impl, EntryPoint ep, HashSet<string> requires,
+      HashSet<string> ensures, HashSet<string> existentials)
+    {
+      string name;
+      Expr cond;
+
+      var antecedents = new List<Expr>();
+      foreach (var req in impl.Proc.Requires)
+      {
+        if (!SummaryLibrary.IsCandidate(req.Condition, existentials, out name, out cond))
+          cond = req.Condition;
+        else if (!requires.Contains(SummaryLibrary.Canonicalise(cond.ToString(), ep, existentials)))
+          continue;
+
+        antecedents.Add(new OldExpr(Token.NoToken, cond));
+      }
+
+      var newEnsures = new List<Ensures>();
+      foreach (var ens in impl.Proc.Ensures)
+      {
+        if (!SummaryLibrary.IsCandidate(ens.Condition, existentials, out name, out cond))
+        {
+          newEnsures.Add(ens);
+          continue;
+        }
+
+        if (!ensures.Contains(SummaryLibrary.Canonicalise(cond.ToString(), ep, existentials)))
+          continue;
+
+        if (antecedents.Count > 0)
+          cond = Expr.Imp(antecedents.Aggregate((lhs, rhs) => Expr.And(lhs, rhs)), cond);
+        newEnsures.Add(new Ensures(true, cond));
+      }
+
+      impl.Proc.Ensures = newEnsures;
+
+      foreach (var block in impl.Blocks)
+      {
+        block.Cmds.RemoveAll(val => (val is AssertCmd) && SummaryLibrary.IsCandidate(
+          (val as AssertCmd).Expr, existentials, out name, out cond));
+      }
+
+      impl.Proc.Attributes = new QKeyValue(Token.NoToken, "library_summary",
+        new List<object> { Expr.True }, impl.Proc.Attributes);
+    }
+
+    private static string ComputeKey(AnalysisContext ac, EntryPoint ep, Implementation impl,
+      HashSet<string> existentials, Dictionary<string, Declaration> globals,
+      List<Tuple<Axiom, HashSet<string>>> axioms)
+    {
+      string name;
+      Expr cond;
+
+      var text = new StringBuilder();
+      text.Append(SummaryLibrary.GetModelVersion() + "\0");
+      text.Append(impl.Name + "(" + String.Join(", ", impl.Proc.InParams.Select(val =>
+        val.TypedIdent.ToString())) + ") returns (" + String.Join(", ", impl.Proc.OutParams.Select(val =>
+          val.TypedIdent.ToString())) + ")\0");
+      text.Append(String.Join(", ", impl.Proc.Modifies.Select(val => val.Name)) + "\0");
+
+      var contracts = new List<string>();
+      foreach (var req in impl.Proc.Requires)
+      {
+        if (SummaryLibrary.IsCandidate(req.Condition, existentials, out name, out cond))
+          contracts.Add("candidate requires " + cond);
+        else
+          contracts.Add((req.Free ? "free requires " : "requires ") + req.Condition);
+      }
+
+      foreach (var ens in impl.Proc.Ensures)
+      {
+        if (SummaryLibrary.IsCandidate(ens.Condition, existentials, out name, out cond))
+          contracts.Add("candidate ensures " + cond);
+        else
+          contracts.Add((ens.Free ? "free ensures " : "ensures ") + ens.Condition);
+      }
+
+      // the order must not depend on the name of the entry point
+      contracts = contracts.Select(val => SummaryLibrary.Canonicalise(val, ep, existentials)).ToList();
+      contracts.Sort(StringComparer.Ordinal);
+      text.Append(String.Join("\n", contracts.Distinct()) + "\0");
+      text.Append(SummaryLibrary.Print(writer => impl.Emit(writer, 0)) + "\0");
+
+      var names = SummaryLibrary.GetNames(impl.Proc);
+      names.UnionWith(SummaryLibrary.GetNames(impl));
+
+      var visited = new HashSet<string> { impl.Name };
+      var worklist = new List<Implementation> { impl };
+      while (worklist.Count > 0)
+      {
+        var caller = worklist[0];
+        worklist.RemoveAt(0);
+
+        foreach (var call in caller.Blocks.SelectMany(val => val.Cmds).OfType<CallCmd>())
+        {
+          if (visited.Contains(call.callee))
+            continue;
+          visited.Add(call.callee);
+
+          var callee = ac.GetImplementation(call.callee);
+          if (callee != null && !ac.IsAWhoopFunc(call.callee))
+            return null;
+
+          var proc = ac.TopLevelDeclarations.OfType<Procedure>().FirstOrDefault(val =>
+            val.Name.Equals(call.callee));
+          if (proc == null)
+            return null;
+          if (proc.Requires.Any(val => SummaryLibrary.IsCandidate(val.Condition, existentials, out name, out cond)) ||
+              proc.Ensures.Any(val => SummaryLibrary.IsCandidate(val.Condition, existentials, out name, out cond)))
+            return null;
+
+          text.Append(SummaryLibrary.Print(writer => proc.Emit(writer, 0)) + "\0");
+          names.UnionWith(SummaryLibrary.GetNames(proc));
+          if (callee == null)
+            continue;
+
+          text.Append(SummaryLibrary.Print(writer => callee.Emit(writer, 0)) + "\0");
+          names.UnionWith(SummaryLibrary.GetNames(callee));
+          worklist.Add(callee);
+        }
+      }
+
+      // the verdict also depends on the declarations of the program that the helper and
+      // its callees refer to, such as the SMACK constants and their address axioms
+      var dependencies = SummaryLibrary.GetDependencies(ac, names, globals, axioms).Select(val =>
+        SummaryLibrary.Canonicalise(SummaryLibrary.RemoveAttributes(SummaryLibrary.Print(writer =>
+          val.Emit(writer, 0))), ep, existentials)).ToList();
+      dependencies.Sort(StringComparer.Ordinal);
+      text.Append(String.Join("\0", dependencies) + "\0");
+
+      var canonical = SummaryLibrary.Canonicalise(SummaryLibrary.RemoveAttributes(
+        text.ToString()), ep, existentials);
+
+      using (var sha = SHA256.Create())
+      {
+        var hash = sha.ComputeHash(Encoding.UTF8.GetBytes(canonical));
+        return BitConverter.ToString(hash).Replace("-", "");
+      }
+    }
+
+    /// <summary>
+    /// Indexes the global variables, constants and functions of the program by name,
+    /// and the axioms by the names they refer to. The existential constants are left
+    /// out, as the candidate contracts are part of the key already.
+    /// </summary>
+    private static void IndexGlobalDeclarations(AnalysisContext ac, HashSet<string> existentials,
+      out Dictionary<string, Declaration> globals, out List<Tuple<Axiom, HashSet<string>>> axioms)
+    {
+      globals = new Dictionary<string, Declaration>();
+      axioms = new List<Tuple<Axiom, HashSet<string>>>();
+
+      foreach (var decl in ac.TopLevelDeclarations)
+      {
+        if (decl is GlobalVariable || decl is Constant)
+        {
+          if (!existentials.Contains((decl as Variable).Name))
+            globals[(decl as Variable).Name] = decl;
+        }
+        else if (decl is Function)
+        {
+          globals[(decl as Function).Name] = decl;
+        }
+        else if (decl is Axiom)
+        {
+          axioms.Add(new Tuple<Axiom, HashSet<string>>(decl as Axiom, SummaryLibrary.GetNames(decl)));
+        }
+      }
+    }
+
+    /// <summary>
+    /// Returns the type declarations of the program, and the global variables,
+    /// constants, functions and axioms that the given names depend on, transitively.
+    /// An axiom is a dependency if it refers to one of the other dependencies.
+    /// </summary>
+    private static List<Declaration> GetDependencies(AnalysisContext ac, HashSet<string> names,
+      Dictionary<string, Declaration> globals, List<Tuple<Axiom, HashSet<string>>> axioms)
+    {
+      var dependencies = ac.TopLevelDeclarations.Where(val =>
+        val is TypeCtorDecl || val is TypeSynonymDecl).ToList();
+      var referenced = new HashSet<string>();
+      var included = new HashSet<Axiom>();
+      var worklist = new Stack<string>(names);
+
+      while (worklist.Count > 0)
+      {
+        while (worklist.Count > 0)
+        {
+          var name = worklist.Pop();
+          if (!globals.ContainsKey(name) || !referenced.Add(name))
+            continue;
+
+          dependencies.Add(globals[name]);
+          foreach (var next in SummaryLibrary.GetNames(globals[name]))
+            worklist.Push(next);
+        }
+
+        foreach (var axiom in axioms)
+        {
+          if (included.Contains(axiom.Item1) || !axiom.Item2.Overlaps(referenced))
+            continue;
+
+          included.Add(axiom.Item1);
+          dependencies.Add(axiom.Item1);
+          foreach (var next in axiom.Item2)
+            worklist.Push(next);
+        }
+      }
+
+      return dependencies;
+    }
+
+    /// <summary>
+    /// Returns the names of the variables, constants, functions and procedures the
+    /// node refers to.
+    /// </summary>
+    private static HashSet<string> GetNames(Absy node)
+    {
+      var collector = new NameCollector();
+      collector.Visit(node);
+      return collector.Names;
+    }
+
+    /// <summary>
+    /// Removes the attributes, which name the entry point, the source locations and the
+    /// captured states, none of which changes the summary.
+    /// </summary>
+    private static string RemoveAttributes(string text)
+    {
+      while (SummaryLibrary.Attribute.IsMatch(text))
+        text = SummaryLibrary.Attribute.Replace(text, "");
+      return text;
+    }
+
+    /// <summary>
+    /// Renames the existential constants, whose names depend on the order of the
+    /// instrumentation, and every $-separated identifier segment that is the name of
+    /// the entry point, such as in the helpers, locksets and access sets of the entry
+    /// point, to placeholders that are not valid Boogie identifiers. Placeholders are
+    /// left as they are, so canonical text can be canonicalised again.
+    /// </summary>
+    private static string Canonicalise(string text, EntryPoint ep, HashSet<string> existentials)
+    {
+      return SummaryLibrary.Identifier.Replace(text, match =>
+      {
+        if (match.Index > 0 && text[match.Index - 1] == '@')
+          return match.Value;
+        if (existentials.Contains(match.Value))
+          return "@b";
+
+        var segments = match.Value.Split('$');
+        for (int idx = 0; idx < segments.Length; idx++)
+        {
+          if (segments[idx].Equals(ep.Name))
+            segments[idx] = "@ep";
+        }
+
+        return String.Join("$", segments);
+      });
+    }
+
+    private static bool TryRead(string key, out HashSet<string> requires, out HashSet<string> ensures)
+    {
+      requires = new HashSet<string>();
+      ensures = new HashSet<string>();
+
+      var summary = Path.Combine(WhoopCommandLineOptions.Get().SummaryLibrary, key + ".summary");
+      if (!File.Exists(summary))
+        return false;
+
+      using (StreamReader file = new StreamReader(summary))
+      {
+        string line;
+        while ((line = file.ReadLine()) != null)
+        {
+          if (line.StartsWith("requires::"))
+            requires.Add(line.Substring("requires::".Length));
+          else if (line.StartsWith("ensures::"))
+            ensures.Add(line.Substring("ensures::".Length));
+          else if (line.Equals("</>"))
+            return true;
+        }
+      }
+
+      // a truncated summary is ignored
+      return false;
+    }
+
+    private static bool IsCandidate(Expr expr, HashSet<string> existentials, out string name, out Expr cond)
+    {
+      name = null;
+      cond = null;
+
+      var nary = expr as NAryExpr;
+      if (nary == null || !(nary.Fun is BinaryOperator) ||
+          (nary.Fun as BinaryOperator).Op != BinaryOperator.Opcode.Imp)
+        return false;
+
+      var id = nary.Args[0] as IdentifierExpr;
+      if (id == null || !existentials.Contains(id.Name))
+        return false;
+
+      name = id.Name;
+      cond = nary.Args[1];
+      return true;
+    }
+
+    private static HashSet<string> GetExistentials(AnalysisContext ac)
+    {
+      return new HashSet<string>(ac.TopLevelDeclarations.OfType<Constant>().Where(val =>
+        QKeyValue.FindBoolAttribute(val.Attributes, "existential")).Select(val => val.Name));
+    }
+
+    private static string Print(Action<TokenTextWriter> emit)
+    {
+      using (var str = new StringWriter())
+      {
+        using (var writer = new TokenTextWriter("<buffer>", str, false, false))
+        {
+          emit(writer);
+        }
+
+        return str.ToString();
+      }
+    }
+
+    /// <summary>
+    /// Hashes the assembly version and the files of the model, which determine the
+    /// instrumentation of a helper and the contracts of the procedures it calls.
+    /// </summary>
+    private static string GetModelVersion()
+    {
+      if (SummaryLibrary.ModelVersion != null)
+        return SummaryLibrary.ModelVersion;
+
+      var text = new StringBuilder(typeof(SummaryLibrary).Assembly.GetName().Version.ToString());
+      var declFile = WhoopCommandLineOptions.Get().WhoopDeclFile;
+      if (declFile.Length > 0)
+      {
+        var modelDir = Path.GetDirectoryName(Path.GetFullPath(declFile));
+        var files = Directory.GetFiles(modelDir, "*", SearchOption.AllDirectories).ToList();
+        files.Sort(StringComparer.Ordinal);
+
+        foreach (var file in files)
+        {
+          text.Append("\0" + file.Substring(modelDir.Length) + "\0");
+          text.Append(File.ReadAllText(file));
+        }
+      }
+
+      using (var sha = SHA256.Create())
+      {
+        var hash = sha.ComputeHash(Encoding.UTF8.GetBytes(text.ToString()));
+        SummaryLibrary.ModelVersion = BitConverter.ToString(hash).Replace("-", "");
+      }
+
+      return SummaryLibrary.ModelVersion;
+    }
+
+    #endregion
+
+    private sealed class NameCollector : StandardVisitor
+    {
+      public readonly HashSet<string> Names = new HashSet<string>();
+
+      public override Expr VisitIdentifierExpr(IdentifierExpr node)
+      {
+        this.Names.Add(node.Name);
+        return base.VisitIdentifierExpr(node);
+      }
+
+      public override Expr VisitNAryExpr(NAryExpr node)
+      {
+        if (node.Fun is FunctionCall)
+          this.Names.Add((node.Fun as FunctionCall).FunctionName);
+        return base.VisitNAryExpr(node);
+      }
+
+      public override Cmd VisitCallCmd(CallCmd node)
+      {
+        this.Names.Add(node.callee);
+        return base.VisitCallCmd(node);
+      }
+    }
+  }
+}
@@ -54,7 +54,11 @@ namespace Whoop
         filesToParse.Add(file);
       }
 
-      Program program = ExecutionEngine.ParseBoogieProgram(filesToParse, false);
+      Program program = null;
+      if (filesToParse.Any(val => Whoop.IO.BoogieProgramPack.IsPack(val)))
+        program = AnalysisContextParser.ParsePacks(filesToParse);
+      else
+        program = ExecutionEngine.ParseBoogieProgram(filesToParse, false);
       if (program == null) return false;
 
       ResolutionContext rc = new ResolutionContext(null);
@@ -77,5 +81,32 @@ namespace Whoop
 
       return true;
     }
+
+    private static Program ParsePacks(List<string> files)
+    {
+      Program program = new Program();
+
+      foreach (var file in files)
+      {
+        Program snippet = null;
+        int errorCount = 0;
+        if (Whoop.IO.BoogieProgramPack.IsPack(file))
+          errorCount = Parser.Parse(Whoop.IO.BoogieProgramPack.ReadAllText(file), file, out snippet,
+            CommandLineOptions.Clo.UseBaseNameForFileName);
+        else
+          errorCount = Parser.Parse(file, new List<string>(), out snippet,
+            CommandLineOptions.Clo.UseBaseNameForFileName);
+
+        if (snippet == null || errorCount != 0)
+        {
+          Console.WriteLine("{0} parse errors detected in {1}", errorCount, file);
+          return null;
+        }
+
+        program.AddTopLevelDeclarations(snippet.TopLevelDeclarations);
+      }
+
+      return program;
+    }
   }
 }
@@ -0,0 +1,86 @@
+﻿// ===-----------------------------------------------------------------------==//
+//
+//                 Whoop - a Verifier for Device Drivers
+//
+//  Copyright (c) 2013-2014 Pantazis Deligiannis (p.deligiannis@imperial.ac.uk)
+//
+//  This file is distributed under the Microsoft Public License.  See
+//  LICENSE.TXT for details.
+//
+// ===----------------------------------------------------------------------===//
+
+using System;
+using System.Collections.Generic;
+using System.Globalization;
+using System.IO;
+using System.Reflection;
+using System.Text;
+
+using Microsoft.Boogie;
+
+namespace Whoop
+{
+  /// <summary>
+  /// Appends how much of each stage is done as JSON lines to the progress file that
+  /// whoop.py shares with the Whoop executables, together with an estimate of the
+  /// seconds the stage still needs at the rate it has progressed so far.
+  /// </summary>
+  public static class ExecutionProgress
+  {
+    private static readonly DateTime Epoch = new DateTime(1970, 1, 1, 0, 0, 0, DateTimeKind.Utc);
+    private static Dictionary<string, DateTime> StageStarts = new Dictionary<string, DateTime>();
+
+    public static bool IsEnabled
+    {
+      get
+      {
+        var clo = CommandLineOptions.Clo as WhoopCommandLineOptions;
+        return clo != null && clo.ProgressFile.Length > 0;
+      }
+    }
+
+    public static void Report(string stage, int done, int total)
+    {
+      if (!ExecutionProgress.IsEnabled)
+        return;
+
+      var now = DateTime.UtcNow;
+      var ev = new StringBuilder();
+      ev.Append("{\"ts\": " + ExecutionProgress.Format((now - ExecutionProgress.Epoch).TotalSeconds));
+      ev.Append(", \"tool\": \"" + Assembly.GetEntryAssembly().GetName().Name + "\"");
+      ev.Append(", \"stage\": \"" + stage + "\"");
+      ev.Append(", \"done\": " + done + ", \"total\": " + total);
+
+      lock (ExecutionProgress.StageStarts)
+      {
+        DateTime start;
+        if (!ExecutionProgress.StageStarts.TryGetValue(stage, out start))
+        {
+          start = now;
+          ExecutionProgress.StageStarts.Add(stage, start);
+        }
+
+        if (done > 0)
+        {
+          var eta = (now - start).TotalSeconds / done * (total - done);
+          ev.Append(", \"eta\": " + ExecutionProgress.Format(eta));
+        }
+
+        ev.Append("}");
+
+        // every event is a single append, so the writers sharing the file do not interleave
+        using (var stream = new FileStream(WhoopCommandLineOptions.Get().ProgressFile,
+          FileMode.Append, FileAccess.Write, FileShare.ReadWrite))
+        using (var writer = new StreamWriter(stream))
+        {
+          writer.WriteLine(ev.ToString());
+        }
+      }
+    }
+
+    private static string Format(double seconds)
+    {
+      return seconds.ToString("0.###", CultureInfo.InvariantCulture);
+    }
+  }
+}
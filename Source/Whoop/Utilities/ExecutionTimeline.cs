@@ -0,0 +1,115 @@
+﻿// ===-----------------------------------------------------------------------==//
+//
+//                 Whoop - a Verifier for Device Drivers
+//
+//  Copyright (c) 2013-2014 Pantazis Deligiannis (p.deligiannis@imperial.ac.uk)
+//
+//  This file is distributed under the Microsoft Public License.  See
+//  LICENSE.TXT for details.
+//
+// ===----------------------------------------------------------------------===//
+
+using System;
+using System.Collections.Generic;
+using System.Globalization;
+using System.IO;
+using System.Text;
+
+using Microsoft.Boogie;
+
+namespace Whoop
+{
+  /// <summary>
+  /// Collects the spans measured by named execution timers and writes them
+  /// as Chrome trace events, which whoop.py merges into a single timeline.
+  /// </summary>
+  public static class ExecutionTimeline
+  {
+    private static readonly DateTime Epoch = new DateTime(1970, 1, 1, 0, 0, 0, DateTimeKind.Utc);
+    private static List<string> Events = new List<string>();
+
+    public static bool IsEnabled
+    {
+      get
+      {
+        var clo = CommandLineOptions.Clo as WhoopCommandLineOptions;
+        return clo != null && clo.TimelineFile.Length > 0;
+      }
+    }
+
+    public static void Record(string name, string category, DateTime start, TimeSpan duration,
+      Dictionary<string, object> args)
+    {
+      if (!ExecutionTimeline.IsEnabled)
+        return;
+
+      var ev = new StringBuilder();
+      ev.Append("{\"name\": " + ExecutionTimeline.Quote(name));
+      ev.Append(", \"cat\": " + ExecutionTimeline.Quote(category));
+      ev.Append(", \"ph\": \"X\", \"pid\": 0, \"tid\": 0");
+      ev.Append(", \"ts\": " + ExecutionTimeline.ToMicroseconds(start - ExecutionTimeline.Epoch));
+      ev.Append(", \"dur\": " + ExecutionTimeline.ToMicroseconds(duration));
+
+      if (args != null && args.Count > 0)
+      {
+        var values = new List<string>();
+        foreach (var arg in args)
+        {
+          string value = null;
+          if (arg.Value is string)
+            value = ExecutionTimeline.Quote((string)arg.Value);
+          else
+            value = Convert.ToString(arg.Value, CultureInfo.InvariantCulture);
+          values.Add(ExecutionTimeline.Quote(arg.Key) + ": " + value);
+        }
+
+        ev.Append(", \"args\": {" + String.Join(", ", values) + "}");
+      }
+
+      ev.Append("}");
+
+      lock (ExecutionTimeline.Events)
+      {
+        ExecutionTimeline.Events.Add(ev.ToString());
+      }
+    }
+
+    public static void Flush()
+    {
+      if (!ExecutionTimeline.IsEnabled)
+        return;
+
+      lock (ExecutionTimeline.Events)
+      {
+        using (var writer = new StreamWriter(WhoopCommandLineOptions.Get().TimelineFile))
+        {
+          writer.WriteLine("[");
+          writer.WriteLine(String.Join(",\n", ExecutionTimeline.Events));
+          writer.WriteLine("]");
+        }
+      }
+    }
+
+    private static string ToMicroseconds(TimeSpan span)
+    {
+      return ((long)(span.Ticks / (TimeSpan.TicksPerMillisecond / 1000))).ToString(CultureInfo.InvariantCulture);
+    }
+
+    private static string Quote(string str)
+    {
+      var quoted = new StringBuilder("\"");
+      foreach (var c in str)
+      {
+        if (c == '"' || c == '\\')
+          quoted.Append("\\" + c);
+        else if (c < ' ')
+          quoted.AppendFormat("\\u{0:x4}", (int)c);
+        else
+          quoted.Append(c);
+      }
+
+      quoted.Append("\"");
+      return quoted.ToString();
+    }
+  }
+}
@@ -10,6 +10,7 @@
 // ===----------------------------------------------------------------------===//
 
 using System;
+using System.Collections.Generic;
 using System.Diagnostics;
 using System.IO.Ports;
 
@@ -18,14 +19,30 @@ namespace Whoop
   public class ExecutionTimer
   {
     private Stopwatch Timer;
+    private DateTime StartTime;
+
+    private string Name;
+    private string Category;
+    private Dictionary<string, object> Args;
 
     public ExecutionTimer()
     {
       this.Timer = new Stopwatch();
     }
 
+    /// <summary>
+    /// Creates a timer whose measured span is also recorded in the execution timeline.
+    /// </summary>
+    public ExecutionTimer(string name, string category)
+      : this()
+    {
+      this.Name = name;
+      this.Category = category;
+    }
+
     public void Start()
     {
+      this.StartTime = DateTime.UtcNow;
       this.Timer.Reset();
       this.Timer.Start();
     }
@@ -33,6 +50,19 @@ namespace Whoop
     public void Stop()
     {
       this.Timer.Stop();
+
+      if (this.Name != null)
+      {
+        ExecutionTimeline.Record(this.Name, this.Category, this.StartTime,
+          this.Timer.Elapsed, this.Args);
+      }
+    }
+
+    public void Annotate(string key, object value)
+    {
+      if (this.Args == null)
+        this.Args = new Dictionary<string, object>();
+      this.Args[key] = value;
     }
 
     public double Result()
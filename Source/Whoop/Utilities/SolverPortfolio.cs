@@ -0,0 +1,155 @@
+﻿// ===-----------------------------------------------------------------------==//
+//
+//                 Whoop - a Verifier for Device Drivers
+//
+//  Copyright (c) 2013-2014 Pantazis Deligiannis (p.deligiannis@imperial.ac.uk)
+//
+//  This file is distributed under the Microsoft Public License.  See
+//  LICENSE.TXT for details.
+//
+// ===----------------------------------------------------------------------===//
+
+using System;
+using System.Collections.Generic;
+using System.Linq;
+using System.Threading.Tasks;
+
+using Microsoft.Boogie;
+
+namespace Whoop
+{
+  /// <summary>
+  /// Races several prover backends on the same query and keeps the first definitive
+  /// answer. Boogie reads the prover options when a prover is created, so each backend
+  /// creates its provers while its own options are installed.
+  /// </summary>
+  public static class SolverPortfolio
+  {
+    private static readonly object CreationLock = new object();
+    private static Dictionary<string, int> Wins = new Dictionary<string, int>();
+
+    public static bool IsEnabled
+    {
+      get
+      {
+        var clo = CommandLineOptions.Clo as WhoopCommandLineOptions;
+        return clo != null && clo.Portfolio.Count > 1;
+      }
+    }
+
+    public static List<string> Backends
+    {
+      get { return WhoopCommandLineOptions.Get().Portfolio; }
+    }
+
+    /// <summary>
+    /// Runs the given function with the prover options of the given backend, which is
+    /// a solver name optionally followed by '+' separated prover options.
+    /// </summary>
+    public static T CreateWithBackend<T>(string backend, Func<T> create)
+    {
+      lock (SolverPortfolio.CreationLock)
+      {
+        var options = CommandLineOptions.Clo.ProverOptions.ToList();
+        CommandLineOptions.Clo.ProverOptions = SolverPortfolio.GetProverOptions(backend, options);
+
+        try
+        {
+          return create();
+        }
+        finally
+        {
+          CommandLineOptions.Clo.ProverOptions = options;
+        }
+      }
+    }
+
+    /// <summary>
+    /// Runs all backends concurrently and cancels the others as soon as one of them returns
+    /// a definitive answer. If none does, the first backend that completed is chosen. The
+    /// cancelled backends are waited for before returning, so none of them is still using
+    /// the shared prover state when the caller moves on.
+    /// </summary>
+    /// <returns>Index of the chosen backend, or -1 if all of them failed</returns>
+    /// <param name="verify">Runs a backend and returns true if its answer is definitive</param>
+    /// <param name="cancel">Cancels a backend</param>
+    public static int Race(Func<int, bool> verify, Action<int> cancel)
+    {
+      var tasks = new List<Task<bool>>();
+      for (int idx = 0; idx < SolverPortfolio.Backends.Count; idx++)
+      {
+        int backend = idx;
+        tasks.Add(Task.Factory.StartNew(() => verify(backend), TaskCreationOptions.LongRunning));
+      }
+
+      int winner = -1;
+      var pending = new List<Task<bool>>(tasks);
+      while (pending.Count > 0)
+      {
+        var task = pending[Task.WaitAny(pending.ToArray())];
+        pending.Remove(task);
+
+        if (task.Status == TaskStatus.RanToCompletion && task.Result)
+        {
+          winner = tasks.IndexOf(task);
+          break;
+        }
+      }
+
+      if (winner == -1)
+        winner = tasks.FindIndex(val => val.Status == TaskStatus.RanToCompletion);
+
+      for (int idx = 0; idx < tasks.Count; idx++)
+      {
+        if (idx != winner)
+          cancel(idx);
+      }
+
+      try
+      {
+        Task.WaitAll(tasks.ToArray());
+      }
+      catch (AggregateException)
+      {
+        // the cancelled backends fail once their prover is disposed
+      }
+
+      if (winner != -1)
+      {
+        lock (SolverPortfolio.Wins)
+        {
+          var backend = SolverPortfolio.Backends[winner];
+          SolverPortfolio.Wins[backend] = SolverPortfolio.Wins.ContainsKey(backend) ?
+            SolverPortfolio.Wins[backend] + 1 : 1;
+        }
+      }
+
+      return winner;
+    }
+
+    /// <summary>
+    /// Prints how many queries each backend won.
+    /// </summary>
+    public static void WriteStatistics()
+    {
+      if (!SolverPortfolio.IsEnabled)
+        return;
+
+      Console.WriteLine("Solver portfolio: " + String.Join(", ", SolverPortfolio.Backends.Select(val =>
+        val + " won " + (SolverPortfolio.Wins.ContainsKey(val) ? SolverPortfolio.Wins[val] : 0))));
+    }
+
+    private static List<string> GetProverOptions(string backend, List<string> options)
+    {
+      var parts = backend.Split('+');
+      var solver = parts[0].ToLower();
+
+      var result = options.Where(val => !val.StartsWith("SOLVER=") &&
+        (solver.Equals("cvc4") || !val.StartsWith("LOGIC="))).ToList();
+      result.Add("SOLVER=" + solver);
+      result.AddRange(parts.Skip(1));
+
+      return result;
+    }
+  }
+}
@@ -10,6 +10,8 @@
 // ===----------------------------------------------------------------------===//
 
 using System;
+using System.Collections.Generic;
+using System.Linq;
 using Microsoft.Boogie;
 
 namespace Whoop
@@ -21,8 +23,13 @@ namespace Whoop
     public string OriginalFile = "";
     public string WhoopDeclFile = "";
     public string AnalyseOnly = "";
+    public string TimelineFile = "";
+    public string ProgressFile = "";
+    public string SummaryLibrary = "";
+    public List<string> Portfolio = new List<string>();
 
     public int InliningBound = 0;
+    public int InliningCost = 0;
     public int EntryPointFunctionCallComplexity = 150;
 
     public bool CheckInParamAliasing = false;
@@ -43,6 +50,8 @@ namespace Whoop
     public bool InlineHelperFunctions = false;
     public bool DebugWhoop = false;
     public bool ShowErrorModel = false;
+    public bool BoundedMemory = false;
+    public bool PackPrograms = false;
 
     public bool MeasurePassExecutionTime = false;
 
@@ -95,6 +104,15 @@ namespace Whoop
         return true;
       }
 
+      if (option == "inlineCost")
+      {
+        if (ps.ConfirmArgumentCount(1))
+        {
+          this.InliningCost = Int32.Parse(ps.args[ps.i]);
+        }
+        return true;
+      }
+
       if (option == "checkInParamAliasing")
       {
         this.CheckInParamAliasing = true;
@@ -167,6 +185,18 @@ namespace Whoop
         return true;
       }
 
+      if (option == "packPrograms")
+      {
+        this.PackPrograms = true;
+        return true;
+      }
+
+      if (option == "boundedMemory")
+      {
+        this.BoundedMemory = true;
+        return true;
+      }
+
       if (option == "printPairs")
       {
         this.PrintPairs = true;
@@ -185,6 +215,42 @@ namespace Whoop
         return true;
       }
 
+      if (option == "progress")
+      {
+        if (ps.ConfirmArgumentCount(1))
+        {
+          this.ProgressFile = ps.args[ps.i];
+        }
+        return true;
+      }
+
+      if (option == "timeline")
+      {
+        if (ps.ConfirmArgumentCount(1))
+        {
+          this.TimelineFile = ps.args[ps.i];
+        }
+        return true;
+      }
+
+      if (option == "summaryLibrary")
+      {
+        if (ps.ConfirmArgumentCount(1))
+        {
+          this.SummaryLibrary = ps.args[ps.i];
+        }
+        return true;
+      }
+
+      if (option == "portfolio")
+      {
+        if (ps.ConfirmArgumentCount(1))
+        {
+          this.Portfolio = ps.args[ps.i].Split(',').ToList();
+        }
+        return true;
+      }
+
       if (option == "debugWhoop")
       {
         this.DebugWhoop = true;
@@ -0,0 +1,316 @@
+#!/usr/bin/env python
+# encoding: utf-8
+from __future__ import print_function
+import os
+import sys
+import argparse
+import logging
+import re
+import subprocess
+import pickle
+import time
+import math
+import multiprocessing # Only for determining number of CPU cores available
+
+from whoop import Tools, getTimingCSVHeader
+from tester import getPickleOptions, openPickle, getCanonicalTestName, CanonicalisationError, parseTimingCSVRow
+
+Executable = sys.path[0] + os.sep + "whoop.py"
+
+def enum(*sequential):
+  # Build a dictionary that maps sequential[i] => i
+  enums = dict( zip(sequential, range(len(sequential))) )
+  # Build a reverse dictionary
+  reverse = dict((value, key) for key, value in enums.items())
+  enums['reverseMapping'] = reverse
+  return type('Enum', (object,) , enums)
+
+BenchmarkerErrorCodes = enum('SUCCESS', 'FILE_SEARCH_ERROR', 'REGRESSION', 'FILE_OPEN_ERROR', 'GENERAL_ERROR')
+
+""" The columns that are measured per run. These are the
+toolchain stages reported by Whoop plus the total.
+"""
+Stages = Tools + [ "total" ]
+
+def median(samples):
+  ordered = sorted(samples)
+  middle = len(ordered) // 2
+  if len(ordered) % 2 == 1:
+    return ordered[middle]
+  return (ordered[middle - 1] + ordered[middle]) / 2.0
+
+def variance(samples):
+  """ Returns the (unbiased) sample variance """
+  if len(samples) < 2:
+    return 0.0
+  mean = sum(samples) / float(len(samples))
+  return sum([ (s - mean) ** 2 for s in samples ]) / float(len(samples) - 1)
+
+class Benchmark(object):
+  def __init__(self, path, runs, warmup, additionalOptions=None):
+    """
+
+        Initialise a Whoop benchmark.
+        path                : The absolute path to the driver
+        runs                : The number of measured runs
+        warmup              : The number of runs to discard before measuring
+        additionalOptions   : A list of additional command line options to pass to Whoop
+
+        After execution the following attributes should be available.
+        .status             : The status column reported by Whoop (e.g. PASS or FAIL(6))
+        .samples            : A dictionary mapping each stage to its list of timings
+    """
+
+    self.path = path
+    self.runs = runs
+    self.warmup = warmup
+    self.whoopCmdArgs = [ "--time-as-csv=" + self.path ]
+    self.status = None
+    self.samples = dict((stage, []) for stage in Stages)
+
+    if additionalOptions != None:
+      logging.debug("Adding additional command line arguments" + str(additionalOptions))
+      self.whoopCmdArgs.extend(additionalOptions)
+
+  def runOnce(self):
+    """ Executes Whoop once and returns the parsed CSV timing row as a
+        dictionary, or None if no timing row could be found in the output.
+    """
+    cmdLine = [sys.executable, Executable] + self.whoopCmdArgs + [self.path]
+    processInstance = subprocess.Popen(cmdLine,
+                                       stdout = subprocess.PIPE,
+                                       stderr = subprocess.PIPE,
+                                       cwd = os.path.dirname(self.path)
+                                      )
+    stdout, stderr = processInstance.communicate()
+    stdout = stdout.decode()
+
+    if processInstance.returncode < 0:
+      logging.error('An external program killed benchmark "' + self.path +
+                    '" with signal ' + str(-1 * processInstance.returncode))
+      return None
+
+    row = parseTimingCSVRow(stdout, self.path)
+    if row == None:
+      logging.error(self.path + ": could not find timing information in the output of Whoop")
+    return row
+
+  def run(self):
+    """ Executes Whoop on this driver the requested number of times.
+    """
+    logging.info("Benchmarking " + self.path)
+    for iteration in range(self.warmup + self.runs):
+      row = self.runOnce()
+      if row == None:
+        self.status = "ERROR"
+        return
+
+      status = row["status"]
+      if self.status != None and self.status != status:
+        logging.warning(self.path + ": status changed between runs (" + self.status + " -> " + status + ")")
+      self.status = status
+
+      if iteration < self.warmup:
+        logging.debug(self.path + ": discarding warm-up run " + str(iteration + 1))
+        continue
+
+      for stage in Stages:
+        self.samples[stage].append(float(row[stage]))
+      logging.debug(self.path + ": run " + str(iteration + 1 - self.warmup) + " took " + row["total"] + " secs")
+
+  def median(self, stage):
+    return median(self.samples[stage]) if self.samples[stage] else 0.0
+
+  def variance(self, stage):
+    return variance(self.samples[stage])
+
+  def hasBeenExecuted(self):
+    return self.status != None
+
+  def __str__(self):
+    benchmarkString = "Benchmark:\nFull Path:{0}\nCmdArgs: {1}\n".format(self.path, self.whoopCmdArgs)
+    if not self.hasBeenExecuted():
+      return benchmarkString + "Benchmark has not yet been executed.\n"
+
+    benchmarkString += "Status: " + self.status + "\n"
+    benchmarkString += "Runs: " + str(len(self.samples["total"])) + "\n"
+    for stage in Stages:
+      if not self.samples[stage]: continue
+      benchmarkString += "{0} : median {1:.3f} secs, stddev {2:.3f} secs\n".format(
+        stage.ljust(max([ len(s) for s in Stages ])), self.median(stage), math.sqrt(self.variance(stage)))
+    return benchmarkString
+
+def isRegression(old, new, stage, threshold, minDelta, sigmas):
+  """ A stage has regressed when its median slowed down by more than the
+      relative threshold, by more than the absolute noise floor, and by
+      more than the requested number of standard errors of the difference.
+  """
+  if not old.samples[stage] or not new.samples[stage]:
+    return False
+
+  oldMedian = old.median(stage)
+  newMedian = new.median(stage)
+  delta = newMedian - oldMedian
+  if delta <= minDelta or delta <= oldMedian * threshold:
+    return False
+
+  stdError = math.sqrt(old.variance(stage) / len(old.samples[stage]) +
+                       new.variance(stage) / len(new.samples[stage]))
+  return delta > sigmas * stdError
+
+def doComparison(oldBenchmarks, oldName, newBenchmarks, newName, args):
+  logging.info("Comparing \"" + newName + "\" against the baseline recorded in \"" + oldName + "\"")
+
+  oldDic = {}
+  newDic = {}
+  for (dictionary, benchmarks) in [ (oldDic, oldBenchmarks), (newDic, newBenchmarks) ]:
+    for benchmark in benchmarks:
+      try:
+        cPath = getCanonicalTestName(benchmark.path, args.canonical_path_prefix)
+      except CanonicalisationError as e:
+        logging.error(e)
+        cPath = benchmark.path
+      dictionary[cPath] = benchmark
+
+  regressions = 0
+  for (cPath, old) in sorted(oldDic.items()):
+    if cPath not in newDic:
+      logging.warning("Benchmark \"" + cPath + "\" present in \"" + oldName + "\" was missing from \"" + newName + "\"")
+      continue
+
+    new = newDic[cPath]
+    if old.status != new.status:
+      logging.warning("Benchmark \"" + cPath + "\" status has changed (" + str(old.status) + " -> " + str(new.status) + ")")
+      # Timings of a run that no longer gets as far are meaningless
+      if old.status == "PASS":
+        regressions += 1
+        continue
+
+    for stage in Stages:
+      if not old.samples[stage] or not new.samples[stage]:
+        continue
+      oldMedian = old.median(stage)
+      newMedian = new.median(stage)
+      change = ((newMedian - oldMedian) / oldMedian * 100.0) if oldMedian > 0 else 0.0
+      line = "{0} [{1}] {2:.3f} -> {3:.3f} secs ({4:+.1f}%)".format(cPath, stage, oldMedian, newMedian, change)
+      if isRegression(old, new, stage, args.threshold / 100.0, args.min_delta, args.sigmas):
+        logging.error("REGRESSION: " + line)
+        regressions += 1
+      else:
+        logging.debug(line)
+
+  for cPath in newDic.keys():
+    if cPath not in oldDic:
+      logging.warning("Benchmark \"" + cPath + "\" was executed in \"" + newName + "\" but was not present in \"" + oldName + "\"")
+
+  logging.info("# of regressed stages: " + str(regressions))
+  return regressions
+
+def summariseBenchmarks(benchmarks, csvFile):
+  """ Prints the median timing of each stage for every benchmark as CSV
+  """
+  print(", ".join(getTimingCSVHeader()), file=csvFile)
+  for benchmark in benchmarks:
+    if not benchmark.hasBeenExecuted(): continue
+    row = [ benchmark.path, benchmark.status ]
+    row += [ '%.3f' % benchmark.median(stage) for stage in Stages ]
+    row += [ '' ] * (len(getTimingCSVHeader()) - len(row))
+    print(','.join(row), file=csvFile)
+  csvFile.flush()
+
+def main(arg):
+  parser = argparse.ArgumentParser(description='Script for benchmarking Whoop on a driver suite and detecting performance regressions.')
+  logging.basicConfig(level=logging.DEBUG, format='%(levelname)s:%(message)s')
+
+  parser.add_argument("directory", help="Directory to search recursively for drivers.")
+  parser.add_argument("--driver-filename-regex", "--driver-regex", type=str, default=r'^driver\.c$', help="Regex for driver file names (default: \"%(default)s\")")
+  parser.add_argument("-l","--log-level",type=str, default="INFO",choices=['DEBUG','INFO','WARNING','ERROR','CRITICAL'])
+  parser.add_argument("-n","--runs", type=int, default=5, help="Number of measured runs per driver (default: %(default)s)")
+  parser.add_argument("--warmup", type=int, default=1, help="Number of unmeasured warm-up runs per driver (default: %(default)s)")
+  parser.add_argument("-j","--threads", type=int, default=1, help="Number of drivers to benchmark in parallel; more than one makes timings noisier (default: %(default)s)")
+  parser.add_argument("--whoopopt=", type=str, default=None, action='append',
+                      help="Pass a command line options to Whoop for all drivers. This option can be specified multiple times.",
+                      metavar='CmdLineOption')
+  parser.add_argument("-w","--write-baseline",type=str, default="", help="Write the measured timings in pickle format to a file")
+  parser.add_argument("-r","--compare-baseline", type=str, default="", help="Compare the measured timings with a baseline recorded in a pickle file")
+  parser.add_argument("-p","--canonical-path-prefix", type=str, default="driversuite", help="When trying to generate canonical path names for drivers, look for this prefix. (default: \"%(default)s\")")
+  parser.add_argument("--threshold", type=float, default=10.0, help="Relative slowdown (in percent) of a stage median that counts as a regression (default: %(default)s)")
+  parser.add_argument("--min-delta", type=float, default=0.5, help="Absolute slowdown (in seconds) below which a stage never counts as regressed (default: %(default)s)")
+  parser.add_argument("--sigmas", type=float, default=2.0, help="Number of standard errors the slowdown has to exceed to count as a regression (default: %(default)s)")
+  parser.add_argument("--csv-file", type=str, default=None, help="Write the median timings to a file in CSV format")
+
+  args = parser.parse_args(arg)
+
+  logging.getLogger().setLevel(level=getattr(logging, args.log_level.upper(), None))
+
+  if args.runs < 1:
+    logging.error("At least one measured run is required.")
+    return BenchmarkerErrorCodes.GENERAL_ERROR
+
+  if args.write_baseline == args.compare_baseline and len(args.write_baseline) > 0:
+    logging.error("Written baseline and compared baseline cannot be the same.")
+    return BenchmarkerErrorCodes.GENERAL_ERROR
+
+  oldBenchmarks = None
+  if len(args.compare_baseline) > 0:
+    oldBenchmarks = openPickle(args.compare_baseline)
+
+  recursionRootPath = os.path.abspath(args.directory)
+  if not os.path.isdir(recursionRootPath):
+    logging.error("\"{}\" does not refer an existing directory".format(recursionRootPath))
+    return BenchmarkerErrorCodes.FILE_SEARCH_ERROR
+
+  driverFiles = []
+  matcher = re.compile(args.driver_filename_regex)
+  for (root, dirs, files) in os.walk(recursionRootPath):
+    for f in files:
+      if matcher.match(f) != None:
+        logging.debug("Found driver:\"{}\"".format(os.path.join(root, f)))
+        driverFiles.append(os.path.join(root, f))
+
+  if len(driverFiles) == 0:
+    logging.error("Could not find any drivers")
+    return BenchmarkerErrorCodes.FILE_SEARCH_ERROR
+
+  driverFiles.sort()
+  logging.info("Found {0} drivers".format(len(driverFiles)))
+  benchmarks = [ Benchmark(path, args.runs, args.warmup, getattr(args, 'whoopopt=')) for path in driverFiles ]
+
+  start = time.time()
+  try:
+    if args.threads > 1:
+      # Drivers are independent, so each one can be measured by its own worker
+      from multiprocessing.pool import ThreadPool
+      pool = ThreadPool(min(args.threads, multiprocessing.cpu_count()))
+      pool.map(Benchmark.run, benchmarks)
+      pool.close()
+    else:
+      for benchmark in benchmarks:
+        benchmark.run()
+  except KeyboardInterrupt:
+    return BenchmarkerErrorCodes.GENERAL_ERROR
+  end = time.time()
+
+  if args.csv_file:
+    with open(args.csv_file, "w") as csvFile:
+      summariseBenchmarks(benchmarks, csvFile)
+  elif logging.getLogger().getEffectiveLevel() != logging.CRITICAL:
+    summariseBenchmarks(benchmarks, sys.stdout)
+
+  if len(args.write_baseline) > 0:
+    logging.info("Writing timings to pickle file \"" + args.write_baseline + "\"")
+    with open(args.write_baseline, "wb") as output:
+      pickle.dump(benchmarks, output, protocol=2, **getPickleOptions())
+
+  if logging.getLogger().getEffectiveLevel() != logging.CRITICAL:
+    print("Time taken to run benchmarks: " + str((end - start)))
+
+  if oldBenchmarks != None:
+    if doComparison(oldBenchmarks, args.compare_baseline, benchmarks, "Newly completed benchmarks", args) > 0:
+      return BenchmarkerErrorCodes.REGRESSION
+
+  return BenchmarkerErrorCodes.SUCCESS
+
+
+if __name__ == "__main__":
+  sys.exit(main(sys.argv[1:]))
@@ -10,6 +10,9 @@ import subprocess
 import pickle
 import time
 import string
+import json
+import shutil
+import tempfile
 try:
   # Python 2.x
   from Queue import Queue
@@ -20,7 +23,9 @@ except ImportError:
 import threading
 import multiprocessing # Only for determining number of CPU cores available
 
-from whoop import ErrorCodes
+from whoop import ErrorCodes, getTimingCSVHeader, ResourceMonitor, psutilPresent
+if psutilPresent:
+  import psutil
 
 Executable = sys.path[0] + os.sep + "whoop.py"
 
@@ -172,6 +177,10 @@ class TestCase(object):
       self.testPassed = None
       self.returnedCode = ""
       self.whoopReturnCode = ""
+      self.timing = None
+      self.peakMemory = None
+      self.killedBySignal = None
+      self.monitor = None
 
       # Finished parsing
       logging.debug("Successfully parsed test \"{0}\" for parameters".format(path))
@@ -190,6 +199,10 @@ class TestCase(object):
         .testPassed : Boolean
         .returnedCode : The return code of the test (includes REGEX_MISMATCH_ERROR)
         .whoopReturnCode : Whoop's actual return code (doesn't include REGEX_MISMATCH_ERROR)
+        .timing : A dictionary mapping each --time-as-csv column (e.g. per tool time,
+                  CPU time and peak RSS) to its value, if timing was requested
+        .peakMemory : The peak resident memory (MB) of Whoop and its tools, if psutil is available
+        .killedBySignal : The signal that killed Whoop, if an external program killed it
     """
     
     threadStr = '[' + threading.currentThread().name + '] '
@@ -204,11 +217,18 @@ class TestCase(object):
                                          stderr = subprocess.PIPE,
                                          cwd = os.path.dirname(self.path)
                                         )
+      # The admission controller reads the memory of the running tests from the monitor
+      self.monitor = ResourceMonitor(processInstance) if psutilPresent else None
       stdout, stderr = processInstance.communicate() # Allow program to run and wait for it to exit.      
     except KeyboardInterrupt:
       logging.error("Received keyboard interrupt. Attempting to kill Whoop process")
       processInstance.kill()
       raise
+    finally:
+      if self.monitor != None:
+        self.monitor.stop()
+        self.peakMemory = self.monitor.peak / (1024.0 * 1024.0)
+        self.monitor = None # We cannot serialise the monitor either
 
     # Handle byte/str issue in python 3.
     stdout = stdout.decode()
@@ -217,9 +237,10 @@ class TestCase(object):
     # Record the true return code of Whoop
     if processInstance.returncode < 0:
       # Treat the test as skipped.
+      self.killedBySignal = -1 * processInstance.returncode
       logging.error(threadStr + 'An external program killed test "'+
                     self.path + '" with signal ' +
-                    str(-1 * processInstance.returncode))
+                    str(self.killedBySignal))
       return
     else:
       self.whoopReturnCode = processInstance.returncode
@@ -260,6 +281,8 @@ class TestCase(object):
                    ("pass" if self.expectedReturnCode == ErrorCodes.SUCCESS else "xfail") + ")")
 
     if self.timeAsCSV:
+      self.timing = parseTimingCSVRow(stdout, self.path)
+
       # Print csv output for user to see
       self.csvFile.write(stdout)
       self.csvFile.flush()
@@ -296,6 +319,10 @@ class TestCase(object):
       testString += "Passed: " + str(self.testPassed) + "\n"
       testString += "Actual result:" + ErrorCodes.errorCodeToString[self.returnedCode] + "\n"
       testString += "Whoop return code:" + ErrorCodes.errorCodeToString[self.whoopReturnCode] + "\n"
+      # Older pickle files do not record timing information
+      if getattr(self, 'timing', None):
+        testString += "Timing: " + ", ".join([ column + "=" + self.timing[column]
+          for column in getTimingCSVHeader()[2:] if self.timing.get(column) ]) + "\n"
       if len(self.regex) > 0:
         testString += "Regular expression matching:\n"
         for (regex,succeeded) in self.regex.items():
@@ -305,6 +332,15 @@ class TestCase(object):
 
     return testString
 
+def parseTimingCSVRow(output, label):
+  """ Finds the row printed by Whoop's --time-as-csv=label in the output
+      and returns a dictionary mapping each column name to its value
+  """
+  for line in reversed(output.split('\n')):
+    if line.startswith(label + ','):
+      return dict(zip(getTimingCSVHeader(), line.strip().split(',')))
+  return None
+
 class TesterError(Exception):
     pass
 
@@ -542,10 +578,136 @@ def summariseTests(tests):
   print('')
   print('#'*printBarWidth)
 
+def getAvailableMemory():
+  """ The memory (MB) that can be used without swapping, or None if it is unknown """
+  if psutilPresent and hasattr(psutil, 'virtual_memory'):
+    return psutil.virtual_memory().available / (1024.0 * 1024.0)
+  try:
+    with open('/proc/meminfo', 'r') as f:
+      for line in f:
+        if line.startswith('MemAvailable:'):
+          return int(line.split()[1]) / 1024.0
+  except IOError:
+    pass
+  return None
+
+class MemoryAdmission(object):
+  """ Only lets a test start when the available memory covers its estimated
+      peak, on top of what the running tests are still expected to grow by.
+      A test's estimate is the largest of its recent peaks in the history file,
+      or the default estimate for tests without history. A test that is killed
+      with SIGKILL, which is what the OOM killer sends, is requeued with twice
+      its estimate, so that it waits for more memory to be free.
+  """
+  OOMSignal = 9
+  HistoryLength = 5
+
+  def __init__(self, historyFile, prefix, defaultEstimate, headroom, retries, interval=0.5):
+    self.historyFile = historyFile
+    self.prefix = prefix
+    self.defaultEstimate = defaultEstimate
+    self.headroom = headroom
+    self.retries = retries
+    self.interval = interval
+    self.history = { }
+    if historyFile and os.path.isfile(historyFile):
+      with open(historyFile, 'r') as f:
+        self.history = json.load(f)
+    self.bumped = { }
+    self.attempts = { }
+    self.requeued = 0
+    self.running = [ ]
+    self.condition = threading.Condition()
+
+    # Used for reporting the concurrency that was achieved
+    self.maxRunning = 0
+    self.runningTime = 0.0
+    self.startTime = time.time()
+    self.lastChange = self.startTime
+
+  def key(self, test):
+    try:
+      return getCanonicalTestName(test.path, self.prefix)
+    except CanonicalisationError:
+      return test.path
+
+  def estimate(self, test):
+    key = self.key(test)
+    if key in self.bumped:
+      return self.bumped[key]
+    if self.history.get(key):
+      return max(self.history[key])
+    return self.defaultEstimate
+
+  def reserved(self):
+    """ The memory the running tests are still expected to take on top of their current usage """
+    total = 0.0
+    for test in self.running:
+      monitor = test.monitor
+      current = monitor.peak / (1024.0 * 1024.0) if monitor != None else 0.0
+      total += max(0.0, self.estimate(test) - current)
+    return total
+
+  def recordConcurrency(self):
+    now = time.time()
+    self.runningTime += len(self.running) * (now - self.lastChange)
+    self.lastChange = now
+
+  def admit(self, test):
+    """ Blocks until there is enough memory to start the test. A test is always
+        started when no other test runs, as waiting cannot free more memory.
+    """
+    with self.condition:
+      while self.running and \
+            self.estimate(test) + self.reserved() + self.headroom > getAvailableMemory():
+        self.condition.wait(self.interval)
+      self.recordConcurrency()
+      self.running.append(test)
+      self.maxRunning = max(self.maxRunning, len(self.running))
+
+  def release(self, test):
+    """ Records the peak of a finished test and returns True if it must be requeued """
+    with self.condition:
+      self.recordConcurrency()
+      self.running.remove(test)
+      self.condition.notify_all()
+
+      key = self.key(test)
+      if test.killedBySignal == MemoryAdmission.OOMSignal:
+        self.bumped[key] = max(2 * self.estimate(test), test.peakMemory or 0.0)
+        attempts = self.attempts.get(key, 0)
+        if attempts >= self.retries:
+          return False
+        self.attempts[key] = attempts + 1
+        self.requeued += 1
+        test.killedBySignal = None
+        logging.warning("Requeuing test \"{0}\", which was probably killed for lack of memory, "
+                        "with an estimate of {1:.0f} MB".format(test.path, self.bumped[key]))
+        return True
+
+      if test.peakMemory:
+        self.bumped.pop(key, None)
+        peaks = self.history.get(key, [ ]) + [ round(test.peakMemory, 1) ]
+        self.history[key] = peaks[-MemoryAdmission.HistoryLength:]
+      return False
+
+  def report(self):
+    self.recordConcurrency()
+    elapsed = self.lastChange - self.startTime
+    average = self.runningTime / elapsed if elapsed > 0 else 0.0
+    logging.info("Ran at most {0} tests at a time, {1:.1f} on average; requeued {2} tests "
+                 "that were killed".format(self.maxRunning, average, self.requeued))
+
+  def save(self):
+    if self.historyFile:
+      with open(self.historyFile, 'w') as f:
+        json.dump(self.history, f, indent=2, sort_keys=True)
+
 class Worker(threading.Thread):
-  def __init__(self, theQueue):
+  def __init__(self, theQueue, admission=None):
     threading.Thread.__init__(self)
     self.theQueue = theQueue
+    self.admission = admission
 
     # We will be abruptly killed in main thread exits
     self.daemon = True
@@ -553,18 +715,28 @@ class Worker(threading.Thread):
   def run(self):
     while True:
       test = self.theQueue.get(block=True, timeout=None)
-      test.run()
+      requeue = False
+      if self.admission != None:
+        self.admission.admit(test)
+      try:
+        test.run()
+      finally:
+        if self.admission != None:
+          requeue = self.admission.release(test)
+      # Requeue before finishing the task, so the queue never looks empty in between
+      if requeue:
+        self.theQueue.put(test)
       # Notify the Queue that we finished our task
       self.theQueue.task_done()
 
 class ThreadPool:
-  def __init__(self, numberOfThreads):
+  def __init__(self, numberOfThreads, admission=None):
     self.theQueue = Queue(0);
 
     # Create the Threads
     self.threads = []
     for tid in range(numberOfThreads):
-      self.threads.append(Worker(self.theQueue))
+      self.threads.append(Worker(self.theQueue, admission))
 
   def addTest(self, test):
     self.theQueue.put(test)
@@ -598,6 +770,74 @@ class ThreadPool:
 
       raise
 
+class ProgressMonitor(threading.Thread):
+  """ Aggregates the --progress files that the running tests append to
+      into a single suite-wide line, which is logged whenever it changes.
+  """
+  StageOrder = [ "translationUnits", "parsing", "instrumentation", "summaries", "entryPoints",
+                 "pairInstrumentation", "houdini", "pairs", "corral" ]
+
+  def __init__(self, tests, interval=5.0):
+    threading.Thread.__init__(self)
+    self.tests = tests
+    self.interval = interval
+    self.startTime = time.time()
+    self.lastLine = None
+    self.stopped = threading.Event()
+
+    # We will be abruptly killed in main thread exits
+    self.daemon = True
+
+  def run(self):
+    while not self.stopped.wait(self.interval):
+      self.report()
+
+  def stop(self):
+    self.stopped.set()
+    self.join()
+
+  def report(self):
+    finished = len([ test for test in self.tests if test.hasBeenExecuted() ])
+    running = [ test for test in self.tests
+                if not test.hasBeenExecuted() and os.path.isfile(test.progressFile) ]
+
+    stages = { }
+    etas = [ ]
+    for test in running:
+      latest = { }
+      with open(test.progressFile, "r") as f:
+        for line in f:
+          try:
+            event = json.loads(line)
+          except ValueError:
+            continue # The line is still being written
+          latest[(event["tool"], event["stage"])] = event
+      for event in latest.values():
+        stage = stages.setdefault(event["stage"], [ 0, 0 ])
+        stage[0] += event["done"]
+        stage[1] += event["total"]
+        if "eta" in event and event["done"] < event["total"]:
+          etas.append(event["eta"])
+
+    # Once tests finish their rate is the best estimate, before that the slowest running stage is
+    eta = None
+    if finished > 0:
+      eta = (time.time() - self.startTime) / finished * (len(self.tests) - finished)
+    elif etas:
+      eta = max(etas)
+
+    names = [ name for name in ProgressMonitor.StageOrder if name in stages ] + \
+            sorted([ name for name in stages if name not in ProgressMonitor.StageOrder ])
+    line = "Progress: {0}/{1} tests done, {2} running".format(finished, len(self.tests), len(running))
+    for name in names:
+      line += " | {0} {1}/{2}".format(name, stages[name][0], stages[name][1])
+    if eta is not None:
+      line += " | ETA {0}s".format(int(eta))
+
+    if line != self.lastLine:
+      logging.info(line)
+      self.lastLine = line
+
 def main(arg):
   parser = argparse.ArgumentParser(description='Script for running Whoop on a provided test suite.')
   logging.basicConfig(level=logging.DEBUG, format='%(levelname)s:%(message)s')
@@ -624,6 +864,12 @@ def main(arg):
   parser.add_argument("--time-as-csv", action="store_true", default=False, help="Print timing of each test as CSV")
   parser.add_argument("--csv-file", type=str, default=None, help="Write timing data to a file (Note: requires --time-as-csv to be enabled)")
   parser.add_argument("--stop-on-fail", action="store_true", default=False, help="Stop on first failure")
+  parser.add_argument("--progress", action="store_true", default=False, help="Periodically log the progress of the running tests and the ETA of the suite")
+  parser.add_argument("--no-memory-admission", action="store_true", default=False, help="Start tests as soon as a thread is free, regardless of the available memory")
+  parser.add_argument("--memory-history", type=str, default=None, help="Estimate the peak memory of each test from the peaks recorded in this file, and record the new peaks to it")
+  parser.add_argument("--test-memory", type=int, default=1024, help="Estimated peak memory (MB) of a test without history (default: %(default)s)")
+  parser.add_argument("--memory-headroom", type=int, default=512, help="Memory (MB) to keep free when starting tests (default: %(default)s)")
+  parser.add_argument("--oom-retries", type=int, default=2, help="Number of times a test killed by the OOM killer is requeued (default: %(default)s)")
 
   # Mutually exclusive test run options
   runGroup = parser.add_mutually_exclusive_group()
@@ -714,14 +960,26 @@ def main(arg):
       if args.stop_on_fail:
         return TesterErrorCodes.PARSE_ERROR
 
+  admission = None
+  if not args.no_memory_admission:
+    if getAvailableMemory() == None:
+      logging.warning("Cannot determine the available memory, tests are started regardless of it")
+    else:
+      admission = MemoryAdmission(args.memory_history, args.canonical_path_prefix, args.test_memory,
+                                  args.memory_headroom, args.oom_retries)
+
   # run tests
-  logging.info("Using " + str(args.threads) + " threads")
-  threadPool = ThreadPool(args.threads)
+  logging.info("Using " + str(args.threads) + " threads" +
+               (" with memory admission control" if admission != None else ""))
+  threadPool = ThreadPool(args.threads, admission)
 
   logging.info("Running tests...")
 
   if args.time_as_csv:
-    print("test, status, clang, smack, whoopengine, whoopdriver, total", file=csvFile)
+    print(", ".join(getTimingCSVHeader()), file=csvFile)
+
+  progressDir = tempfile.mkdtemp(prefix="whoop-progress-") if args.progress else None
+  queuedTests = []
 
   start = time.time()
   for test in tests:
@@ -732,19 +990,35 @@ def main(arg):
     if args.run_only_xfail and test.expectedReturnCode == ErrorCodes.SUCCESS :
       logging.warning("Skipping pass test:{0}".format(test.path))
       continue
-    
+
+    if progressDir != None:
+      test.progressFile = os.path.join(progressDir, str(len(queuedTests)) + ".jsonl")
+      test.whoopCmdArgs.append("--progress=" + test.progressFile)
+
     threadPool.addTest(test)
+    queuedTests.append(test)
     
   # Start tests
+  progressMonitor = ProgressMonitor(queuedTests) if progressDir != None else None
   threadPool.start()
+  if progressMonitor != None:
+    progressMonitor.start()
   try:
     threadPool.waitForCompletion()
   except KeyboardInterrupt:
     sys.exit(TesterErrorCodes.GENERAL_ERROR)
+  finally:
+    if progressMonitor != None:
+      progressMonitor.stop()
+      shutil.rmtree(progressDir, ignore_errors=True)
 
   end = time.time()
   logging.info("Finished running tests.")
 
+  if admission != None:
+    admission.report()
+    admission.save()
+
   if logging.getLogger().getEffectiveLevel() != logging.CRITICAL:
     summariseTests(tests)
 
@@ -0,0 +1,49 @@
+//pass
+//--summary-library=${TEST_DIR}/library --time-passes
+//(?:hit|miss) update\S* \(library key (\w+)\)[\s\S]*(?:hit|miss) update\S* \(library key \1\)
+
+#include <linux/device.h>
+#include <whoop.h>
+
+struct shared {
+	int resource;
+	struct mutex mutex;
+};
+
+static void update(struct shared *tp, int value)
+{
+	mutex_lock(&tp->mutex);
+	tp->resource = value;
+	mutex_unlock(&tp->mutex);
+}
+
+static void entrypoint1(struct test_device *dev)
+{
+	struct shared *tp = testdev_priv(dev);
+
+	update(tp, 1);
+}
+
+static void entrypoint2(struct test_device *dev)
+{
+	struct shared *tp = testdev_priv(dev);
+
+	update(tp, 2);
+}
+
+static int init(struct pci_dev *pdev, const struct pci_device_id *ent)
+{
+	struct shared *tp;
+	struct test_device *dev = alloc_testdev(sizeof(*tp));
+
+	tp = testdev_priv(dev);
+	mutex_init(&tp->mutex);
+
+	return 0;
+}
+
+static struct test_driver test = {
+	.probe = init,
+	.ep1 = entrypoint1,
+	.ep2 = entrypoint2
+};
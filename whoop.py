@@ -7,11 +7,17 @@ import signal
 import subprocess
 import sys
 import threading
+import multiprocessing
 import timeit
 import pprint
 import fnmatch
 import shutil
 import re
+import json
+import time
+import tempfile
+import cProfile
+import pstats
 
 VERSION = '0.7'
 
@@ -21,6 +27,12 @@ try:
 except ImportError:
   psutilPresent = False
 
+try:
+  import resource
+  resourcePresent = True
+except ImportError:
+  resourcePresent = False
+
 """ This class uses exceptions to exit the tool and report
 success or error e.g. related to IO.
 """
@@ -45,6 +57,9 @@ class ReportAndExit(Exception):
 class Timeout(Exception):
     pass
 
+class MemoryLimit(Exception):
+    pass
+
 """ This class implements the error codes related
 to the Whoop toolchain.
 """
@@ -59,6 +74,7 @@ class ErrorCodes(object):
   CORRAL_ERROR = 7
   TIMEOUT = 8
   CTRL_C = 9
+  MEMORY_LIMIT = 10
 
 # Try to import the paths need for the Whoop toolchain
 try:
@@ -102,9 +118,42 @@ cleanUpHandler = BatchCaller()
 
 """ Timing for the toolchain.
 """
-Tools = [ "chauffeur", "clang", "smack", "whoopEngine", "whoopCruncher", "whoopRaceChecker", "corral" ]
+Tools = [ "chauffeur", "clang", "llvm-link", "smack", "whoopEngine", "whoopCruncher", "whoopRaceChecker", "corral" ]
 Timing = { }
 
+""" Resource usage for the toolchain. Maps each tool to its user and
+system CPU time (secs), its peak RSS (MB) and the peak RSS of its
+largest solver child (MB). The Corral runs are also kept per pair.
+"""
+Resources = { }
+PairResources = [ ]
+
+""" Spans of the tool invocations, recorded when --trace is used.
+"""
+TraceEvents = [ ]
+
+""" Guards the timing and resource accounting of the tools that the
+front end runs concurrently.
+"""
+AccountingLock = threading.Lock()
+
+""" Start times of the stages whose progress is reported, from which
+the time they still need is estimated.
+"""
+ProgressStarts = { }
+
+""" The stages that --profile can profile: whoop.py itself, under
+cProfile, and the mono executables, under the mono sampling profiler.
+The number of profiled runs of each stage names its profile files.
+"""
+ProfileStages = [ "whoop", "whoopEngine", "whoopCruncher", "whoopRaceChecker", "corral" ]
+ProfileRuns = { }
+
+def getTimingCSVHeader():
+  """ The columns of the row printed by --time-as-csv """
+  return [ "test", "status" ] + Tools + [ "total" ] + \
+         [ tool + "-cpu" for tool in Tools ] + [ tool + "-rss" for tool in Tools ]
+
 """ WindowsError is not defined on UNIX
 systems, this works around that.
 """
@@ -149,18 +198,30 @@ class DefaultCmdLineOptions(object):
     self.whoopRaceCheckerOptions = [ "/nologo", "/typeEncoding:m", "/mv:-", "/doNotUseLabels", "/enhancedErrorMessages:1" ]
     self.corralOptions = [ ]
     self.includes = []
+    self.quoteIncludes = []
     self.defines = clangCoreDefines
     self.analyseOnly = ""
     self.onlyRaces = False
     self.onlyDeadlocks = False
     self.findBugs = False
     self.skipNonRacyPairs = False
+    self.stopAtFirstRace = False
     self.noInfer = False
+    self.summaryLibrary = None
+    self.boundedMemory = False
+    self.packPrograms = False
+    self.noPairDischarging = False
+    self.noProgramPruning = False
+    self.noPairDeduplication = False
+    self.bitVectorLocksets = False
     self.inline = False
     self.inlineBound = 0
+    self.inlineCost = 0
     self.k = 2
     self.recursionBound = 1
     self.staticLoopBound = 0
+    self.adaptiveBounds = False
+    self.corralBudget = 0
     self.yieldNoAccess = False
     self.yieldAll = False
     self.yieldCoarse = False
@@ -176,13 +237,25 @@ class DefaultCmdLineOptions(object):
     self.printPairs = False
     self.generateSmt2 = False
     self.keepTemps = False
+    self.scratchDir = None
+    self.scratchInMemory = False
+    self.scratchWorkspace = None
+    self.aot = False
+    self.frontEndJobs = 0
     self.debugging = False
     self.time = False
     self.timeCSVLabel = None
     self.timePasses = None
+    self.traceFile = None
+    self.progressFile = None
+    self.profileStages = [ ]
+    self.profileDir = None
+    self.profileHotspots = 25
     self.componentTimeout = 0
+    self.memoryLimits = { }
     self.solver = "z3"
     self.logic = "AUFLIRA"
+    self.portfolio = [ ]
     self.stopAtRe = False
     self.stopAtBc = False
     self.stopAtBpl = False
@@ -220,10 +293,14 @@ def showHelpAndExit():
     -I <value>              Add directory to include search path.
     -D <value>              Define symbol.
     --find-bugs             Runs Corral after race checking the program to find bugs.
+    --stop-at-first-race    Stop as soon as a race is reported: after the first racy pair of the race
+                            checker, or with --find-bugs after the first race confirmed by Corral.
     --timeout=X             Allow each tool in the toolchain to run for X seconds before giving up.
                             A timeout of 0 disables the timeout. The default is {componentTimeout} seconds.
     --verbose               Show commands to run and use verbose output.
-    --time                  Show timing information.
+    --time                  Show timing and resource usage information.
+    --memory-limit=[T:]X    Stop with a MEMORY_LIMIT error when the processes of a tool use more than X MB.
+                            T restricts the limit to one tool (e.g. whoopCruncher:4096); requires psutil.
     -V, --version           Show version information.
 
   ADVANCED OPTIONS:
@@ -231,19 +308,58 @@ def showHelpAndExit():
     --inline                Inline all device driver non-entry point functions during Clang's AST traversal.
     --inline-bound=X        Inline all device driver non-entry point functions during the Whoop instrumentation,
                             for entry points with less or equal than X nested function calls.
+    --inline-cost=X         Inline the non-entry point functions whose cost is at most X, and infer
+                            summaries for the others. The cost of a function is its number of commands,
+                            blocks and loops times its number of call sites, halved if it accesses
+                            shared memory. The decisions are printed with --time-passes.
     --k=X                   Use Corral's /k.
     --recursion-bound=X     Use Corral's /recursionBound.
     --static-loop-bound=X   Use Corral's /maxStaticLoopBound.
+    --adaptive-bounds       Start Corral on every pair with the smallest bounds and deepen them, up to
+                            --k, --recursion-bound and --static-loop-bound, while no race is found.
+                            Pairs with more unprotected resources are checked first.
+    --corral-budget=X       Stop deepening the Corral bounds once Corral has run for X seconds in
+                            total (requires --adaptive-bounds).
     --inparam-aliasing      Disable assumption that inparams cannot alias.
     --no-existential-opts   Do not perform existential optimisations.
-    --analyse-only=X        Specify entry point to be analysed. All others are skipped.
+    --analyse-only=X,Y,...  Only analyse the entry point pairs that contain one of the given entry points,
+                            or that are one of the given pairs, written as 'ep1:ep2'. Names can contain
+                            the '*' and '?' wildcards. The entry points that no selected pair needs are
+                            skipped by every stage. Can be given more than once.
     --no-infer              Turn off invariant inference.
+    --summary-library=X     Reuse the summaries inferred for helper functions by earlier runs,
+                            on this or other drivers, from directory X, and store new ones there.
+    --bounded-memory        Take each entry point, and each pair, through the engine and the race
+                            checker on its own and release it before the next one. This lowers
+                            the peak memory on drivers with many entry points, at the cost of
+                            parsing each entry point one more time.
+    --pack-programs         Hand the intermediate programs between the Whoop executables as packed
+                            .wbpl files, which list their declarations by hash and share one
+                            compressed table of declarations, instead of as Boogie text.
+    --no-program-pruning    Keep the procedures, globals and axioms that no entry point can reach
+                            in the program that SMACK emits.
+    --no-pair-discharging   Race check every pair, including pairs without conflicting accesses.
+    --no-pair-deduplication Race check every pair, including pairs that are equivalent to an
+                            already checked pair up to the names of their entry points.
     --skip-non-racy-pairs   Skip race free pairs from Corral analysis.
+    --bitvector-locksets    Encode the locksets of each pair checker as bit-vectors, with one
+                            bit per lock, instead of one boolean per lock.
     --yield-all             Instruments yields in all visible operations.
     --yield-coarse          Instruments yields in a coarse granularity manner.
     --yield-no-access       Turn off yield instrumentation in memory accesses.
     --yield-race-check      Instruments race checking in yielded memory accesses.
     --time-passes           Show timing information for the various analysis and instrumentation passes.
+    --trace=X               Write a Chrome trace (JSON) timeline of the tool invocations and of the
+                            Whoop phases, passes, Houdini and VCGen calls to file X.
+    --progress=X            Append how many translation units, entry points, Houdini runs, pairs and
+                            Corral checks are done, with an estimate of the remaining time of each
+                            stage, to file X as JSON lines while the toolchain runs.
+    --profile=X,Y,...       Profile the given stages, which are 'whoop' (this script, under cProfile)
+                            and 'whoopEngine', 'whoopCruncher', 'whoopRaceChecker' and 'corral'
+                            (under the mono sampling profiler). The profiles, and a summary of the
+                            hottest methods of each stage, are written to <driver>.profile/. When
+                            a previous summary exists it is kept, with a diff against the new one.
+    --profile-hotspots=X    Summarise the X hottest methods of each profiled stage (default: 25).
     --other-model           Uses an alternative environmental model.
 
   SOLVER OPTIONS:
@@ -251,7 +367,11 @@ def showHelpAndExit():
     --solver=X              Choose which SMT Theorem Prover to use in the backend.
                             Available options: 'Z3' or 'cvc4' (default is '{solver}').
     --logic=X               Define the logic to be used by the CVC4 SMT solver backend
-                            (default is {logic}).
+                            (default is {logic}, or ALL_SUPPORTED with --bitvector-locksets).
+    --portfolio=X,Y,...     Race the given backends on every pair and entry point summary,
+                            keeping the first definitive answer. A backend is 'z3' or 'cvc4',
+                            optionally followed by '+' separated prover options, e.g.
+                            'z3,cvc4,z3+O:smt.random_seed=1'.
   TOOL OPTIONS:
     --clang-opt=...         Specify option to be passed to Clang.
     --smack-opt=...         Specify option to be passed to SMACK.
@@ -259,7 +379,14 @@ def showHelpAndExit():
     --whoop-file=X.bpl      Specify a supporting .bpl file to be used during verification.
     --debug                 Enable debugging of verify components: exceptions will
                             not be suppressed.
-    --keep-temps            Keep intermediate bc and bpl.
+    --keep-temps            Keep intermediate bc and bpl next to the input.
+    --scratch-dir=X         Create the private directory that holds the intermediate files of
+                            a run inside X (default is the system temporary directory).
+    --scratch-in-memory     Create the private directory for intermediate files in /dev/shm.
+    --frontend-jobs=X       Run chauffeur and clang on at most X of the translation units of a
+                            driver at a time (default is the number of cores).
+    --aot                   Run the Whoop and Corral assemblies from images compiled ahead of time
+                            by mono, compiling the missing or out of date images first.
     --stop-at-re            Stop after generating the refactored driver source code.
     --stop-at-bc            Stop after generating bc.
     --stop-at-bpl           Stop after generating bpl.
@@ -306,6 +433,9 @@ def getSourceFiles(args):
     else:
       raise ReportAndExit(ErrorCodes.COMMAND_LINE_ERROR, "'" + a + "' has unknown file extension, the supported file extension is .c")
     CommandLineOptions.sourceFiles.append(a)
+  if len(CommandLineOptions.sourceFiles) > 1 and \
+     any(splitFilenameExt(a)[1] != ".c" for a in CommandLineOptions.sourceFiles):
+    raise ReportAndExit(ErrorCodes.COMMAND_LINE_ERROR, "only the .c files of a driver can be supplied together")
 
 def showHelpIfRequested(opts):
   for o, a in opts:
@@ -335,7 +465,7 @@ def processGeneralOptions(opts, args):
     if o == "--debug":
       CommandLineOptions.debugging = True
     if o == "--analyse-only":
-      CommandLineOptions.analyseOnly += str(a)
+      CommandLineOptions.analyseOnly = ",".join([ s for s in [ CommandLineOptions.analyseOnly, str(a) ] if s ])
     if o == "--only-race-checking":
       CommandLineOptions.onlyRaces = True
     if o == "--only-deadlock-checking":
@@ -344,8 +474,18 @@ def processGeneralOptions(opts, args):
       CommandLineOptions.findBugs = True
     if o == "--skip-non-racy-pairs":
       CommandLineOptions.skipNonRacyPairs = True
+    if o == "--stop-at-first-race":
+      CommandLineOptions.stopAtFirstRace = True
     if o == "--no-infer":
       CommandLineOptions.noInfer = True
+    if o == "--no-pair-discharging":
+      CommandLineOptions.noPairDischarging = True
+    if o == "--no-program-pruning":
+      CommandLineOptions.noProgramPruning = True
+    if o == "--no-pair-deduplication":
+      CommandLineOptions.noPairDeduplication = True
+    if o == "--bitvector-locksets":
+      CommandLineOptions.bitVectorLocksets = True
     if o == "--yield-all":
       CommandLineOptions.yieldAll = True
     if o == "--yield-coarse":
@@ -354,6 +494,8 @@ def processGeneralOptions(opts, args):
       CommandLineOptions.yieldNoAccess = True
     if o == "--yield-race-check":
       CommandLineOptions.yieldRaceChecking = True
+    if o == "--adaptive-bounds":
+      CommandLineOptions.adaptiveBounds = True
     if o == "--optimize-corral":
       CommandLineOptions.optimizeCorral = True
     if o == "--show-corral-stats":
@@ -368,6 +510,8 @@ def processGeneralOptions(opts, args):
       CommandLineOptions.useOtherModel = True
     if o == "--keep-temps":
       CommandLineOptions.keepTemps = True
+    if o == "--scratch-in-memory":
+      CommandLineOptions.scratchInMemory = True
     if o == "--inline":
       CommandLineOptions.inline = True
     if o == "--time":
@@ -377,6 +521,10 @@ def processGeneralOptions(opts, args):
       CommandLineOptions.timeCSVLabel = a
     if o == "--time-passes":
       CommandLineOptions.timePasses = True
+    if o == "--trace":
+      CommandLineOptions.traceFile = a
+    if o == "--progress":
+      CommandLineOptions.progressFile = os.path.abspath(a)
     if o == "--clang-opt":
       CommandLineOptions.clangOptions += str(a).split(" ")
     if o == "--smack-opt":
@@ -437,6 +585,42 @@ def processGeneralOptions(opts, args):
           raise ValueError
       except ValueError as e:
           raise ReportAndExit(ErrorCodes.COMMAND_LINE_ERROR, "Invalid timeout \"" + a + "\"")
+    if o == "--aot":
+      CommandLineOptions.aot = True
+    if o == "--frontend-jobs":
+      try:
+        CommandLineOptions.frontEndJobs = int(a)
+        if CommandLineOptions.frontEndJobs < 1:
+          raise ValueError
+      except ValueError as e:
+          raise ReportAndExit(ErrorCodes.COMMAND_LINE_ERROR, "Invalid number of front end jobs \"" + a + "\"")
+    if o == "--profile":
+      stages = [ s for s in a.split(',') if s ]
+      for stage in stages:
+        if stage not in ProfileStages:
+          raise ReportAndExit(ErrorCodes.COMMAND_LINE_ERROR, "Unknown profile stage \"" + stage + "\", the stages are " + ", ".join(ProfileStages))
+      if not stages:
+        raise ReportAndExit(ErrorCodes.COMMAND_LINE_ERROR, "argument to --profile must be a list of stages")
+      if os.name != "posix" and any(s != "whoop" for s in stages):
+        showWarning("the mono stages can only be profiled when they run under mono")
+      CommandLineOptions.profileStages = stages
+    if o == "--profile-hotspots":
+      try:
+        CommandLineOptions.profileHotspots = int(a)
+        if CommandLineOptions.profileHotspots < 1:
+          raise ValueError
+      except ValueError as e:
+          raise ReportAndExit(ErrorCodes.COMMAND_LINE_ERROR, "Invalid number of hotspots \"" + a + "\"")
+    if o == "--scratch-dir":
+      if not os.path.isdir(a):
+        raise ReportAndExit(ErrorCodes.COMMAND_LINE_ERROR, "Scratch directory \"" + a + "\" does not exist")
+      CommandLineOptions.scratchDir = a
+    if o == "--summary-library":
+      CommandLineOptions.summaryLibrary = os.path.abspath(a)
+    if o == "--bounded-memory":
+      CommandLineOptions.boundedMemory = True
+    if o == "--pack-programs":
+      CommandLineOptions.packPrograms = True
     if o == "--boogie-file":
       filename, ext = splitFilenameExt(a)
       if ext != ".bpl":
@@ -449,6 +633,11 @@ def processGeneralOptions(opts, args):
         CommandLineOptions.solver = a.lower()
       else:
         raise ReportAndExit(ErrorCodes.COMMAND_LINE_ERROR, "argument to --solver must be 'Z3' or 'CVC4'")
+    if o == "--portfolio":
+      backends = a.split(',')
+      if len(backends) < 2 or any(b.split('+')[0].lower() not in ("z3","cvc4") for b in backends):
+        raise ReportAndExit(ErrorCodes.COMMAND_LINE_ERROR, "argument to --portfolio must be a list of at least two 'Z3' or 'CVC4' backends")
+      CommandLineOptions.portfolio = [ b.split('+')[0].lower() + b[len(b.split('+')[0]):] for b in backends ]
     if o == "--logic":
       if a.upper() in ("ALL_SUPPORTED","QF_ALL_SUPPORTED","AUFLIRA"):
         CommandLineOptions.logic = a.upper()
@@ -461,6 +650,13 @@ def processGeneralOptions(opts, args):
           raise ValueError
       except ValueError as e:
           raise ReportAndExit(ErrorCodes.COMMAND_LINE_ERROR, "Invalid inlining bound \"" + a + "\"")
+    if o == "--inline-cost":
+      try:
+        CommandLineOptions.inlineCost = int(a)
+        if CommandLineOptions.inlineCost < 0:
+          raise ValueError
+      except ValueError as e:
+          raise ReportAndExit(ErrorCodes.COMMAND_LINE_ERROR, "Invalid inlining cost \"" + a + "\"")
     if o == "--k":
       try:
         CommandLineOptions.k = int(a)
@@ -475,6 +671,18 @@ def processGeneralOptions(opts, args):
           raise ValueError
       except ValueError as e:
           raise ReportAndExit(ErrorCodes.COMMAND_LINE_ERROR, "Invalid recursion bound \"" + a + "\"")
+    if o == "--memory-limit":
+      if not psutilPresent:
+        raise ReportAndExit(ErrorCodes.CONFIGURATION_ERROR, "--memory-limit requires the psutil module")
+      tool, limit = a.rsplit(':', 1) if ':' in a else (None, a)
+      if tool is not None and tool not in Tools:
+        raise ReportAndExit(ErrorCodes.COMMAND_LINE_ERROR, "Unknown tool \"" + tool + "\" in memory limit")
+      try:
+        CommandLineOptions.memoryLimits[tool] = int(limit)
+        if CommandLineOptions.memoryLimits[tool] <= 0:
+          raise ValueError
+      except ValueError as e:
+          raise ReportAndExit(ErrorCodes.COMMAND_LINE_ERROR, "Invalid memory limit \"" + a + "\"")
     if o == "--static-loop-bound":
       try:
         CommandLineOptions.staticLoopBound = int(a)
@@ -482,6 +690,52 @@ def processGeneralOptions(opts, args):
           raise ValueError
       except ValueError as e:
           raise ReportAndExit(ErrorCodes.COMMAND_LINE_ERROR, "Invalid static loop bound \"" + a + "\"")
+    if o == "--corral-budget":
+      try:
+        CommandLineOptions.corralBudget = int(a)
+        if CommandLineOptions.corralBudget < 0:
+          raise ValueError
+      except ValueError as e:
+          raise ReportAndExit(ErrorCodes.COMMAND_LINE_ERROR, "Invalid Corral budget \"" + a + "\"")
+
+  # the bit-vector locksets cannot be expressed in AUFLIRA, so CVC4 needs a logic with bit-vectors
+  usesCVC4 = CommandLineOptions.solver == "cvc4" or \
+             "cvc4" in [ b.split('+')[0] for b in CommandLineOptions.portfolio ]
+  if CommandLineOptions.bitVectorLocksets and usesCVC4 and CommandLineOptions.logic == "AUFLIRA":
+    if "--logic" in [ o for o, a in opts ]:
+      raise ReportAndExit(ErrorCodes.COMMAND_LINE_ERROR, "--bitvector-locksets cannot be used with " + \
+                          "--logic=AUFLIRA, use 'ALL_SUPPORTED' or 'QF_ALL_SUPPORTED' instead")
+    CommandLineOptions.logic = "ALL_SUPPORTED"
+
+""" Returns the descendants of a psutil process. The method
+was renamed in psutil 2.0.
+"""
+def getChildProcesses(process):
+  if hasattr(process, 'children'):
+    return process.children(recursive=True)
+  return process.get_children(True)
+
+def getResidentMemory(process):
+  if hasattr(process, 'memory_info'):
+    return process.memory_info().rss
+  return process.get_memory_info().rss
+
+def getCpuTimes(process):
+  if hasattr(process, 'cpu_times'):
+    return process.cpu_times()
+  return process.get_cpu_times()
+
+def killProcessTree(popenObject):
+  if psutilPresent:
+    try:
+      children = getChildProcesses(psutil.Process(popenObject.pid))
+    except psutil.Error:
+      children = [ ]
+  popenObject.terminate()
+  if psutilPresent:
+    for child in children:
+      try: child.terminate()
+      except psutil.Error: pass
 
 """ This class is used by run() to implement a timeout for tools. It
 uses threading.Timer to implement the timeout and provides a method
@@ -493,12 +747,7 @@ class ToolWatcher(object):
     if self.popenObject.poll() == None :
       # Program is still running, let's kill it
       self.__killed=True
-      if psutilPresent:
-        children = psutil.Process(self.popenObject.pid).get_children(True)
-      self.popenObject.terminate()
-      if psutilPresent:
-        for child in children:
-          child.terminate()
+      killProcessTree(self.popenObject)
 
   def __init__(self,popenObject,timeout):
     self.timeout = timeout
@@ -513,10 +762,74 @@ class ToolWatcher(object):
   def cancelTimeout(self):
     self.timer.cancel()
 
+""" This class is used by run() to sample the resident memory of a
+tool and of its child processes (e.g. the SMT solvers) using psutil.
+It keeps the peak of the whole process tree and of the largest solver,
+and kills the tool if the tree exceeds the optional memory limit (MB).
+"""
+class ResourceMonitor(object):
+  SolverNames = ( "z3", "cvc4" )
+
+  def __sample(self):
+    while not self.__stopped.wait(self.interval):
+      try:
+        process = psutil.Process(self.popenObject.pid)
+        processes = [ process ] + getChildProcesses(process)
+      except psutil.Error:
+        return
+      total = 0
+      user, system = 0.0, 0.0
+      for p in processes:
+        try:
+          rss = getResidentMemory(p)
+          name = p.name() if callable(p.name) else p.name
+          times = getCpuTimes(p)
+        except psutil.Error:
+          continue
+        total += rss
+        # the children times only cover children that have exited, the
+        # live ones are sampled on their own
+        user += times.user + getattr(times, 'children_user', 0.0)
+        system += times.system + getattr(times, 'children_system', 0.0)
+        if name.lower().startswith(self.SolverNames):
+          self.solverPeak = max(self.solverPeak, rss)
+      self.peak = max(self.peak, total)
+      self.user = max(self.user, user)
+      self.system = max(self.system, system)
+      if self.limit > 0 and total > self.limit * 1024 * 1024:
+        self.__exceeded = True
+        killProcessTree(self.popenObject)
+        return
+
+  def __init__(self, popenObject, limit=0, interval=0.1):
+    self.popenObject = popenObject
+    self.limit = limit
+    self.interval = interval
+    self.peak = 0
+    self.solverPeak = 0
+    self.user = 0.0
+    self.system = 0.0
+    self.__exceeded = False
+    self.__stopped = threading.Event()
+    self.thread = threading.Thread(target=self.__sample)
+    self.thread.daemon = True
+    self.thread.start()
+
+  def limitExceeded(self):
+    return self.__exceeded
+
+  def stop(self):
+    self.__stopped.set()
+    self.thread.join()
+
 """ Run a command with an optional timeout. A timeout
-of zero implies no timeout.
+of zero implies no timeout. A non-zero memory limit (MB) kills
+the command once its process tree grows beyond the limit. If a
+line handler is given, the output is read as it is printed and
+every line is passed to the handler.
+Returns the output, the return code and the resource monitor.
 """
-def run(command, timeout=0):
+def run(command, timeout=0, memoryLimit=0, lineHandler=None):
   popenargs = { }
   if CommandLineOptions.verbose:
     print(" ".join(command))
@@ -526,6 +839,10 @@ def run(command, timeout=0):
       popenargs['stdout'] = subprocess.PIPE
   if CommandLineOptions.silent:
     popenargs['stdout'] = subprocess.PIPE
+  captureOutput = 'stdout' in popenargs
+  if lineHandler != None:
+    popenargs['stdout'] = subprocess.PIPE
+    popenargs['bufsize'] = 1
   popenargs['stderr'] = subprocess.STDOUT
   popenargs['stdin'] = subprocess.PIPE
 
@@ -537,35 +854,126 @@ def run(command, timeout=0):
   proc = subprocess.Popen(command, **popenargs)
   if timeout > 0:
     killer = ToolWatcher(proc,timeout)
+  monitor = None
+  if psutilPresent and (CommandLineOptions.time or memoryLimit > 0):
+    monitor = ResourceMonitor(proc, memoryLimit)
   try:
-    stdout, stderr = proc.communicate()
+    if lineHandler != None:
+      stdout = streamOutput(proc, lineHandler, captureOutput)
+    else:
+      stdout, stderr = proc.communicate()
+    if monitor != None:
+      monitor.stop()
     if killer != None and killer.timeOutOccured():
       raise Timeout
+    if monitor != None and monitor.limitExceeded():
+      raise MemoryLimit
   except KeyboardInterrupt:
     cleanupKiller()
     proc.wait()
     raise ReportAndExit(ErrorCodes.CTRL_C)
   finally:
     cleanupKiller()
+    if monitor != None:
+      monitor.stop()
+
+  return stdout, proc.returncode, monitor
+
+def streamOutput(proc, lineHandler, captureOutput):
+  """ Reads the output of a running command line by line, echoing it
+  unless it is captured, and passes every line to the handler """
+  proc.stdin.close()
+  lines = [ ]
+  for line in iter(proc.stdout.readline, b''):
+    if captureOutput:
+      lines.append(line)
+    else:
+      sys.stdout.write(line)
+      sys.stdout.flush()
+    lineHandler(line)
+  proc.stdout.close()
+  proc.wait()
+  return "".join(lines) if captureOutput else None
+
+""" This class is used as the line handler of run() to recognise the
+bugs reported by Corral while they are being printed. Corral prints
+the error trace before its verdict, so the run is left to finish.
+"""
+class CorralReportParser(object):
+  BugPattern = re.compile(r'Program has a potential bug: True bug')
 
-  return stdout, proc.returncode
+  def __init__(self):
+    self.races = 0
+
+  def __call__(self, line):
+    if self.BugPattern.search(line):
+      self.races += 1
+
+""" Accounts the resources used by a tool run. CPU times come from
+getrusage(RUSAGE_CHILDREN), which covers the tool and every process
+it waited for; peak RSS comes from the resource monitor if psutil is
+available. Otherwise ru_maxrss is used, which only tells us the peak
+when this run raised the maximum seen over all children so far.
+getrusage cannot tell apart the children of runs that overlap, so
+for those usageBefore is None and the CPU times are the last ones the
+resource monitor sampled, or are not accounted without psutil.
+"""
+def recordResources(ToolName, usageBefore, monitor, pairFile=None):
+  user, system, peak, solverPeak = 0.0, 0.0, None, None
+  if usageBefore is not None:
+    usageAfter = resource.getrusage(resource.RUSAGE_CHILDREN)
+    user = usageAfter.ru_utime - usageBefore.ru_utime
+    system = usageAfter.ru_stime - usageBefore.ru_stime
+    if usageAfter.ru_maxrss > usageBefore.ru_maxrss:
+      # ru_maxrss is in KB on Linux and in bytes on OS X
+      peak = usageAfter.ru_maxrss / (1024.0 * 1024.0 if sys.platform == 'darwin' else 1024.0)
+  if monitor != None and monitor.peak > 0:
+    peak = monitor.peak / (1024.0 * 1024.0)
+    solverPeak = monitor.solverPeak / (1024.0 * 1024.0)
+    if usageBefore is None:
+      user, system = monitor.user, monitor.system
+
+  usage = Resources.setdefault(ToolName, { "user": 0.0, "sys": 0.0, "rss": None, "solverRss": None })
+  usage["user"] += user
+  usage["sys"] += system
+  if peak is not None and (usage["rss"] is None or peak > usage["rss"]):
+    usage["rss"] = peak
+  if solverPeak is not None and (usage["solverRss"] is None or solverPeak > usage["solverRss"]):
+    usage["solverRss"] = solverPeak
+  if pairFile is not None:
+    PairResources.append((pairFile, user, system, peak, solverPeak))
 
 """ Run a tool. If the timeout is set to 0 then there will be no
-timeout.
+timeout. Runs that are concurrent with other runs of the toolchain
+are accounted from the resource monitor alone.
 """
-def runTool(ToolName, Command, ErrorCode, timeout=0):
+def runTool(ToolName, Command, ErrorCode, timeout=0, traceArgs=None, lineHandler=None, concurrent=False):
   assert ToolName in Tools
+  Command = profileCommand(ToolName, Command)
   verbose("Running " + ToolName)
   remainingTime = timeout
+  memoryLimit = CommandLineOptions.memoryLimits.get(ToolName, CommandLineOptions.memoryLimits.get(None, 0))
+  usageBefore = resource.getrusage(resource.RUSAGE_CHILDREN) if resourcePresent and not concurrent else None
+  wallStart = time.time()
   try:
     start = timeit.default_timer()
     if timeout > 0 and Timing.has_key(ToolName):
       remainingTime = timeout - int(Timing[ToolName])
       if remainingTime < 1:
         remainingTime = 1
-    stdout, returnCode = run(Command, remainingTime)
+    stdout, returnCode, monitor = run(Command, remainingTime, memoryLimit, lineHandler)
     end = timeit.default_timer()
+  except MemoryLimit:
+    recordTraceEvent(ToolName, wallStart, time.time() - wallStart, "MEMORY_LIMIT", traceArgs)
+    if CommandLineOptions.time:
+      Timing[ToolName] = Timing.get(ToolName, 0.0) + time.time() - wallStart
+      recordResources(ToolName, usageBefore, None)
+    raise ReportAndExit(ErrorCodes.MEMORY_LIMIT, ToolName + " exceeded the memory " + \
+                        "limit of " + str(memoryLimit) + " MB. Use "         + \
+                        "--memory-limit=" + ToolName + ":N with N > "       + \
+                        str(memoryLimit) + " to increase the limit.")
   except Timeout:
+    recordTraceEvent(ToolName, wallStart, time.time() - wallStart, "TIMEOUT", traceArgs)
     if CommandLineOptions.time:
       if Timing.has_key(ToolName):
         Timing[ToolName] = Timing[ToolName] + remainingTime
@@ -579,32 +987,279 @@ def runTool(ToolName, Command, ErrorCode, timeout=0):
     raise ReportAndExit(ErrorCode, "While invoking " + ToolName       + \
                         ": " + str(e) + "\nWith command line args:\n" + \
                         pprint.pformat(Command))
+  recordTraceEvent(ToolName, wallStart, end - start, returnCode, traceArgs)
   if CommandLineOptions.time:
-    if Timing.has_key(ToolName):
-      Timing[ToolName] = Timing[ToolName] + end-start
-    else:
-      Timing[ToolName] = end-start
+    with AccountingLock:
+      if Timing.has_key(ToolName):
+        Timing[ToolName] = Timing[ToolName] + end-start
+      else:
+        Timing[ToolName] = end-start
+      recordResources(ToolName, usageBefore, monitor, traceArgs["file"] if ToolName == "corral" else None)
   if returnCode != ErrorCodes.SUCCESS:
     if not (CommandLineOptions.findBugs and ToolName == "whoopRaceChecker"):
       if CommandLineOptions.silent and stdout: print(stdout, file=sys.stderr)
       raise ReportAndExit(ErrorCode, stdout)
 
+def recordTraceEvent(ToolName, start, duration, returnCode, traceArgs=None):
+  if CommandLineOptions.traceFile is None:
+    return
+  args = { "returnCode": returnCode }
+  if traceArgs: args.update(traceArgs)
+  TraceEvents.append({ "name": ToolName, "cat": "tool", "ph": "X", "pid": 0, "tid": 0,
+                       "ts": int(start * 1000000), "dur": int(duration * 1000000), "args": args })
+
+def reportProgress(stage, done, total):
+  """ Appends how much of a stage is done to the --progress file,
+  which the Whoop executables append their own stages to """
+  if CommandLineOptions.progressFile is None:
+    return
+  now = time.time()
+  with AccountingLock:
+    start = ProgressStarts.setdefault(stage, now)
+    event = { "ts": round(now, 3), "tool": "whoop", "stage": stage, "done": done, "total": total }
+    if done > 0:
+      event["eta"] = round((now - start) / done * (total - done), 3)
+    with open(CommandLineOptions.progressFile, "a") as f:
+      f.write(json.dumps(event) + "\n")
+
+def writeTrace(traceFile, timelines):
+  """ Merges the timelines written by the Whoop executables with the
+  tool invocation spans and writes them as a single Chrome trace """
+  events = [ { "name": "process_name", "ph": "M", "pid": 0, "tid": 0, "args": { "name": "toolchain" } } ]
+  events += TraceEvents
+  for tool, timeline in timelines:
+    if not os.path.isfile(timeline):
+      continue
+    try:
+      with open(timeline, "r") as f:
+        toolEvents = json.load(f)
+    except ValueError:
+      showWarning("ignoring malformed timeline '" + timeline + "'")
+      continue
+    finally:
+      if not CommandLineOptions.keepTemps:
+        os.remove(timeline)
+    pid = Tools.index(tool) + 1
+    events.append({ "name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": { "name": tool } })
+    for event in toolEvents:
+      event["pid"] = pid
+      events.append(event)
+  with open(traceFile, "w") as f:
+    json.dump({ "traceEvents": events, "displayTimeUnit": "ms" }, f)
+
+def profileCommand(ToolName, Command):
+  """ Runs a mono stage selected by --profile under the mono sampling
+  profiler, which writes one profile per run of the stage """
+  if ToolName not in CommandLineOptions.profileStages or Command[0] != "mono":
+    return Command
+  with AccountingLock:
+    ProfileRuns[ToolName] = ProfileRuns.get(ToolName, 0) + 1
+    run = ProfileRuns[ToolName]
+  profile = os.path.join(CommandLineOptions.profileDir, ToolName + "." + str(run) + ".mlpd")
+  return [ Command[0], "--profile=log:sample,output=" + profile ] + Command[1:]
+
+def startProfiling(profileDir):
+  """ Creates the --profile directory, dropping the profiles of a
+  previous run but keeping its summaries to diff against """
+  try:
+    if not os.path.isdir(profileDir):
+      os.makedirs(profileDir)
+  except OSError as e:
+    raise ReportAndExit(ErrorCodes.CONFIGURATION_ERROR, "Cannot create profile directory \"" + profileDir + "\": " + str(e))
+  for file in os.listdir(profileDir):
+    if file.endswith(".mlpd") or file.endswith(".prof"):
+      os.remove(os.path.join(profileDir, file))
+  if "whoop" not in CommandLineOptions.profileStages:
+    return None
+  profiler = cProfile.Profile()
+  profiler.enable()
+  return profiler
+
+def monoHotspots(profiles):
+  """ Adds up the samples that mprof-report attributes to each method
+  over the runs of a stage """
+  hotspots = { }
+  for profile in profiles:
+    try:
+      proc = subprocess.Popen(["mprof-report", "--reports=sample", profile],
+                              stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+      stdout = proc.communicate()[0]
+    except OSError as e:
+      showWarning("cannot summarise the mono profiles, mprof-report is not available: " + str(e))
+      return None
+    if proc.returncode != 0:
+      showWarning("cannot summarise the profile '" + profile + "'")
+      continue
+    for line in stdout.splitlines():
+      match = re.match(r'^\s*(\d+)\s+\d+\.\d+\s+(\S.*?)\s*$', line)
+      if match:
+        # Unmanaged symbols carry their address, which differs between runs
+        method = re.sub(r'0x[0-9a-fA-F]+', '0x?', match.group(2))
+        hotspots[method] = hotspots.get(method, 0) + int(match.group(1))
+  return hotspots
+
+def pythonHotspots(profile):
+  """ The time spent in each function of whoop.py itself, excluding
+  the functions it calls """
+  hotspots = { }
+  for (file, line, function), stats in pstats.Stats(profile).stats.items():
+    hotspots[function + " (" + os.path.basename(file) + ":" + str(line) + ")"] = stats[2]
+  return hotspots
+
+def writeHotspots(summary, stage, hotspots, count):
+  """ Writes the share of the samples (or time) of the hottest methods
+  of a stage. A previous summary is kept, next to a diff of the shares """
+  total = float(sum(hotspots.values()))
+  shares = dict((method, 100.0 * value / total) for method, value in hotspots.items() if value > 0)
+  hottest = sorted(shares.items(), key=lambda item: (-item[1], item[0]))[:count]
+  previous = { }
+  if os.path.isfile(summary):
+    os.rename(summary, summary + ".previous")
+    with open(summary + ".previous", "r") as f:
+      for line in f.readlines():
+        fields = line.rstrip("\n").split("\t", 1)
+        if len(fields) == 2 and not line.startswith("#"):
+          previous[fields[1]] = float(fields[0])
+  with open(summary, "w") as f:
+    f.write("# " + stage + ": share (%) of the " + ("time" if stage == "whoop" else "samples") + " spent in each method\n")
+    for method, share in hottest:
+      f.write("%.2f\t%s\n" % (share, method))
+  if previous:
+    current = dict(hottest)
+    changes = [ (current.get(method, 0.0) - previous.get(method, 0.0), method)
+                for method in set(current) | set(previous) ]
+    changes = sorted([ c for c in changes if abs(c[0]) >= 0.01 ], key=lambda c: (-abs(c[0]), c[1]))
+    with open(summary + ".diff", "w") as f:
+      f.write("# " + stage + ": change of the share (%) of each method since the previous run\n")
+      for change, method in changes:
+        f.write("%+.2f\t%s\n" % (change, method))
+  if not CommandLineOptions.silent:
+    print("Hottest methods of " + stage + " (" + summary + "):")
+    for method, share in hottest[:5]:
+      print("  %6.2f%%  %s" % (share, method))
+
+def summariseProfiles(profileDir, stages, profiler, count):
+  """ Summarises the hottest methods of each profiled stage """
+  for stage in stages:
+    if stage == "whoop":
+      profiler.disable()
+      profile = os.path.join(profileDir, "whoop.prof")
+      profiler.dump_stats(profile)
+      hotspots = pythonHotspots(profile)
+    else:
+      profiles = sorted([ os.path.join(profileDir, f) for f in os.listdir(profileDir)
+                          if f.startswith(stage + ".") and f.endswith(".mlpd") ])
+      if not profiles:
+        continue
+      hotspots = monoHotspots(profiles)
+    if hotspots:
+      writeHotspots(os.path.join(profileDir, stage + ".hotspots"), stage, hotspots, count)
+
+def corralBoundOptions(k, recursionBound, staticLoopBound):
+  options = [ "/k:" + str(k), "/recursionBound:" + str(recursionBound) ]
+  if staticLoopBound > 0:
+    options += [ "/maxStaticLoopBound:" + str(staticLoopBound) ]
+  return options
+
+""" Parses the number of unprotected resources the race checker found
+in each pair, which is printed in the .races.info file.
+"""
+def parseUnprotectedResources(filename):
+  resources = { }
+  if not os.path.isfile(filename):
+    return resources
+  with open(filename, "r") as f:
+    for line in f.readlines():
+      fields = line.strip().split('::')
+      if len(fields) != 3:
+        continue
+      try:
+        resources[(fields[0], fields[1])] = int(fields[2])
+      except ValueError:
+        continue
+  return resources
+
+def checkPairWithCorral(directory, file, bounds, timeout, counter):
+  parser = CorralReportParser()
+  runTool("corral",
+          (["mono"] if os.name == "posix" else []) +
+          [findtools.corralBinDir + "/corral.exe"] +
+          CommandLineOptions.corralOptions + corralBoundOptions(*bounds) +
+          [ directory + os.sep + file ],
+          ErrorCodes.CORRAL_ERROR,
+          timeout,
+          { "file": file, "k": bounds[0], "recursionBound": bounds[1] },
+          parser if CommandLineOptions.stopAtFirstRace or CommandLineOptions.adaptiveBounds else None)
+  if parser.races > 0 and CommandLineOptions.stopAtFirstRace:
+    if not CommandLineOptions.silent:
+      print("Corral confirmed a race in " + file + ", skipping the remaining pairs")
+    raise ReportAndExit(ErrorCodes.DRIVER_ERROR, "Corral confirmed a race in " + file)
+  if CommandLineOptions.showCorralStats:
+    print("Pairs analysed so far: " + str(counter))
+    print("Time elapsed so far: " + str(Timing["corral"]))
+  return parser.races > 0
+
 def runCorral(filename):
     directory = os.path.dirname(os.path.realpath(filename))
     inputFile = os.path.splitext(os.path.basename(filename))[0]
+    files = sorted([ file for file in os.listdir(directory)
+                     if fnmatch.fnmatch(file, inputFile + '_check_racy_*.bpl') ])
+    maxBounds = (CommandLineOptions.k, CommandLineOptions.recursionBound, CommandLineOptions.staticLoopBound)
+
+    reportProgress("corral", 0, len(files))
+    if not CommandLineOptions.adaptiveBounds:
+      for counter, file in enumerate(files, 1):
+        checkPairWithCorral(directory, file, maxBounds, CommandLineOptions.componentTimeout, counter)
+        reportProgress("corral", counter, len(files))
+      return
+
+    # the pairs with the most unprotected resources are the most likely to be racy
+    resources = parseUnprotectedResources(filename + '.races.info')
+    def unprotectedResources(file):
+      for (ep1, ep2), count in resources.items():
+        if file == inputFile + '_check_racy_' + ep1 + '_' + ep2 + '.bpl':
+          return count
+      return 0
+    pending = sorted(files, key=unprotectedResources, reverse=True)
+
+    initialBounds = tuple(min(1, bound) for bound in maxBounds)
+    bounds = initialBounds
     counter = 0
-    for file in os.listdir(directory):
-      if fnmatch.fnmatch(file, inputFile + '_check_racy_*.bpl'):
-        runTool("corral",
-                (["mono"] if os.name == "posix" else []) +
-                [findtools.corralBinDir + "/corral.exe"] +
-                CommandLineOptions.corralOptions + [ directory + os.sep + file ],
-                ErrorCodes.CORRAL_ERROR,
-                CommandLineOptions.componentTimeout)
+    elapsed = 0.0
+    while pending:
+      verbose("Running Corral with /k:" + str(bounds[0]) + " /recursionBound:" + str(bounds[1]) +
+              " on " + str(len(pending)) + " pairs")
+      racy = [ ]
+      # the checks of the deeper rounds are only known once a round is over
+      total = counter + len(pending)
+      for file in pending:
+        timeout = CommandLineOptions.componentTimeout
+        # the smallest bounds are always checked, the budget only limits the deepening
+        if CommandLineOptions.corralBudget > 0 and bounds != initialBounds:
+          if elapsed >= CommandLineOptions.corralBudget:
+            showWarning("Corral budget exhausted, not deepening the bounds any further")
+            return
+          # runTool deducts the time Corral has been timed for so far from the timeout
+          budget = max(1, int(CommandLineOptions.corralBudget - elapsed)) + int(Timing.get("corral", 0))
+          timeout = budget if timeout == 0 else min(timeout, budget)
         counter += 1
-        if CommandLineOptions.showCorralStats:
-          print("Pairs analysed so far: " + str(counter))
-          print("Time elapsed so far: " + str(Timing["corral"]))
+        start = time.time()
+        try:
+          if checkPairWithCorral(directory, file, bounds, timeout, counter):
+            racy.append(file)
+          reportProgress("corral", counter, total)
+        except ReportAndExit as e:
+          # a pair that has been checked with smaller bounds is not lost when the deeper run times out
+          if e.getExitCode() != ErrorCodes.TIMEOUT or bounds == initialBounds:
+            raise
+          showWarning("Corral timed out on " + file + ", not deepening the bounds any further")
+          return
+        elapsed += time.time() - start
+      if bounds == maxBounds:
+        break
+      pending = [ file for file in pending if file not in racy ]
+      bounds = (min(bounds[0] + 1, maxBounds[0]), min(bounds[1] + 1, maxBounds[1]),
+                min(bounds[2] * 2, maxBounds[2]))
 
 def addInline(match, info):
   foundit = False
@@ -630,6 +1285,200 @@ def processBPL(file, info):
     f.seek(0)
     f.write(bpl)
 
+def chauffeurCommand(sourceFile):
+  return [findtools.chauffeurDir + "/chauffeur"] + \
+         CommandLineOptions.chauffeurOptions + \
+         [sourceFile, "--", "-w"] + \
+         ["-I" + findtools.llvmLibDir + "/clang/3.5.2/include"] + \
+         [("-iquote" + str(o)) for o in CommandLineOptions.quoteIncludes] + \
+         [("-I" + str(o)) for o in clangCoreIncludes] + \
+         [("-I" + str(o)) for o in CommandLineOptions.includes]
+
+def clangCommand(reFilename, bcFilename):
+  return [findtools.llvmBinDir + "/clang"] + \
+         CommandLineOptions.clangOptions + \
+         ["-o", bcFilename, reFilename] + \
+         [("-iquote" + str(o)) for o in CommandLineOptions.quoteIncludes] + \
+         [("-I" + str(o)) for o in CommandLineOptions.includes] + \
+         [("-D" + str(o)) for o in CommandLineOptions.defines]
+
+def createTranslationUnits(workFilename, useScratchDir):
+  """ Returns the working names of the translation units of the driver.
+  The first unit is the driver itself. The others are copied next to it
+  when a scratch directory is used, renamed if their names clash """
+  units = [ workFilename ]
+  for sourceFile in CommandLineOptions.sourceFiles[1:]:
+    unit, ext = splitFilenameExt(sourceFile)
+    if useScratchDir:
+      unit = os.path.join(os.path.dirname(workFilename), os.path.basename(unit))
+      while unit in units:
+        unit = os.path.join(os.path.dirname(unit), "_" + os.path.basename(unit))
+      shutil.copyfile(sourceFile, unit + ext)
+      quoteInclude = os.path.dirname(os.path.abspath(sourceFile))
+      if quoteInclude not in CommandLineOptions.quoteIncludes:
+        CommandLineOptions.quoteIncludes.append(quoteInclude)
+    units.append(unit)
+  return units
+
+def mergeInfoFiles(infoFiles, mergedFile, sourceFiles=None):
+  """ Merges the sections of the .info files of the translation units,
+  each a <header> line followed by entries and </>, into one file. If
+  the source files of the units are given, the call site entries, of
+  four fields, get the source file as a fifth field, because units may
+  have calls on the same line """
+  headers = [ ]
+  entries = { }
+  for index, infoFile in enumerate(infoFiles):
+    with open(infoFile, "r") as f:
+      header = None
+      for line in f:
+        line = line.rstrip("\r\n")
+        if header is None:
+          if not line: continue
+          header = line
+          if header not in entries:
+            headers.append(header)
+            entries[header] = [ ]
+        elif line == "</>":
+          header = None
+        else:
+          if sourceFiles is not None and len(line.split("::")) == 4:
+            line += "::" + os.path.abspath(sourceFiles[index])
+          if line not in entries[header]:
+            entries[header].append(line)
+  with open(mergedFile, "w") as f:
+    for header in headers:
+      f.write(header + "\n")
+      for line in entries[header]:
+        f.write(line + "\n")
+      f.write("</>\n")
+
+def runFrontEnd(units, bcFilename, infoFilename, fpFilename):
+  """ Runs chauffeur and clang on the translation units of the driver,
+  on as many units at a time as there are front end jobs, then merges
+  their entry point information and links their bitcode """
+  jobs = CommandLineOptions.frontEndJobs or multiprocessing.cpu_count()
+  pending = list(units)
+  failures = [ ]
+  translated = [ ]
+  lock = threading.Lock()
+  concurrent = min(jobs, len(units)) > 1
+
+  def translate():
+    while True:
+      with lock:
+        if not pending or failures: return
+        unit = pending.pop(0)
+      try:
+        runTool("chauffeur", chauffeurCommand(unit + ".c"),
+                ErrorCodes.CLANG_ERROR,
+                CommandLineOptions.componentTimeout,
+                concurrent=concurrent)
+        if not CommandLineOptions.stopAtRe:
+          runTool("clang", clangCommand(unit + ".re.c", unit + ".unit.bc"),
+                  ErrorCodes.CLANG_ERROR,
+                  CommandLineOptions.componentTimeout,
+                  concurrent=concurrent)
+        with lock:
+          translated.append(unit)
+          done = len(translated)
+        reportProgress("translationUnits", done, len(units))
+      except Exception as e:
+        with lock: failures.append(e)
+
+  reportProgress("translationUnits", 0, len(units))
+  workers = [ threading.Thread(target=translate) for i in range(min(jobs, len(units))) ]
+  for worker in workers:
+    worker.daemon = True
+    worker.start()
+  for worker in workers:
+    # joining with a timeout keeps the main thread responsive to Ctrl-C
+    while worker.is_alive():
+      worker.join(0.1)
+  if failures:
+    raise failures[0]
+
+  mergeInfoFiles([ unit + ".info" for unit in units ], infoFilename)
+  # the calls are found by the source location that SMACK takes from the .re.c files
+  mergeInfoFiles([ unit + ".fp.info" for unit in units ], fpFilename,
+                 [ unit + ".re.c" for unit in units ])
+  if CommandLineOptions.stopAtRe: return
+
+  runTool("llvm-link",
+          [findtools.llvmBinDir + "/llvm-link"] +
+          [ unit + ".unit.bc" for unit in units ] +
+          ["-o", bcFilename],
+          ErrorCodes.CLANG_ERROR,
+          CommandLineOptions.componentTimeout)
+
+""" Compiles the Whoop and Corral assemblies ahead of time, so that
+mono does not JIT compile them again on every start. Mono loads the
+image <assembly>.so next to an assembly by itself, so only the images
+that are missing or older than their assembly are compiled. An image
+is compiled to a temporary file and then renamed, because parallel
+runs may compile the same image. The assemblies of a directory that
+cannot be written to are left to the JIT compiler.
+"""
+def compileAheadOfTime():
+  if os.name != "posix":
+    return
+  for directory in [ findtools.whoopBinDir, findtools.corralBinDir ]:
+    for assembly in sorted(os.listdir(directory)):
+      if os.path.splitext(assembly)[1] not in [ ".exe", ".dll" ]:
+        continue
+      path = os.path.join(directory, assembly)
+      image = path + ".so"
+      if os.path.isfile(image) and os.path.getmtime(image) >= os.path.getmtime(path):
+        continue
+      try:
+        fd, tempImage = tempfile.mkstemp(prefix=assembly + ".", suffix=".so.tmp", dir=directory)
+        os.close(fd)
+      except OSError as e:
+        verbose(str(e))
+        showWarning("cannot write to " + directory + ", its assemblies will be JIT compiled")
+        break
+      verbose("Compiling " + path + " ahead of time")
+      try:
+        proc = subprocess.Popen(["mono", "--aot=outfile=" + tempImage, path],
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        stdout = proc.communicate()[0]
+        if proc.returncode == 0:
+          os.rename(tempImage, image)
+          continue
+        verbose(stdout)
+      except OSError as e:
+        verbose(str(e))
+      showWarning("cannot compile " + assembly + " ahead of time, it will be JIT compiled")
+      try: os.remove(tempImage)
+      except OSError: pass
+
+""" Creates a private directory for the intermediate files of a run,
+which is removed in one step on exit, after the other clean up
+handlers have used its files, and returns the base name to use for
+them. The input is copied there because Chauffeur writes its
+output next to its input.
+"""
+def createScratchWorkspace(filename, ext):
+  base = CommandLineOptions.scratchDir
+  if CommandLineOptions.scratchInMemory:
+    if os.path.isdir("/dev/shm"):
+      base = "/dev/shm"
+    else:
+      showWarning("/dev/shm is not available, intermediate files will be kept on disk")
+  try:
+    scratchDir = tempfile.mkdtemp(prefix="whoop-", dir=base)
+  except OSError as e:
+    raise ReportAndExit(ErrorCodes.CONFIGURATION_ERROR, "Cannot create scratch directory: " + str(e))
+  CommandLineOptions.scratchWorkspace = scratchDir
+  verbose("Using scratch directory " + scratchDir)
+
+  workFilename = os.path.join(scratchDir, os.path.basename(filename))
+  if os.path.isfile(filename + ext):
+    shutil.copyfile(filename + ext, workFilename + ext)
+  # Quoted includes of the driver are still found relative to the original
+  CommandLineOptions.quoteIncludes.append(os.path.dirname(os.path.abspath(filename + ext)))
+  return workFilename
+
 """ This function should NOT be called directly instead call
 main(). It is assumed that argv has had sys.argv[0] removed.
 """
@@ -641,16 +1490,18 @@ def startToolChain(argv):
     opts, args = getopt.gnu_getopt(argv,'hVD:I:',
              ['help', 'version', 'debug', 'verbose', 'silent',
               'find-bugs', 'only-race-checking', 'only-deadlock-checking',
-              'time', 'time-as-csv=', 'time-passes',
-              'keep-temps', 'print-pairs',
+              'time', 'time-as-csv=', 'time-passes', 'trace=', 'progress=', 'profile=', 'profile-hotspots=', 'memory-limit=',
+              'keep-temps', 'scratch-dir=', 'scratch-in-memory', 'aot', 'frontend-jobs=', 'print-pairs',
               'clang-opt=', 'smack-opt=',
               'boogie-opt=', 'timeout=', 'boogie-file=',
-              'analyse-only=', 'inline', 'inline-bound=', 'k=', 'recursion-bound=', 'static-loop-bound=',
-              'no-infer', 'no-heavy-async-calls-optimisation', 'skip-non-racy-pairs',
+              'analyse-only=', 'inline', 'inline-bound=', 'inline-cost=', 'k=', 'recursion-bound=', 'static-loop-bound=',
+              'adaptive-bounds', 'corral-budget=',
+              'no-infer', 'summary-library=', 'bounded-memory', 'pack-programs', 'no-pair-discharging', 'no-program-pruning', 'no-pair-deduplication', 'bitvector-locksets', 'no-heavy-async-calls-optimisation', 'skip-non-racy-pairs',
+              'stop-at-first-race',
               'yield-all', 'yield-coarse', 'yield-no-access', 'yield-race-check',
               'optimize-corral', 'show-corral-stats',
               'inparam-aliasing', 'no-existential-opts',
-              'gen-smt2', 'solver=', 'logic=', 'other-model',
+              'gen-smt2', 'solver=', 'logic=', 'portfolio=', 'other-model',
               'stop-at-re', 'stop-at-bc', 'stop-at-bpl', 'stop-at-engine',
               'stop-at-cruncher', 'stop-at-race-checker',
               'skip-until-clang', 'skip-until-model', 'skip-until-engine',
@@ -667,16 +1518,33 @@ def startToolChain(argv):
 
   filename, ext = splitFilenameExt(args[0])
 
+  # Intermediate files go to a private scratch directory, unless they are
+  # wanted next to the input: kept, produced by a --stop-at-* option or
+  # consumed by a --skip-until-* option
+  useScratchDir = not (CommandLineOptions.keepTemps or any(CommandLineOptions.skip.values()) or
+                       CommandLineOptions.stopAtRe or CommandLineOptions.stopAtBc or
+                       CommandLineOptions.stopAtBpl or CommandLineOptions.stopAtEngine or
+                       CommandLineOptions.stopAtCruncher or CommandLineOptions.stopAtRaceChecker)
+  workFilename = filename
+  if useScratchDir:
+    workFilename = createScratchWorkspace(filename, ext)
+  if len(CommandLineOptions.sourceFiles) > 1 and CommandLineOptions.skip["chauffeur"]:
+    raise ReportAndExit(ErrorCodes.COMMAND_LINE_ERROR, "the --skip-until-* options take a single file")
+  units = createTranslationUnits(workFilename, useScratchDir)
+
   # Intermediate filenames
-  reFilename = filename + '.re.c'
-  bcFilename = filename + '.bc'
-  bplFilename = filename + '.bpl'
-  wbplFilename = filename + '.wbpl'
-  infoFilename = filename + '.info'
-  fpFilename = filename + '.fp.info'
-  summaryInfoFilename = filename + '.summaries.info'
+  reFilename = workFilename + '.re.c'
+  bcFilename = workFilename + '.bc'
+  bplFilename = workFilename + '.bpl'
+  wbplFilename = workFilename + '.wbpl'
+  wdeclsDirname = workFilename + '.wdecls'
+  infoFilename = workFilename + '.info'
+  fpFilename = workFilename + '.fp.info'
+  summaryInfoFilename = workFilename + '.summaries.info'
+  pairInfoFilename = workFilename + '.pairs.info'
+  raceInfoFilename = workFilename + '.races.info'
   smt2Filename = filename + '.smt2'
-  if not CommandLineOptions.keepTemps:
+  if not CommandLineOptions.keepTemps and not useScratchDir:
     inputFilename = filename + ext
     def DeleteFile(filename):
       """ Delete the filename if it exists; but don't delete the original input """
@@ -698,8 +1566,18 @@ def startToolChain(argv):
     if not CommandLineOptions.stopAtBpl: cleanUpHandler.register(DeleteFile, bplFilename)
     if not CommandLineOptions.stopAtEngine: cleanUpHandler.register(DeleteFilesWithPattern, wbplFilename)
     if not CommandLineOptions.stopAtEngine: cleanUpHandler.register(DeleteFile, summaryInfoFilename)
+    if not CommandLineOptions.stopAtEngine: cleanUpHandler.register(DeleteFile, pairInfoFilename)
+    if not CommandLineOptions.stopAtRaceChecker: cleanUpHandler.register(DeleteFile, raceInfoFilename)
     if not CommandLineOptions.stopAtCruncher: cleanUpHandler.register(DeleteFilesWithPattern, "wbpl")
+    if not CommandLineOptions.stopAtCruncher: cleanUpHandler.register(shutil.rmtree, wdeclsDirname, ignore_errors=True)
     if not CommandLineOptions.stopAtRaceChecker: cleanUpHandler.register(DeleteFilesWithPattern, "bpl")
+    if len(units) > 1:
+      for unit in units:
+        cleanUpHandler.register(DeleteFile, unit + ".unit.bc")
+      for unit in units[1:]:
+        if not CommandLineOptions.stopAtRe: cleanUpHandler.register(DeleteFile, unit + ".re.c")
+        if not CommandLineOptions.stopAtRe: cleanUpHandler.register(DeleteFile, unit + ".info")
+        if not CommandLineOptions.stopAtRe: cleanUpHandler.register(DeleteFile, unit + ".fp.info")
 
   if CommandLineOptions.useOtherModel:
     global clangCoreIncludes
@@ -710,14 +1588,6 @@ def startToolChain(argv):
     CommandLineOptions.chauffeurOptions.append("-inline")
     CommandLineOptions.whoopEngineOptions += [ "/inline" ]
     CommandLineOptions.whoopCruncherOptions += [ "/inline" ]
-  CommandLineOptions.chauffeurOptions.append(filename + ext)
-  CommandLineOptions.chauffeurOptions.append("--")
-  CommandLineOptions.chauffeurOptions.append("-w")
-
-  CommandLineOptions.clangOptions.append("-o")
-  CommandLineOptions.clangOptions.append(bcFilename)
-  CommandLineOptions.clangOptions.append(reFilename)
-
   if ext in [ ".c" ]:
     CommandLineOptions.smackOptions += [ bcFilename, "-o", bplFilename ]
     CommandLineOptions.smackOptions += [ "--source-loc-syms" ]
@@ -726,6 +1596,24 @@ def startToolChain(argv):
   CommandLineOptions.whoopCruncherOptions += [ "/whoopDecl:" + findtools.whoopDir + os.sep + "Model" + os.sep + "whoop_decl.bpl" ]
   CommandLineOptions.whoopRaceCheckerOptions += [ "/whoopDecl:" + findtools.whoopDir + os.sep + "Model" + os.sep + "whoop_decl.bpl" ]
 
+  if CommandLineOptions.summaryLibrary:
+    try:
+      if not os.path.isdir(CommandLineOptions.summaryLibrary):
+        os.makedirs(CommandLineOptions.summaryLibrary)
+    except OSError as e:
+      raise ReportAndExit(ErrorCodes.CONFIGURATION_ERROR, "Cannot create summary library \"" + \
+                          CommandLineOptions.summaryLibrary + "\": " + str(e))
+    CommandLineOptions.whoopEngineOptions += [ "/summaryLibrary:" + CommandLineOptions.summaryLibrary ]
+    CommandLineOptions.whoopCruncherOptions += [ "/summaryLibrary:" + CommandLineOptions.summaryLibrary ]
+
+  if CommandLineOptions.boundedMemory:
+    CommandLineOptions.whoopEngineOptions += [ "/boundedMemory" ]
+    CommandLineOptions.whoopRaceCheckerOptions += [ "/boundedMemory" ]
+
+  if CommandLineOptions.packPrograms:
+    CommandLineOptions.whoopEngineOptions += [ "/packPrograms" ]
+    CommandLineOptions.whoopCruncherOptions += [ "/packPrograms" ]
+
   if CommandLineOptions.solver == "cvc4":
     CommandLineOptions.whoopEngineOptions += [ "/proverOpt:SOLVER=cvc4" ]
     CommandLineOptions.whoopCruncherOptions += [ "/proverOpt:SOLVER=cvc4" ]
@@ -744,6 +1632,16 @@ def startToolChain(argv):
     CommandLineOptions.whoopCruncherOptions += [ "/z3exe:" + findtools.z3BinDir + os.sep + "z3.exe" ]
     CommandLineOptions.whoopRaceCheckerOptions += [ "/z3exe:" + findtools.z3BinDir + os.sep + "z3.exe" ]
 
+  if CommandLineOptions.portfolio:
+    backends = [ b + "+LOGIC=" + CommandLineOptions.logic if b.split('+')[0] == "cvc4" else b for b in CommandLineOptions.portfolio ]
+    portfolioOptions = [ "/z3exe:" + findtools.z3BinDir + os.sep + "z3.exe" ]
+    portfolioOptions += [ "/cvc4exe:" + findtools.cvc4BinDir + os.sep + "cvc4.exe" ]
+    portfolioOptions += [ "/portfolio:" + ",".join(backends) ]
+    if "cvc4" in [ b.split('+')[0] for b in backends ] and CommandLineOptions.solver != "cvc4":
+      portfolioOptions += [ "/useArrayTheory" ]
+    CommandLineOptions.whoopCruncherOptions += portfolioOptions
+    CommandLineOptions.whoopRaceCheckerOptions += portfolioOptions
+
   if CommandLineOptions.generateSmt2:
     CommandLineOptions.whoopCruncherOptions += [ "/proverLog:" + smt2Filename ]
     CommandLineOptions.whoopRaceCheckerOptions += [ "/proverLog:" + smt2Filename ]
@@ -765,11 +1663,13 @@ def startToolChain(argv):
 
   CommandLineOptions.whoopEngineOptions += [ "/inlineBound:" + str(CommandLineOptions.inlineBound) ]
   CommandLineOptions.whoopCruncherOptions += [ "/inlineBound:" + str(CommandLineOptions.inlineBound) ]
+  if CommandLineOptions.inlineCost > 0:
+    if CommandLineOptions.inline:
+      showWarning("--inline-cost has no effect with --inline")
+    CommandLineOptions.whoopEngineOptions += [ "/inlineCost:" + str(CommandLineOptions.inlineCost) ]
 
-  CommandLineOptions.corralOptions += [ "/k:" + str(CommandLineOptions.k) ]
-  CommandLineOptions.corralOptions += [ "/recursionBound:" + str(CommandLineOptions.recursionBound) ]
-  if CommandLineOptions.staticLoopBound > 0:
-    CommandLineOptions.corralOptions += [ "/maxStaticLoopBound:" + str(CommandLineOptions.staticLoopBound) ]
+  if CommandLineOptions.corralBudget > 0 and not CommandLineOptions.adaptiveBounds:
+    showWarning("--corral-budget has no effect without --adaptive-bounds")
 
   if CommandLineOptions.checkInParamAliasing:
     CommandLineOptions.whoopEngineOptions += [ "/checkInParamAliasing" ]
@@ -777,6 +1677,8 @@ def startToolChain(argv):
     CommandLineOptions.whoopEngineOptions += [ "/noExistentialOpts" ]
 
   if CommandLineOptions.analyseOnly != "":
+    CommandLineOptions.whoopEngineOptions += [ "/analyseOnly:" + CommandLineOptions.analyseOnly ]
+    CommandLineOptions.whoopCruncherOptions += [ "/analyseOnly:" + CommandLineOptions.analyseOnly ]
     CommandLineOptions.whoopRaceCheckerOptions += [ "/analyseOnly:" + CommandLineOptions.analyseOnly ]
 
   if CommandLineOptions.timePasses:
@@ -784,15 +1686,45 @@ def startToolChain(argv):
     CommandLineOptions.whoopCruncherOptions += [ "/timePasses" ]
     CommandLineOptions.whoopRaceCheckerOptions += [ "/timePasses" ]
 
+  if CommandLineOptions.traceFile is not None:
+    timelines = [ (tool, workFilename + '.' + tool + '.timeline') for tool in [ "whoopEngine", "whoopCruncher", "whoopRaceChecker" ] ]
+    CommandLineOptions.whoopEngineOptions += [ "/timeline:" + timelines[0][1] ]
+    CommandLineOptions.whoopCruncherOptions += [ "/timeline:" + timelines[1][1] ]
+    CommandLineOptions.whoopRaceCheckerOptions += [ "/timeline:" + timelines[2][1] ]
+    cleanUpHandler.register(writeTrace, CommandLineOptions.traceFile, timelines)
+
+  if CommandLineOptions.progressFile is not None:
+    CommandLineOptions.whoopEngineOptions += [ "/progress:" + CommandLineOptions.progressFile ]
+    CommandLineOptions.whoopCruncherOptions += [ "/progress:" + CommandLineOptions.progressFile ]
+    CommandLineOptions.whoopRaceCheckerOptions += [ "/progress:" + CommandLineOptions.progressFile ]
+
+  if CommandLineOptions.profileStages:
+    CommandLineOptions.profileDir = os.path.abspath(filename + ".profile")
+    profiler = startProfiling(CommandLineOptions.profileDir)
+    cleanUpHandler.register(summariseProfiles, CommandLineOptions.profileDir,
+                            CommandLineOptions.profileStages, profiler,
+                            CommandLineOptions.profileHotspots)
+
   if CommandLineOptions.noInfer:
     CommandLineOptions.whoopEngineOptions += [ "/skipInference" ]
     CommandLineOptions.whoopRaceCheckerOptions += [ "/skipInference" ]
 
+  if CommandLineOptions.noPairDischarging:
+    CommandLineOptions.whoopEngineOptions += [ "/noPairDischarging" ]
+  if CommandLineOptions.noProgramPruning:
+    CommandLineOptions.whoopEngineOptions += [ "/noProgramPruning" ]
+  if CommandLineOptions.noPairDeduplication:
+    CommandLineOptions.whoopRaceCheckerOptions += [ "/noPairDeduplication" ]
+  if CommandLineOptions.bitVectorLocksets:
+    CommandLineOptions.whoopRaceCheckerOptions += [ "/bitVectorLocksets" ]
+
   if CommandLineOptions.noHeavyAsyncCallsOptimisation:
     CommandLineOptions.whoopEngineOptions += [ "/noHeavyAsyncCallsOptimisation" ]
 
   if CommandLineOptions.findBugs:
     CommandLineOptions.whoopRaceCheckerOptions += [ "/findBugs" ]
+  if CommandLineOptions.stopAtFirstRace and not CommandLineOptions.findBugs:
+    CommandLineOptions.whoopRaceCheckerOptions += [ "/stopAtFirstRace" ]
   if CommandLineOptions.skipNonRacyPairs:
     CommandLineOptions.whoopRaceCheckerOptions += [ "/skipRaceFreePairs" ]
   if CommandLineOptions.yieldAll:
@@ -818,28 +1750,25 @@ def startToolChain(argv):
   CommandLineOptions.whoopCruncherOptions += [ bplFilename ]
   CommandLineOptions.whoopRaceCheckerOptions += [ bplFilename ]
 
-  """ RUN CHAUFFEUR """
-  if not CommandLineOptions.skip["chauffeur"]:
-    runTool("chauffeur",
-             [findtools.chauffeurDir + "/chauffeur"] +
-             CommandLineOptions.chauffeurOptions +
-             ["-I" + findtools.llvmLibDir + "/clang/3.5.2/include"] +
-             [("-I" + str(o)) for o in clangCoreIncludes] +
-             [("-I" + str(o)) for o in CommandLineOptions.includes],
-             ErrorCodes.CLANG_ERROR,
-             CommandLineOptions.componentTimeout)
-  if CommandLineOptions.stopAtRe: return 0
-
-  """ RUN CLANG """
-  if not CommandLineOptions.skip["clang"]:
-    runTool("clang",
-             [findtools.llvmBinDir + "/clang"] +
-             CommandLineOptions.clangOptions +
-             [("-I" + str(o)) for o in CommandLineOptions.includes] +
-             [("-D" + str(o)) for o in CommandLineOptions.defines],
-             ErrorCodes.CLANG_ERROR,
-             CommandLineOptions.componentTimeout)
-  if CommandLineOptions.stopAtBc: return 0
+  if len(units) > 1:
+    """ RUN CHAUFFEUR AND CLANG ON EVERY TRANSLATION UNIT """
+    runFrontEnd(units, bcFilename, infoFilename, fpFilename)
+  else:
+    """ RUN CHAUFFEUR """
+    if not CommandLineOptions.skip["chauffeur"]:
+      runTool("chauffeur",
+               chauffeurCommand(workFilename + ext),
+               ErrorCodes.CLANG_ERROR,
+               CommandLineOptions.componentTimeout)
+    if CommandLineOptions.stopAtRe: return 0
+
+    """ RUN CLANG """
+    if not CommandLineOptions.skip["clang"]:
+      runTool("clang",
+               clangCommand(reFilename, bcFilename),
+               ErrorCodes.CLANG_ERROR,
+               CommandLineOptions.componentTimeout)
+  if CommandLineOptions.stopAtRe or CommandLineOptions.stopAtBc: return 0
 
   """ RUN SMACK """
   if not CommandLineOptions.skip["smack"]:
@@ -851,6 +1780,9 @@ def startToolChain(argv):
     processBPL(bplFilename, infoFilename)
   if CommandLineOptions.stopAtBpl: return 0
 
+  if CommandLineOptions.aot:
+    compileAheadOfTime()
+
   """ RUN WHOOP ENGINE """
   if not CommandLineOptions.skip["engine"]:
     runTool("whoopEngine",
@@ -884,7 +1816,7 @@ def startToolChain(argv):
 
   if CommandLineOptions.findBugs:
       """ RUN CORRAL """
-      runCorral(filename)
+      runCorral(workFilename)
 
   """ SUCCESS - REPORT STATUS """
   if CommandLineOptions.silent:
@@ -901,6 +1833,12 @@ def showTiming(exitCode):
     total = sum(times)
     times.append(total)
     row = [ '%.3f' % t for t in times ]
+    for tool in Tools:
+      usage = Resources.get(tool)
+      row.append('%.3f' % (usage["user"] + usage["sys"]) if usage else '0.000')
+    for tool in Tools:
+      usage = Resources.get(tool)
+      row.append('%.1f' % usage["rss"] if usage and usage["rss"] is not None else '')
     label = CommandLineOptions.timeCSVLabel
     if len(label) > 0: row.insert(0, label)
     if exitCode is ErrorCodes.SUCCESS:
@@ -916,10 +1854,25 @@ def showTiming(exitCode):
       padTime = max([ len('%.3f secs' % t) for t in Timing.values() ])
       for tool in Tools:
         if tool in Timing:
-          print("- %s : %s" % (tool.ljust(padTool), ('%.3f secs' % Timing[tool]).rjust(padTime)))
+          print("- %s : %s%s" % (tool.ljust(padTool), ('%.3f secs' % Timing[tool]).rjust(padTime),
+                                 formatResources(Resources.get(tool))))
+      if PairResources:
+        print("Corral pairs:")
+        for (pairFile, user, system, peak, solverPeak) in PairResources:
+          print("- %s :%s" % (pairFile, formatResources({ "user": user, "sys": system, "rss": peak, "solverRss": solverPeak })))
     else:
       print("- no tools ran")
 
+def formatResources(usage):
+  if usage is None:
+    return ""
+  result = " (user %.3f secs, sys %.3f secs" % (usage["user"], usage["sys"])
+  if usage["rss"] is not None:
+    result += ", peak RSS %.1f MB" % usage["rss"]
+  if usage["solverRss"]:
+    result += ", peak solver RSS %.1f MB" % usage["solverRss"]
+  return result + ")"
+
 def handleTiming(exitCode):
   if CommandLineOptions.time:
     showTiming(exitCode)
@@ -933,6 +1886,11 @@ up the global variables.
 def _cleanUpGlobals():
   global CommandLineOptions
   CommandLineOptions = DefaultCmdLineOptions()
+  del TraceEvents[:]
+  Resources.clear()
+  del PairResources[:]
+  ProgressStarts.clear()
+  ProfileRuns.clear()
 
 """ Entry point for the Whoop tool chain. It is responsible
 for exception handling and for optionally running Whoop in
@@ -942,6 +1900,9 @@ def main(argv):
   def doCleanUp(timing, exitCode=ErrorCodes.SUCCESS):
     if timing:
       cleanUpHandler.register(handleTiming, exitCode)
+    # The scratch directory goes last, as writeTrace merges the timelines in it
+    if CommandLineOptions.scratchWorkspace is not None:
+      cleanUpHandler.register(shutil.rmtree, CommandLineOptions.scratchWorkspace, ignore_errors=True)
     if __name__ != '__main__':
       cleanUpHandler.register(_cleanUpGlobals)
     cleanUpHandler.call()